@@ -1,25 +1,16 @@
-import os
-import uuid
-import sqlalchemy
-from app import database, models
-
-file_path = input("파일 경로: ")
-src_name = input("출처 이름: ")
-
-
-db = database.SessionLocal()
-for i in os.listdir(file_path):
-    if os.path.isdir(os.path.join(file_path, i)):
-        for j in os.listdir(os.path.join(file_path, i)):
-            u = uuid.uuid4()
-            os.rename(os.path.join(file_path, i, j), f"C:\\Users\\USER\\OneDrive\\바탕 화면\\project\\rwCAPTCHA\\backend\\img\\{u}.jpg")
-            db.add(models.ImagePath(
-                uuid = u,
-                path = f"/img/{u}.jpg",
-                label = i,
-                source = src_name
-            ))
-            db.commit()
-db.close()            
+# ImageSaver.py
+# 하위 폴더 이름을 라벨로 사용해서 이미지를 적재 (대화형), 실제 처리는 app/ingest.py 파이프라인 사용
+# 대량 적재나 자동화에는 ingest.py CLI를 사용
+from app import database, ingest
 
+if __name__ == "__main__":  # 적재 작업자 프로세스에서 다시 실행되지 않도록
+    file_path = input("파일 경로: ")
+    src_name = input("출처 이름: ")
 
+    database.ensure_schema()
+    db = database.SessionLocal()
+    try:
+        report = ingest.run(db, ingest.scan(file_path), source_name=src_name, move=True)
+        print(report.line())
+    finally:
+        db.close()
@@ -0,0 +1,234 @@
+# admission.py
+# DB가 느려질 때(다른 프로세스가 SQLite를 잠그는 등) 지연이 모든 클라이언트로 번지지 않도록
+# /{모드}/question, /{모드}/submit 앞에서 요청을 받을지 정하는 ASGI 미들웨어 (RWCAPTCHA_ADMISSION=0 이면 끔)
+# 요청 핸들러가 DB를 직접 기다리지는 않지만(question은 challenge_pool, submit은 writer.py의 write-behind 큐),
+# DB가 느려지면 쓰기 큐가 차고, 가득 차면 submit이 큐에 자리가 날 때까지 멈춤 -> 그 뒤로 모든 요청이 줄줄이 밀림
+# CHECK_INTERVAL 마다 쓰기 큐의 flush 지연(writer.latency)과 큐가 찬 비율로 상태를 정함
+#  - normal     : 그대로
+#  - degraded   : DB 지연이 DEGRADE_SECONDS 이상이거나 큐가 DEGRADE_BACKLOG 이상 찼을 때
+#      question: 미분류 칸 없이 분류된 이미지로만 만든 문제 버퍼("first/classified" 등)에서 꺼냄 -> 저장할 피드백이 생기지 않음
+#      submit  : 결과/피드백을 큐에 넣을 때 기다리지 않음 (writer.deferring, 큐가 차면 미뤄 뒀다가 자리가 나면 옮김)
+#  - overloaded : 미뤄 둔 버퍼까지 SHED_DEFERRED 이상 찼을 때, question과 submit 모두 503 으로 거절
+#  degraded/overloaded 동안 응답에 X-RWCAPTCHA-Degraded: 1 헤더를 붙임
+#  상태가 좋아져도 RECOVER_SECONDS 동안 유지될 때까지 단계를 내리지 않음 (왔다 갔다 하지 않도록)
+# 동시 처리 수 제한: 종류(question/submit)별 최대 동시 요청 수, DB 지연이 TARGET_SECONDS 를 넘으면 그 비율만큼 줄임
+#  자리가 없으면 대기 시간 예산(QUEUE_BUDGET) 동안 기다리고, 그래도 없거나 대기 줄이 가득 차면
+#  503 + Retry-After 로 바로 거절 (핸들러에 들어가기 전이라 submit 토큰은 쓰이지 않음, 같은 토큰으로 다시 제출 가능)
+# 요청 제한(ratelimit.py) 안쪽, 작업 증명(proof_of_work.py) 바깥에서 동작
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from typing import Dict, Tuple
+
+from . import metrics
+from .writer import writer
+
+ENABLED = os.environ.get("RWCAPTCHA_ADMISSION", "1") != "0"
+CHECK_INTERVAL = 0.25
+DEGRADE_SECONDS = float(os.environ.get("RWCAPTCHA_ADMISSION_DEGRADE_MS", "500")) / 1000
+TARGET_SECONDS = 0.1      # 이 DB 지연까지는 동시 처리 수를 줄이지 않음
+DEGRADE_BACKLOG = 0.5     # 쓰기 큐가 이만큼 차면 degraded
+SHED_DEFERRED = 0.9       # 미뤄 둔 버퍼가 이만큼 차면 overloaded
+RECOVER_SECONDS = 5.0
+
+# 종류 -> (최대 동시 요청 수, 최소 동시 요청 수, 대기 시간 예산(초))
+LIMITS = {
+    "question": (256, 16, 0.1),
+    "submit": (128, 8, 0.5),
+}
+MAX_WAITING = 4           # 동시 요청 수의 몇 배까지 대기 줄에 세울지
+GATED_MODES = ("first", "second", "third")
+
+NORMAL, DEGRADED, OVERLOADED = 0, 1, 2
+LEVEL_NAMES = ("normal", "degraded", "overloaded")
+
+
+# 동시 요청 수 제한 (한도는 실행 중에 바뀔 수 있음)
+class _Slots:
+    def __init__(self, limit: int, min_limit: int, budget: float):
+        self.max_limit = limit
+        self.min_limit = min_limit
+        self.limit = limit
+        self.budget = budget
+        self.active = 0
+        self._waiters: deque = deque()
+        self.admitted = 0
+        self.shed = 0
+
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.limit * MAX_WAITING:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release()가 자리를 넘겨주면 active는 그대로 (나간 요청의 자리를 이어받음)
+            await asyncio.wait_for(waiter, self.budget)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            # 자리를 받은 직후에 연결이 끊긴 경우 자리를 돌려줌
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self):
+        while self._waiters and self.active <= self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def resize(self, limit: int):
+        self.limit = limit
+        while self._waiters and self.active < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+
+class AdmissionController:
+    # source: latency(), queue_fill(), deferred_fill(), deferring 를 가진 쓰기 큐 (기본 writer, 벤치마크에서 바꿔 끼울 수 있음)
+    def __init__(self, source=writer, limits: Dict[str, Tuple[int, int, float]] = None):
+        self.source = source
+        self.slots = {action: _Slots(*limit) for action, limit in (limits or LIMITS).items()}
+        self.level = NORMAL
+        self.latency = 0.0
+        self._healthy_since = None
+        self._task: asyncio.Task = None
+        self.transitions = 0
+
+    def degraded(self) -> bool:
+        return self.level != NORMAL
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._set_level(NORMAL)
+
+    async def _run(self):
+        while True:
+            self.check()
+            await asyncio.sleep(CHECK_INTERVAL)
+
+    # DB 상태를 보고 단계와 동시 요청 수 한도를 조정
+    def check(self, now: float = None):
+        now = time.monotonic() if now is None else now
+        self.latency = self.source.latency()
+        if self.source.deferred_fill() >= SHED_DEFERRED:
+            wanted = OVERLOADED
+        elif self.latency >= DEGRADE_SECONDS or self.source.queue_fill() >= DEGRADE_BACKLOG:
+            wanted = DEGRADED
+        else:
+            wanted = NORMAL
+        if wanted >= self.level:
+            self._healthy_since = None
+            self._set_level(wanted)
+        elif self._healthy_since is None:
+            self._healthy_since = now
+        elif now - self._healthy_since >= RECOVER_SECONDS:
+            self._healthy_since = now
+            self._set_level(self.level - 1)
+        scale = min(1.0, TARGET_SECONDS / self.latency) if self.latency > 0 else 1.0
+        for slots in self.slots.values():
+            slots.resize(max(slots.min_limit, int(slots.max_limit * scale)))
+
+    def _set_level(self, level: int):
+        if level != self.level:
+            print(f"수락 제어: {LEVEL_NAMES[self.level]} -> {LEVEL_NAMES[level]} (DB 지연 {self.latency * 1000:.0f}ms)")
+            self.level = level
+            self.transitions += 1
+        # DB가 느린 동안에는 결과/피드백 저장이 요청을 붙잡지 않도록 미뤄 둠
+        self.source.deferring = level != NORMAL
+
+    # 반환: (받아들임 여부, 다시 시도할 때까지 기다릴 시간(초))
+    async def admit(self, action: str) -> Tuple[bool, float]:
+        slots = self.slots[action]
+        if self.level == OVERLOADED:
+            reason = "overloaded"
+        elif await slots.acquire():
+            slots.admitted += 1
+            return True, 0.0
+        else:
+            reason = "busy"
+        slots.shed += 1
+        metrics.ADMISSION_SHED.labels(action, reason).inc()
+        return False, max(1.0, min(30.0, self.latency * 2))
+
+    def release(self, action: str):
+        self.slots[action].release()
+
+    # 라우트에서 호출: 문제 버퍼 이름 (degraded 이면 미분류 칸 없는 버퍼)
+    def question_key(self, key: str) -> str:
+        return f"{key}/classified" if self.level != NORMAL else key
+
+    def stats(self) -> dict:
+        return {
+            "enabled": ENABLED, "level": LEVEL_NAMES[self.level], "db_latency_ms": round(self.latency * 1000, 1),
+            "queue_fill": round(self.source.queue_fill(), 3), "deferred_fill": round(self.source.deferred_fill(), 3),
+            "transitions": self.transitions,
+            "actions": {action: {"limit": s.limit, "active": s.active, "waiting": s.waiting(),
+                                 "admitted": s.admitted, "shed": s.shed} for action, s in self.slots.items()},
+        }
+
+
+controller = AdmissionController()
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+        # 경로: /{모드}/{question|submit}
+        parts = scope["path"].strip("/").split("/")
+        if len(parts) != 2 or parts[0] not in GATED_MODES or parts[1] not in self.controller.slots:
+            return await self.app(scope, receive, send)
+        action = parts[1]
+        admitted, retry_after = await self.controller.admit(action)
+        if not admitted:
+            body = json.dumps({"detail": "Server is busy, retry later"}).encode()
+            await send({"type": "http.response.start", "status": 503, "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+                (b"x-rwcaptcha-degraded", b"1"),
+            ]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        try:
+            if not self.controller.degraded():
+                return await self.app(scope, receive, send)
+
+            async def send_degraded(message):
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": [*message.get("headers", []), (b"x-rwcaptcha-degraded", b"1")]}
+                await send(message)
+
+            await self.app(scope, receive, send_degraded)
+        finally:
+            self.controller.release(action)
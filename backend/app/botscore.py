@@ -0,0 +1,173 @@
+# botscore.py
+# 제출마다 "사람다움" 점수(0~1, 낮을수록 봇 같음)를 계산하는 가벼운 이상 탐지
+# 정답 여부 말고도 봇이 드러나는 신호를 모음
+#  - 문제를 받은 뒤 제출까지 걸린 시간: 토큰 발급 시각(challenge.py)부터 측정
+#    모드별 최소 시간(MIN_SECONDS)보다 빠르거나, 전체 사용자의 log(시간) 분포보다 훨씬 빠르면 감점
+#  - 클라이언트(IP)별 최근 기록: 제출 간격, 걸린 시간이 매번 거의 같은지(분산), 통과율, /first 선택 순서가 항상 정렬돼 있는지
+# 모든 통계는 지수 가중 평균/분산(EWMA)으로 한 번에 갱신하므로 제출 한 건에 몇 마이크로초, 클라이언트마다 float 몇 개만 보관
+# 클라이언트 기록은 rate limit(ratelimit.py)처럼 두 세대 dict를 번갈아 쓰면서 WINDOW_SECONDS 동안 안 보인 클라이언트를 버림
+# 점수가 MIN_SCORE 미만인 제출은 채점 결과는 그대로 돌려주지만 미분류 피드백과 이미지 통계에는 반영하지 않음 (라벨 오염 방지)
+# 워커마다 따로 집계 (여러 워커면 클라이언트 기록이 워커별로 나뉨)
+# RWCAPTCHA_BOT_SCORE=0 이면 끔 (모든 제출 1.0), RWCAPTCHA_BOT_SCORE_MIN 으로 기준 조정 (0이면 점수만 계산하고 제외하지 않음)
+import math
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+from . import metrics
+
+ENABLED = os.environ.get("RWCAPTCHA_BOT_SCORE", "1") != "0"
+MIN_SCORE = float(os.environ.get("RWCAPTCHA_BOT_SCORE_MIN", "0.5"))
+WINDOW_SECONDS = 600.0
+
+# 모드별로 사람이 문제를 보고 답하는 데 걸리는 최소 시간 (초), 이보다 빠르면 거의 확실히 자동 제출
+MIN_SECONDS = {"first": 1.5, "second": 2.0, "third": 2.0}
+ALPHA = 0.2              # 클라이언트 EWMA 가중치 (최근 약 5~10건)
+POPULATION_ALPHA = 0.01  # 전체 분포 EWMA 가중치
+POPULATION_WARMUP = 50   # 전체 분포를 쓰기 전 최소 제출 수
+CLIENT_WARMUP = 5        # 클라이언트 기록을 쓰기 전 최소 제출 수
+
+# 감점 가중치 (합이 1을 넘으면 점수 0)
+WEIGHTS = {"fast": 1.0, "population": 0.5, "regular": 0.6, "burst": 0.4, "perfect": 0.3, "order": 0.3}
+
+# 클라이언트 기록 (list 칸 번호)
+_N, _LAST, _MEAN, _VAR, _INTERVAL, _PASS, _SORTED = range(7)
+
+
+class _Population:
+    __slots__ = ("n", "mean", "var")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.var = 0.0
+
+    def update(self, x: float):
+        if self.n == 0:
+            self.mean = x
+        else:
+            delta = x - self.mean
+            self.mean += POPULATION_ALPHA * delta
+            self.var = (1 - POPULATION_ALPHA) * (self.var + POPULATION_ALPHA * delta * delta)
+        self.n += 1
+
+
+class BotScorer:
+    def __init__(self, min_score: float = MIN_SCORE, window: float = WINDOW_SECONDS):
+        self.min_score = min_score
+        self.window = window
+        self._current: Dict[int, List[float]] = {}
+        self._previous: Dict[int, List[float]] = {}
+        self._rotated_at = time.monotonic()
+        self._population: Dict[str, _Population] = {mode: _Population() for mode in MIN_SECONDS}
+        self.scored = 0
+        self.flagged = 0
+
+    def __len__(self):
+        return len(self._current) + len(self._previous)
+
+    def _client(self, client: str, now: float) -> Optional[List[float]]:
+        if now - self._rotated_at >= self.window:
+            self._previous, self._current = self._current, {}
+            self._rotated_at = now
+        h = hash(client)
+        entry = self._current.get(h)
+        if entry is None:
+            entry = self._previous.pop(h, None)
+            if entry is not None:
+                self._current[h] = entry
+        return entry
+
+    # 제출 한 건의 점수를 계산하고 기록 갱신
+    # elapsed: 문제를 받은 뒤 걸린 시간 (초), selection: /first 에서 고른 칸 번호 (보낸 순서 그대로)
+    # now: 기록용 시각 (기본 time.monotonic, 벤치마크에서 가상 시각 사용)
+    def score(self, mode: str, client: str, elapsed: float, passed: bool,
+              selection: Optional[Sequence[int]] = None, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        log_t = math.log(max(elapsed, 0.05))
+        penalty = 0.0
+
+        # 사람이 불가능한 속도
+        floor = MIN_SECONDS.get(mode, 1.0)
+        if elapsed < floor:
+            penalty += WEIGHTS["fast"]
+        elif elapsed < 2 * floor:
+            penalty += WEIGHTS["fast"] * (2 * floor - elapsed) / floor * 0.5
+
+        # 전체 사용자 분포보다 2 표준편차 넘게 빠름
+        population = self._population.get(mode)
+        if population is not None and population.n >= POPULATION_WARMUP and population.var > 0:
+            z = (log_t - population.mean) / math.sqrt(population.var)
+            if z < -2:
+                penalty += WEIGHTS["population"] * min(1.0, (-2 - z) / 2)
+
+        # 같은 칸을 두 번 고르는 등 UI로는 만들 수 없는 선택
+        in_order = 0.0
+        if selection is not None:
+            if len(set(selection)) != len(selection):
+                penalty += WEIGHTS["order"]
+            in_order = 1.0 if len(selection) >= 3 and all(a < b for a, b in zip(selection, selection[1:])) else 0.0
+
+        entry = self._client(client, now)
+        if entry is None:
+            self._current[hash(client)] = [1.0, now, log_t, 0.0, self.window, float(passed), in_order]
+        else:
+            n = entry[_N]
+            interval = now - entry[_LAST]
+            delta = log_t - entry[_MEAN]
+            entry[_MEAN] += ALPHA * delta
+            entry[_VAR] = (1 - ALPHA) * (entry[_VAR] + ALPHA * delta * delta)
+            entry[_INTERVAL] += ALPHA * (interval - entry[_INTERVAL])
+            entry[_PASS] += ALPHA * (passed - entry[_PASS])
+            entry[_SORTED] += ALPHA * (in_order - entry[_SORTED])
+            entry[_N] = n + 1
+            entry[_LAST] = now
+            if n >= CLIENT_WARMUP:
+                # 걸린 시간이 매번 거의 같음 (log 표준편차 0.15 미만, 사람은 보통 0.3 이상)
+                std = math.sqrt(entry[_VAR])
+                if std < 0.15:
+                    penalty += WEIGHTS["regular"] * (0.15 - std) / 0.15
+                # 쉬지 않고 연달아 제출
+                if entry[_INTERVAL] < 2 * floor:
+                    penalty += WEIGHTS["burst"] * min(1.0, (2 * floor - entry[_INTERVAL]) / floor)
+                # 거의 틀리지 않음
+                if entry[_PASS] > 0.98:
+                    penalty += WEIGHTS["perfect"]
+                # 항상 번호 순서대로 고름
+                if selection is not None and entry[_SORTED] > 0.9:
+                    penalty += WEIGHTS["order"]
+
+        value = max(0.0, 1.0 - penalty)
+        # 사람으로 보이는 제출만 전체 분포에 반영 (봇이 기준을 끌어내리지 못하도록)
+        if population is not None and value >= self.min_score:
+            population.update(log_t)
+        self.scored += 1
+        if value < self.min_score:
+            self.flagged += 1
+        metrics.BOT_SCORE.labels(mode).observe(value)
+        return value
+
+    def trusted(self, value: float) -> bool:
+        return value >= self.min_score
+
+    def stats(self) -> dict:
+        return {
+            "enabled": ENABLED, "min_score": self.min_score, "clients": len(self), "scored": self.scored,
+            "flagged": self.flagged,
+            "population": {mode: {"submissions": p.n, "median_seconds": round(math.exp(p.mean), 2) if p.n else None}
+                           for mode, p in self._population.items()},
+        }
+
+
+scorer = BotScorer()
+
+
+# 라우트에서 호출: 제출 한 건의 점수 (꺼져 있으면 항상 1.0)
+def score(mode: str, client: str, issued_at: float, passed: bool, selection: Optional[Sequence[int]] = None) -> float:
+    if not ENABLED:
+        return 1.0
+    return scorer.score(mode, client, time.time() - issued_at, passed, selection)
+
+
+def trusted(value: float) -> bool:
+    return scorer.trusted(value)
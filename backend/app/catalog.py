@@ -0,0 +1,62 @@
+# catalog.py
+# 분류된 카테고리 목록과 카테고리별 이미지 수를 프로세스 안에 캐시
+# 매 요청마다 SELECT DISTINCT label 로 테이블 전체를 훑지 않도록 이미지 풀에서 계산하고 풀이 바뀔 때만 다시 만듦
+import os
+from typing import Dict, List
+
+from .image_pool import ImagePool, UNCLASSIFIED, pool
+
+# 다른 프로세스(ImageSaver.py 등 적재 스크립트)가 라벨을 바꿨음을 서버에 알리는 파일
+# 서버는 이 파일의 수정 시각이 바뀌면 이미지 풀을 전체 다시 읽음
+STAMP_PATH = os.environ.get("RWCAPTCHA_CATALOG_STAMP", "./catalog.stamp")
+
+
+def touch_stamp(path: str = STAMP_PATH):
+    with open(path, "a"):
+        os.utime(path, None)
+
+
+def read_stamp(path: str = STAMP_PATH) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+class CategoryCatalog:
+    def __init__(self, image_pool: ImagePool):
+        self._pool = image_pool
+        self._version = -1
+        self._counts: Dict[str, int] = {}
+        self._categories: List[str] = []
+
+    def _rebuild(self):
+        version = self._pool.version
+        counts = {label: n for label, n in self._pool.label_counts().items()
+                  if label != UNCLASSIFIED and n > 0}
+        self._categories = sorted(counts)
+        self._counts = {label: counts[label] for label in self._categories}
+        self._version = version
+
+    def _ensure(self):
+        if self._version != self._pool.version:
+            self._rebuild()
+
+    def invalidate(self):
+        self._version = -1
+
+    # 질문에 사용할 수 있는 분류된 카테고리 목록
+    def categories(self) -> List[str]:
+        self._ensure()
+        return self._categories
+
+    # 카테고리별 이미지 수 (unclassified 제외)
+    def counts(self) -> Dict[str, int]:
+        self._ensure()
+        return dict(self._counts)
+
+    def unclassified_count(self) -> int:
+        return self._pool.count(UNCLASSIFIED)
+
+
+catalog = CategoryCatalog(pool)
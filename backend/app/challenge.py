@@ -0,0 +1,177 @@
+# challenge.py
+# /question 에서 발급하고 /submit 에서 검증하는 서명된 챌린지 토큰
+# 채점에 필요한 정보(정답 라벨/개수, 미분류 이미지 위치)를 토큰 안에 암호화해서 넣어두므로
+# 제출 시 DB를 다시 조회하지 않고, 클라이언트가 이미지 uuid를 바꿔치기해도 채점 결과에 영향이 없음
+#
+# 형식: base64url(nonce 16B | 암호문 | HMAC-SHA256 태그 16B)
+#  - 암호문은 HMAC-SHA256(enc_key, nonce | counter)로 만든 키스트림과 XOR (정답이 클라이언트에 보이지 않도록)
+#  - 태그는 nonce와 암호문 전체에 대한 HMAC (encrypt-then-MAC, 변조 시 거부)
+#  - nonce는 챌린지 id로도 쓰이며, 재사용(replay)을 막기 위해 만료 시각까지 챌린지 상태 저장소(state.py)에 기록
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+import uuid
+from typing import List, Tuple
+
+from . import state
+
+# 여러 워커/서버가 같은 토큰을 검증하려면 RWCAPTCHA_SECRET을 동일하게 설정해야 함
+# 설정하지 않으면 프로세스마다 임의의 키를 사용 (재시작하면 기존 토큰은 무효)
+if state.MULTI_WORKER and not os.environ.get("RWCAPTCHA_SECRET"):
+    raise RuntimeError("WEB_CONCURRENCY가 2 이상이면 모든 워커가 같은 키를 쓰도록 RWCAPTCHA_SECRET을 설정해야 합니다.")
+SECRET = os.environ.get("RWCAPTCHA_SECRET", "").encode() or secrets.token_bytes(32)
+CHALLENGE_TTL_SECONDS = 300
+MAX_ATTEMPTS = 2  # 프론트엔드는 오답 시 같은 문제로 한 번 더 제출할 수 있음
+
+NONCE_SIZE = 16
+TAG_SIZE = 16
+
+_ENC_KEY = hmac.new(SECRET, b"rwcaptcha-challenge-enc", hashlib.sha256).digest()
+_MAC_KEY = hmac.new(SECRET, b"rwcaptcha-challenge-mac", hashlib.sha256).digest()
+
+# 이미지/스프라이트 id: 문제마다 새로 만드는 불투명한 이미지 주소 (routes/images.py)
+# base64url(nonce 12B | 암호문(종류 1B | 만료 시각 4B | 내용) | 태그 12B), 같은 이미지라도 문제마다 값이 달라서
+# 주소만 보고 이미지를 식별할 수 없음 (uuid -> 정답 표를 만드는 봇 방지)
+#  - 이미지: 내용 = uuid 16B | 변형 1B
+#  - 스프라이트: 내용 = 열 수 1B | uuid 16B * 칸 수
+# 미리 만들어 둔 문제가 버퍼에서 기다리는 시간(challenge_pool.MAX_AGE)까지 고려해서 챌린지보다 길게 유지
+IMAGE_TTL_SECONDS = CHALLENGE_TTL_SECONDS + 60
+IMAGE_VARIANTS = ("", "tile", "large")  # 변형 이름 -> 번호 (""은 원본)
+IMAGE_NONCE_SIZE = 12
+IMAGE_TAG_SIZE = 12
+_KIND_IMAGE = 0
+_KIND_SPRITE = 1
+
+_IMG_ENC_KEY = hmac.new(SECRET, b"rwcaptcha-image-enc", hashlib.sha256).digest()
+_IMG_MAC_KEY = hmac.new(SECRET, b"rwcaptcha-image-mac", hashlib.sha256).digest()
+
+
+class ChallengeError(Exception):
+    pass
+
+
+def _keystream(nonce: bytes, length: int, key: bytes = _ENC_KEY) -> bytes:
+    blocks = []
+    for counter in range((length + 31) // 32):
+        blocks.append(hmac.new(key, nonce + counter.to_bytes(4, "big"), hashlib.sha256).digest())
+    return b"".join(blocks)[:length]
+
+
+def _xor(data: bytes, key: bytes) -> bytes:
+    return (int.from_bytes(data, "big") ^ int.from_bytes(key, "big")).to_bytes(len(data), "big")
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(token: str) -> bytes:
+    return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+
+
+def issue(mode: str, data: dict) -> str:
+    nonce = secrets.token_bytes(NONCE_SIZE)
+    now = time.time()
+    # t: 발급 시각(ms), 제출까지 걸린 시간 측정용 (botscore.py)
+    body = json.dumps({"m": mode, "e": int(now) + CHALLENGE_TTL_SECONDS, "t": int(now * 1000), "d": data},
+                      separators=(",", ":")).encode()
+    ciphertext = _xor(body, _keystream(nonce, len(body)))
+    tag = hmac.new(_MAC_KEY, nonce + ciphertext, hashlib.sha256).digest()[:TAG_SIZE]
+    return _b64encode(nonce + ciphertext + tag)
+
+
+# (챌린지 id, 채점 데이터, 만료 시각, 발급 시각) 반환
+def decode_full(token: str, mode: str) -> Tuple[bytes, dict, int, float]:
+    try:
+        raw = _b64decode(token)
+    except (ValueError, TypeError):
+        raise ChallengeError("Malformed challenge token")
+    if len(raw) <= NONCE_SIZE + TAG_SIZE:
+        raise ChallengeError("Malformed challenge token")
+    nonce, ciphertext, tag = raw[:NONCE_SIZE], raw[NONCE_SIZE:-TAG_SIZE], raw[-TAG_SIZE:]
+    expected = hmac.new(_MAC_KEY, nonce + ciphertext, hashlib.sha256).digest()[:TAG_SIZE]
+    if not hmac.compare_digest(tag, expected):
+        raise ChallengeError("Invalid challenge token")
+    body = json.loads(_xor(ciphertext, _keystream(nonce, len(ciphertext))))
+    if body["m"] != mode:
+        raise ChallengeError("Challenge token issued for another mode")
+    if body["e"] < time.time():
+        raise ChallengeError("Challenge expired")
+    issued_at = body["t"] / 1000 if "t" in body else body["e"] - CHALLENGE_TTL_SECONDS
+    return nonce, body["d"], body["e"], issued_at
+
+
+def decode(token: str, mode: str) -> Tuple[bytes, dict, int]:
+    nonce, data, expires_at, _ = decode_full(token, mode)
+    return nonce, data, expires_at
+
+
+# 토큰을 검증하고 제출 횟수를 하나 차감, (챌린지 id, 채점 데이터, 발급 시각) 반환
+async def redeem(token: str, mode: str) -> Tuple[bytes, dict, float]:
+    challenge_id, data, expires_at, issued_at = decode_full(token, mode)
+    if not await state.attempt(challenge_id, expires_at, MAX_ATTEMPTS):
+        raise ChallengeError("Challenge already used")
+    return challenge_id, data, issued_at
+
+
+# 정답을 맞힌 챌린지는 더 이상 제출할 수 없도록 닫음
+async def close(challenge_id: bytes):
+    await state.close(challenge_id)
+
+
+def _seal_media(kind: int, content: bytes) -> str:
+    nonce = secrets.token_bytes(IMAGE_NONCE_SIZE)
+    body = bytes([kind]) + (int(time.time()) + IMAGE_TTL_SECONDS).to_bytes(4, "big") + content
+    ciphertext = _xor(body, _keystream(nonce, len(body), _IMG_ENC_KEY))
+    tag = hmac.new(_IMG_MAC_KEY, nonce + ciphertext, hashlib.sha256).digest()[:IMAGE_TAG_SIZE]
+    return _b64encode(nonce + ciphertext + tag)
+
+
+# 검증 후 (내용, 만료 시각) 반환
+def _open_media(media_id: str, kind: int) -> Tuple[bytes, int]:
+    try:
+        raw = _b64decode(media_id)
+    except (ValueError, TypeError):
+        raise ChallengeError("Malformed image id")
+    if len(raw) <= IMAGE_NONCE_SIZE + 5 + IMAGE_TAG_SIZE:
+        raise ChallengeError("Malformed image id")
+    nonce, ciphertext, tag = raw[:IMAGE_NONCE_SIZE], raw[IMAGE_NONCE_SIZE:-IMAGE_TAG_SIZE], raw[-IMAGE_TAG_SIZE:]
+    expected = hmac.new(_IMG_MAC_KEY, nonce + ciphertext, hashlib.sha256).digest()[:IMAGE_TAG_SIZE]
+    if not hmac.compare_digest(tag, expected):
+        raise ChallengeError("Invalid image id")
+    body = _xor(ciphertext, _keystream(nonce, len(ciphertext), _IMG_ENC_KEY))
+    expires_at = int.from_bytes(body[1:5], "big")
+    if body[0] != kind:
+        raise ChallengeError("Invalid image id")
+    if expires_at < time.time():
+        raise ChallengeError("Image id expired")
+    return body[5:], expires_at
+
+
+def seal_image(image_uuid, variant: str = "") -> str:
+    return _seal_media(_KIND_IMAGE, uuid.UUID(str(image_uuid)).bytes + bytes([IMAGE_VARIANTS.index(variant)]))
+
+
+# 이미지 id를 검증하고 (uuid 문자열, 변형 이름, 만료 시각) 반환
+def open_image(image_id: str) -> Tuple[str, str, int]:
+    content, expires_at = _open_media(image_id, _KIND_IMAGE)
+    if len(content) != 17 or content[16] >= len(IMAGE_VARIANTS):
+        raise ChallengeError("Malformed image id")
+    return str(uuid.UUID(bytes=content[:16])), IMAGE_VARIANTS[content[16]], expires_at
+
+
+def seal_sprite(image_uuids: List, columns: int) -> str:
+    return _seal_media(_KIND_SPRITE, bytes([columns]) + b"".join(uuid.UUID(str(u)).bytes for u in image_uuids))
+
+
+# 스프라이트 id를 검증하고 (uuid 문자열 목록, 열 수, 만료 시각) 반환
+def open_sprite(sprite_id: str) -> Tuple[List[str], int, int]:
+    content, expires_at = _open_media(sprite_id, _KIND_SPRITE)
+    if len(content) < 17 or (len(content) - 1) % 16 or content[0] == 0:
+        raise ChallengeError("Malformed sprite id")
+    uuids = [str(uuid.UUID(bytes=content[i:i + 16])) for i in range(1, len(content), 16)]
+    return uuids, content[0], expires_at
@@ -0,0 +1,109 @@
+# challenge_pool.py
+# 모드(first/second/third)별로 미리 만들어 둔 문제를 담아두는 버퍼
+# 백그라운드 태스크가 채우고 /question 핸들러는 꺼내기만 하므로 응답 시간이 큐에서 꺼내는 시간 수준으로 줄어듦
+# 채우는 양은 최근 요청 속도(EWMA)에 맞춰 조절
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Callable, Dict, Tuple
+
+REFILL_INTERVAL = 0.1    # 버퍼 확인 주기 (초)
+REFILL_HORIZON = 2.0     # 최근 요청 속도 기준으로 몇 초 분량을 미리 만들어 둘지
+MIN_DEPTH = 16
+MAX_DEPTH = 2048
+MAX_AGE = 30.0           # 만든 지 오래된 문제는 버림 (라벨 변경 등 반영)
+BUILD_CHUNK = 64         # 이만큼 만들 때마다 이벤트 루프에 양보
+RATE_SMOOTHING = 0.2
+
+
+class _ModeBuffer:
+    def __init__(self, builder: Callable[[], Tuple]):
+        self.builder = builder
+        self.items: deque = deque()
+        self.target = MIN_DEPTH
+        self.rate = 0.0          # 초당 요청 수 (EWMA)
+        self.taken = 0           # 이번 주기 동안 꺼낸 수
+        self.hits = 0
+        self.misses = 0          # 버퍼가 비어서 요청 중에 직접 만든 횟수
+        self.low_since = None    # 버퍼가 목표치 아래로 내려간 시각
+        self.refill_lag = 0.0    # 마지막으로 목표치를 다시 채우는 데 걸린 시간 (초)
+
+
+class ChallengePool:
+    def __init__(self):
+        self._buffers: Dict[str, _ModeBuffer] = {}
+        self._task: asyncio.Task = None
+
+    # 각 라우터가 문제 생성 함수를 등록, builder()는 (응답 모델, 채점 데이터)를 반환
+    def register(self, mode: str, builder: Callable[[], Tuple]):
+        self._buffers[mode] = _ModeBuffer(builder)
+
+    def take(self, mode: str) -> Tuple:
+        buf = self._buffers[mode]
+        buf.taken += 1
+        now = time.monotonic()
+        while buf.items:
+            built_at, item = buf.items.popleft()
+            if now - built_at <= MAX_AGE:
+                buf.hits += 1
+                self._mark_low(buf, now)
+                return item
+        buf.misses += 1
+        self._mark_low(buf, now)
+        return buf.builder()
+
+    @staticmethod
+    def _mark_low(buf: _ModeBuffer, now: float):
+        if buf.low_since is None and len(buf.items) < buf.target:
+            buf.low_since = now
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            for mode, buf in self._buffers.items():
+                buf.rate += RATE_SMOOTHING * (buf.taken / REFILL_INTERVAL - buf.rate)
+                buf.taken = 0
+                buf.target = min(MAX_DEPTH, max(MIN_DEPTH, math.ceil(buf.rate * REFILL_HORIZON)))
+                try:
+                    await self._fill(buf)
+                except Exception as e:
+                    # 카테고리가 없는 등 문제를 만들 수 없는 상태, 요청 시 직접 만들면서 오류를 돌려줌
+                    print(f"{mode} 문제 미리 만들기 실패: {e}")
+            await asyncio.sleep(REFILL_INTERVAL)
+
+    async def _fill(self, buf: _ModeBuffer):
+        # 요청이 뜸해서 오래 남은 문제를 먼저 버리고 새로 채움 (안 그러면 가득 찬 버퍼가 그대로 남아 take()마다 직접 만듦)
+        now = time.monotonic()
+        while buf.items and now - buf.items[0][0] > MAX_AGE:
+            buf.items.popleft()
+        while len(buf.items) < buf.target:
+            for _ in range(min(BUILD_CHUNK, buf.target - len(buf.items))):
+                buf.items.append((time.monotonic(), buf.builder()))
+            await asyncio.sleep(0)
+        if buf.low_since is not None:
+            buf.refill_lag = time.monotonic() - buf.low_since
+            buf.low_since = None
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            mode: {
+                "depth": len(buf.items),
+                "target": buf.target,
+                "rate": round(buf.rate, 2),
+                "hits": buf.hits,
+                "misses": buf.misses,
+                "refill_lag": round(buf.refill_lag, 4),
+            }
+            for mode, buf in self._buffers.items()
+        }
+
+
+challenges = ChallengePool()
@@ -0,0 +1,144 @@
+# consensus.py
+# 미분류 이미지에 대한 사용자 피드백을 실시간으로 집계해서 충분히 합의된 라벨로 승격
+# 피드백이 들어올 때마다 이미지별 라벨 득표수만 갱신하므로 unclassified_feedback 전체를 다시 GROUP BY 하지 않음
+# (서버 시작 시 한 번만 미분류 이미지에 대한 피드백을 집계해서 불러옴)
+import asyncio
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from . import catalog as catalog_module, metrics, models
+from .catalog import catalog
+from .database import AsyncSessionLocal
+from .image_pool import UNCLASSIFIED, pool
+from .state import MULTI_WORKER
+
+# 최소 득표 수와 1위 라벨 득표 비율(신뢰도)을 모두 넘으면 승격
+MIN_VOTES = int(os.environ.get("RWCAPTCHA_CONSENSUS_MIN_VOTES", "5"))
+MIN_CONFIDENCE = float(os.environ.get("RWCAPTCHA_CONSENSUS_MIN_CONFIDENCE", "0.8"))
+
+
+# 미분류 이미지별 (uuid, 라벨, 득표수)
+def tally_query(db: Session):
+    return db.query(models.UnclassifiedFeedback.image_uuid, models.UnclassifiedFeedback.user_assigned_label,
+                    func.count()) \
+        .join(models.ImagePath, models.ImagePath.uuid == models.UnclassifiedFeedback.image_uuid) \
+        .filter(models.ImagePath.label == UNCLASSIFIED) \
+        .group_by(models.UnclassifiedFeedback.image_uuid, models.UnclassifiedFeedback.user_assigned_label)
+
+
+# 보존 기간이 지나 날짜별 득표수로 접힌 피드백 (retention.py), 원본 피드백 집계에 더함
+def archived_tally_query(db: Session):
+    return db.query(models.DailyLabelVotes.image_uuid, models.DailyLabelVotes.label,
+                    func.sum(models.DailyLabelVotes.votes)) \
+        .join(models.ImagePath, models.ImagePath.uuid == models.DailyLabelVotes.image_uuid) \
+        .filter(models.ImagePath.label == UNCLASSIFIED) \
+        .group_by(models.DailyLabelVotes.image_uuid, models.DailyLabelVotes.label)
+
+
+class LabelConsensus:
+    def __init__(self, min_votes: int = MIN_VOTES, min_confidence: float = MIN_CONFIDENCE):
+        self.min_votes = min_votes
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        # uuid 문자열 -> [총 득표수, {라벨: 득표수}]  (미분류 상태인 이미지만 보관, 승격되면 삭제)
+        self._tallies: Dict[str, list] = {}
+        self.promoted = 0
+
+    def __len__(self):
+        return len(self._tallies)
+
+    def _decide(self, key: str) -> Optional[str]:
+        total, votes = self._tallies[key]
+        if total < self.min_votes:
+            return None
+        label, top = max(votes.items(), key=lambda kv: kv[1])
+        if top / total < self.min_confidence:
+            return None
+        del self._tallies[key]
+        self.promoted += 1
+        return label
+
+    # 피드백 한 건 반영, 승격 조건을 만족하면 승격할 라벨을 반환
+    def add_vote(self, image_uuid, label: str, count: int = 1) -> Optional[str]:
+        key = str(image_uuid)
+        with self._lock:
+            entry = self._tallies.get(key)
+            if entry is None:
+                entry = self._tallies[key] = [0, {}]
+            entry[0] += count
+            entry[1][label] = entry[1].get(label, 0) + count
+            return self._decide(key)
+
+    # (1위 라벨, 신뢰도, 총 득표수)
+    def confidence(self, image_uuid) -> Tuple[Optional[str], float, int]:
+        entry = self._tallies.get(str(image_uuid))
+        if entry is None:
+            return None, 0.0, 0
+        total, votes = entry
+        label, top = max(votes.items(), key=lambda kv: kv[1])
+        return label, top / total, total
+
+    # 서버 시작 시 한 번: 현재 미분류인 이미지에 대한 피드백만 집계해서 불러오고, 이미 조건을 넘은 이미지는 승격
+    # 행은 (이미지, 라벨)별이고 같은 이미지/라벨이 원본과 요약 양쪽에 있을 수 있으므로
+    # 이미지별 득표를 모두 더한 뒤에 이미지마다 한 번만 판정 (일부 라벨만 보고 승격하지 않도록)
+    def load(self, db: Session) -> List[Tuple[str, str]]:
+        tallies: Dict[str, list] = {}
+        uuids = {}
+        for image_uuid, label, count in tally_query(db).all() + archived_tally_query(db).all():
+            key = str(image_uuid)
+            uuids[key] = image_uuid
+            entry = tallies.setdefault(key, [0, {}])
+            entry[0] += count
+            entry[1][label] = entry[1].get(label, 0) + count
+        decided = []
+        with self._lock:
+            self._tallies = tallies
+            for key in list(tallies):
+                winner = self._decide(key)
+                if winner:
+                    decided.append((uuids[key], winner))
+        for image_uuid, winner in decided:
+            db.execute(update(models.ImagePath).where(models.ImagePath.uuid == image_uuid).values(label=winner))
+            pool.relabel(image_uuid, winner)
+        db.commit()
+        return decided
+
+
+consensus = LabelConsensus()
+_pending_saves = set()
+
+
+@metrics.timed("consensus.save_promotion")
+async def _save_promotion(image_uuid, label: str):
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(models.ImagePath)
+                             .where(models.ImagePath.uuid == image_uuid, models.ImagePath.label == UNCLASSIFIED)
+                             .values(label=label))
+            await db.commit()
+        # 다른 워커의 이미지 풀은 스탬프가 바뀐 것을 보고 다시 로드 (인덱스 파일도 한 워커만 다시 만듦)
+        if MULTI_WORKER:
+            catalog_module.touch_stamp()
+    except Exception as e:
+        print(f"이미지 {image_uuid} 라벨 승격 저장 실패: {e}")
+
+
+# 피드백 집계 후 승격되면 이미지 풀(샘플링 대상)을 바로 바꾸고 DB는 백그라운드에서 갱신
+def record_feedback(image_uuid, label: str) -> Optional[str]:
+    current = pool.get(image_uuid)
+    if current is None or current.label != UNCLASSIFIED:
+        return None
+    # 클라이언트가 보낸 임의의 문자열로 승격되지 않도록 기존 카테고리에 대한 표만 집계
+    if label not in catalog.counts():
+        return None
+    winner = consensus.add_vote(image_uuid, label)
+    if winner:
+        pool.relabel(image_uuid, winner)
+        task = asyncio.get_running_loop().create_task(_save_promotion(image_uuid, winner))
+        _pending_saves.add(task)
+        task.add_done_callback(_pending_saves.discard)
+    return winner
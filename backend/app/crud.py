@@ -3,23 +3,27 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List
 import uuid
-from . import models
+from . import metrics, models
 
+@metrics.timed("crud.get_image_data")
 def get_image_data(db:Session, image_uuids: List[str]):
     # 여러 UUID에 대해 한 번에 쿼리하여 성능 향상
     # UUID 리스트를 SQLAlchemy가 인식할 수 있는 UUID 객체 리스트로 변환
     uuid_objects = [uuid.UUID(u) for u in image_uuids]
     return db.query(models.ImagePath).filter(models.ImagePath.uuid.in_(uuid_objects)).all()
 
+@metrics.timed("crud.get_image_path")
 def get_image_path(db: Session, u: str):
     _path = db.query(models.ImagePath).filter(models.ImagePath.uuid == uuid.UUID(u)).first()
     if _path is None: raise ValueError("존재하지 않는 이미지")
     return _path
 
+@metrics.timed("crud.get_random_images")
 def get_random_images(db: Session, num: int):
     return db.query(models.ImagePath).order_by(func.random()).limit(num).all()
 
 # 추가: 특정 카테고리를 제외하고 랜덤 이미지 가져오기 (주로 'unclassified' 제외)
+@metrics.timed("crud.get_classified_random_images")
 def get_classified_random_images(db: Session, num: int, exclude_categories: List[str] = None):
     query = db.query(models.ImagePath)
     if exclude_categories:
@@ -27,9 +31,11 @@ def get_classified_random_images(db: Session, num: int, exclude_categories: List
     return query.order_by(func.random()).limit(num).all()
 
 # 추가: 미분류 이미지만 랜덤으로 가져오기
+@metrics.timed("crud.get_unclassified_random_images")
 def get_unclassified_random_images(db: Session, num: int):
     return db.query(models.ImagePath).filter(models.ImagePath.label == "unclassified").order_by(func.random()).limit(num).all()
 
+@metrics.timed("crud.save_result")
 def save_result(db: Session, selected: list, is_correct: bool, category_asked: str):
     db_result = models.Result(
         selected_indices=','.join(map(str, selected)),
@@ -41,6 +47,7 @@ def save_result(db: Session, selected: list, is_correct: bool, category_asked: s
     db.refresh(db_result)
     return db_result
 
+@metrics.timed("crud.save_result_second")
 def save_result_second(db: Session,is_correct: bool, asked_questions: list, selected_answers: list):
     db_result = models.ResultSecond(
         asked_questions=','.join(map(str, asked_questions)),
@@ -53,6 +60,7 @@ def save_result_second(db: Session,is_correct: bool, asked_questions: list, sele
     return db_result
 
 # 추가: 미분류 이미지에 대한 사용자 피드백 저장
+@metrics.timed("crud.save_unclassified_feedback")
 def save_unclassified_feedback(db: Session, image_uuid: uuid.UUID, user_assigned_label: str):
     db_feedback = models.UnclassifiedFeedback(
         image_uuid=image_uuid,
@@ -0,0 +1,105 @@
+# crud_async.py
+# crud.py의 비동기 버전 (AsyncSession 사용), 라우트 핸들러에서 await 해서 사용
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List
+import uuid
+from . import metrics, models
+from .consensus import record_feedback
+from .writer import writer
+
+@metrics.timed("crud_async.get_image_data")
+async def get_image_data(db: AsyncSession, image_uuids: List[str]):
+    uuid_objects = [uuid.UUID(u) for u in image_uuids]
+    result = await db.execute(select(models.ImagePath).filter(models.ImagePath.uuid.in_(uuid_objects)))
+    return result.scalars().all()
+
+@metrics.timed("crud_async.get_image_path")
+async def get_image_path(db: AsyncSession, u: str):
+    result = await db.execute(select(models.ImagePath).filter(models.ImagePath.uuid == uuid.UUID(u)).limit(1))
+    _path = result.scalars().first()
+    if _path is None: raise ValueError("존재하지 않는 이미지")
+    return _path
+
+@metrics.timed("crud_async.get_random_images")
+async def get_random_images(db: AsyncSession, num: int):
+    result = await db.execute(select(models.ImagePath).order_by(func.random()).limit(num))
+    return result.scalars().all()
+
+@metrics.timed("crud_async.get_classified_random_images")
+async def get_classified_random_images(db: AsyncSession, num: int, exclude_categories: List[str] = None):
+    query = select(models.ImagePath)
+    if exclude_categories:
+        query = query.filter(models.ImagePath.label.notin_(exclude_categories))
+    result = await db.execute(query.order_by(func.random()).limit(num))
+    return result.scalars().all()
+
+@metrics.timed("crud_async.get_unclassified_random_images")
+async def get_unclassified_random_images(db: AsyncSession, num: int):
+    result = await db.execute(select(models.ImagePath).filter(models.ImagePath.label == "unclassified")
+                              .order_by(func.random()).limit(num))
+    return result.scalars().all()
+
+@metrics.timed("crud_async.save_result")
+async def save_result(db: AsyncSession, selected: list, is_correct: bool, category_asked: str):
+    db_result = models.Result(
+        selected_indices=','.join(map(str, selected)),
+        is_correct=is_correct,
+        category_asked=category_asked
+    )
+    db.add(db_result)
+    await db.commit()
+    await db.refresh(db_result)
+    return db_result
+
+@metrics.timed("crud_async.save_result_second")
+async def save_result_second(db: AsyncSession, is_correct: bool, asked_questions: list, selected_answers: list):
+    db_result = models.ResultSecond(
+        asked_questions=','.join(map(str, asked_questions)),
+        selected_answers=','.join(map(str, selected_answers)),
+        is_correct=is_correct
+    )
+    db.add(db_result)
+    await db.commit()
+    await db.refresh(db_result)
+    return db_result
+
+@metrics.timed("crud_async.save_unclassified_feedback")
+async def save_unclassified_feedback(db: AsyncSession, image_uuid: uuid.UUID, user_assigned_label: str):
+    db_feedback = models.UnclassifiedFeedback(
+        image_uuid=image_uuid,
+        user_assigned_label=user_assigned_label,
+        is_correct_main_captcha=True # 메인 캡챠가 정답일 때만 호출되므로 True로 고정
+    )
+    db.add(db_feedback)
+    await db.commit()
+    await db.refresh(db_feedback)
+    return db_feedback
+
+# write-behind 큐를 통한 저장 (요청 핸들러에서는 커밋을 기다리지 않음, writer.py 참고)
+async def queue_result(selected: list, is_correct: bool, category_asked: str):
+    await writer.enqueue(models.Result, dict(
+        selected_indices=','.join(map(str, selected)),
+        is_correct=is_correct,
+        category_asked=category_asked,
+        timestamp=datetime.utcnow()
+    ))
+
+async def queue_result_second(is_correct: bool, asked_questions: list, selected_answers: list):
+    await writer.enqueue(models.ResultSecond, dict(
+        asked_questions=','.join(map(str, asked_questions)),
+        selected_answers=','.join(map(str, selected_answers)),
+        is_correct=is_correct,
+        timestamp=datetime.utcnow()
+    ))
+
+async def queue_unclassified_feedback(image_uuid: uuid.UUID, user_assigned_label: str):
+    await writer.enqueue(models.UnclassifiedFeedback, dict(
+        image_uuid=image_uuid,
+        user_assigned_label=user_assigned_label,
+        is_correct_main_captcha=True,
+        timestamp=datetime.utcnow()
+    ))
+    # 라벨 합의 집계에 반영 (조건을 넘으면 이미지가 해당 카테고리로 승격됨)
+    record_feedback(image_uuid, user_assigned_label)
@@ -0,0 +1,268 @@
+# export.py
+# 분석용 내보내기: results, results_second, unclassified_feedback 을 열 단위(Parquet / Arrow) 파일로 스트리밍
+#  - 서버 쪽 커서(stream_results + yield_per)로 BATCH_SIZE 행씩만 읽고 배치마다 RecordBatch로 바꿔 바로 씀
+#    -> 테이블 크기와 상관없이 메모리는 배치 하나 분량으로 일정
+#  - 쉼표로 이어 붙인 문자열 컬럼(selected_indices 등)은 list<int>/list<string> 타입 컬럼으로, uuid는 문자열로,
+#    timestamp는 UTC timestamp(us)로 변환
+#  - 날짜별 파티션: <출력 폴더>/<테이블>/date=YYYY-MM-DD/part-<그 파일 첫 행 id>.parquet (hive 형식, pyarrow/duckdb/spark에서 바로 읽힘)
+#  - 증분 내보내기: 테이블마다 마지막으로 내보낸 (timestamp, id)를 <출력 폴더>/_watermark.json 에 기록하고 다음에는 그 뒤부터
+#    timestamp는 큐에 넣을 때 찍히고 DB에는 조금 늦게 들어가므로(crud_async의 배치 쓰기) 최근 LAG_SECONDS 는 다음 실행으로 미룸
+#  - 파일은 임시 이름으로 쓰고 닫은 뒤 이름을 바꾼 다음 워터마크를 갱신
+#    (그 사이에 중단되면 다음 실행이 같은 행부터 다시 써서 같은 파일 이름을 덮어씀)
+# pyarrow 패키지가 필요 (pip install pyarrow), 없으면 서버의 나머지 기능은 그대로 동작하고 내보내기만 쓸 수 없음
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from . import models
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - 선택 의존성
+    pa = None
+
+EXPORT_DIR = os.environ.get("RWCAPTCHA_EXPORT_DIR", "./export")
+BATCH_SIZE = int(os.environ.get("RWCAPTCHA_EXPORT_BATCH_SIZE", "50000"))
+LAG_SECONDS = float(os.environ.get("RWCAPTCHA_EXPORT_LAG", "60"))
+WATERMARK_FILE = "_watermark.json"
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+DAY_US = 86_400_000_000
+
+
+class Column(NamedTuple):
+    name: str
+    kind: str  # bool, int, str, uuid, timestamp, int_list, str_list
+
+
+class Table(NamedTuple):
+    model: type
+    columns: List[Column]
+
+
+TABLES: Dict[str, Table] = {
+    "results": Table(models.Result, [
+        Column("id", "int"), Column("timestamp", "timestamp"), Column("is_correct", "bool"),
+        Column("category_asked", "str"), Column("selected_indices", "int_list"),
+    ]),
+    "results_second": Table(models.ResultSecond, [
+        Column("id", "int"), Column("timestamp", "timestamp"), Column("is_correct", "bool"),
+        Column("asked_questions", "int_list"), Column("selected_answers", "str_list"),
+    ]),
+    "unclassified_feedback": Table(models.UnclassifiedFeedback, [
+        Column("id", "int"), Column("timestamp", "timestamp"), Column("image_uuid", "uuid"),
+        Column("user_assigned_label", "str"), Column("is_correct_main_captcha", "bool"),
+    ]),
+}
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("내보내기에는 pyarrow 패키지가 필요합니다. (pip install pyarrow)")
+
+
+def _types() -> dict:
+    return {
+        "bool": pa.bool_(), "int": pa.int64(), "str": pa.string(), "uuid": pa.string(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "int_list": pa.list_(pa.int64()), "str_list": pa.list_(pa.string()),
+    }
+
+
+def schema(table: str) -> "pa.Schema":
+    types = _types()
+    return pa.schema([(c.name, types[c.kind]) for c in TABLES[table].columns])
+
+
+# "3,0,7" -> [3, 0, 7], "" -> [], NULL -> NULL (파이썬 루프 없이 pyarrow 커널로 나눔)
+def _split(values: list, value_type) -> "pa.Array":
+    raw = pa.array(values, pa.string())
+    parts = pc.if_else(pc.equal(raw, ""), pa.scalar([], pa.list_(pa.string())), pc.split_pattern(raw, ","))
+    return parts.cast(pa.list_(value_type))
+
+
+def to_batch(table: str, rows: list) -> "pa.RecordBatch":
+    types = _types()
+    columns = list(zip(*rows)) if rows else [()] * len(TABLES[table].columns)
+    arrays = []
+    for column, values in zip(TABLES[table].columns, columns):
+        if column.kind == "int_list":
+            arrays.append(_split(values, pa.int64()))
+        elif column.kind == "str_list":
+            arrays.append(_split(values, pa.string()))
+        elif column.kind == "uuid":
+            arrays.append(pa.array([None if v is None else str(v) for v in values], pa.string()))
+        else:
+            # DB의 timestamp는 시간대 없는 UTC(datetime.utcnow) 값이고 pyarrow는 이를 UTC로 해석
+            arrays.append(pa.array(values, types[column.kind]))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema(table))
+
+
+# (timestamp, id) 순서로 since 다음 행부터 until 까지 배치 단위로 읽음 (timestamp 인덱스 사용)
+def export_query(table: str, since: Optional[Tuple[datetime, int]] = None, until: Optional[datetime] = None):
+    spec = TABLES[table]
+    model = spec.model
+    query = (select(*(getattr(model, c.name) for c in spec.columns))
+             .where(model.timestamp.isnot(None))
+             .order_by(model.timestamp, model.id))
+    if since is not None:
+        ts, last_id = since
+        query = query.where(or_(model.timestamp > ts, and_(model.timestamp == ts, model.id > last_id)))
+    if until is not None:
+        query = query.where(model.timestamp <= until)
+    return query
+
+
+def iter_batches(db: Session, table: str, since: Optional[Tuple[datetime, int]] = None,
+                 until: Optional[datetime] = None, batch_size: int = BATCH_SIZE) -> Iterator["pa.RecordBatch"]:
+    require_pyarrow()
+    query = export_query(table, since, until)
+    rows = db.execute(query.execution_options(stream_results=True, yield_per=batch_size))
+    try:
+        for chunk in rows.partitions():
+            yield to_batch(table, chunk)
+    finally:
+        rows.close()
+
+
+# 배치를 날짜 경계에서 자름 (배치는 timestamp 순이므로 구간마다 한 번씩)
+def split_by_day(batch: "pa.RecordBatch") -> Iterator[Tuple[str, "pa.RecordBatch"]]:
+    days = batch.column("timestamp").cast(pa.int64()).to_numpy(zero_copy_only=False) // DAY_US
+    edges = [0, *(np.flatnonzero(np.diff(days)) + 1).tolist(), len(days)]
+    for start, end in zip(edges, edges[1:]):
+        day = datetime(1970, 1, 1) + timedelta(days=int(days[start]))
+        yield day.strftime("%Y-%m-%d"), batch.slice(start, end - start)
+
+
+def read_watermarks(out_dir: str) -> Dict[str, Tuple[datetime, int]]:
+    try:
+        with open(os.path.join(out_dir, WATERMARK_FILE)) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {table: (datetime.fromisoformat(mark["timestamp"]), int(mark["id"])) for table, mark in data.items()}
+
+
+def _write_watermark(out_dir: str, table: str, mark: Tuple[datetime, int]):
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    marks = {t: {"timestamp": ts.isoformat(), "id": i} for t, (ts, i) in read_watermarks(out_dir).items()}
+    marks[table] = {"timestamp": mark[0].isoformat(), "id": mark[1]}
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(marks, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+class _PartWriter:
+    def __init__(self, directory: str, table: str, fmt: str, first_id: int):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"part-{first_id:012d}{FORMATS[fmt]}")
+        self.tmp = os.path.join(directory, f".part-{first_id:012d}.tmp")
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(self.tmp, schema(table), compression="zstd")
+        else:
+            self._writer = pa.ipc.new_file(self.tmp, schema(table))
+        self.rows = 0
+
+    def write(self, batch: "pa.RecordBatch"):
+        self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def commit(self):
+        self._writer.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        try:
+            self._writer.close()
+        finally:
+            if os.path.exists(self.tmp):
+                os.remove(self.tmp)
+
+
+# 테이블 하나를 워터마크 다음부터 내보냄, 날짜 파일 하나를 닫을 때마다 워터마크 갱신
+def export_table(db: Session, table: str, out_dir: str = EXPORT_DIR, fmt: str = "parquet",
+                 batch_size: int = BATCH_SIZE, lag: float = LAG_SECONDS,
+                 progress: Optional[Callable[[str, int], None]] = None) -> dict:
+    require_pyarrow()
+    if table not in TABLES:
+        raise KeyError(table)
+    if fmt not in FORMATS:
+        raise ValueError(f"형식은 {tuple(FORMATS)} 중 하나여야 합니다.")
+    since = read_watermarks(out_dir).get(table)
+    until = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=lag)
+    writer: Optional[_PartWriter] = None
+    current_day = None
+    last = since
+    rows = files = 0
+    try:
+        for batch in iter_batches(db, table, since, until, batch_size):
+            for day, part in split_by_day(batch):
+                if day != current_day:
+                    if writer is not None:
+                        writer.commit()
+                        _write_watermark(out_dir, table, last)
+                        files += 1
+                    directory = os.path.join(out_dir, table, f"date={day}")
+                    writer = _PartWriter(directory, table, fmt, part.column("id")[0].as_py())
+                    current_day = day
+                writer.write(part)
+                last = (part.column("timestamp")[-1].as_py().replace(tzinfo=None), part.column("id")[-1].as_py())
+            rows += batch.num_rows
+            if progress is not None:
+                progress(table, rows)
+        if writer is not None:
+            writer.commit()
+            _write_watermark(out_dir, table, last)
+            files += 1
+            writer = None
+    finally:
+        if writer is not None:
+            writer.abort()
+    return {"table": table, "rows": rows, "files": files,
+            "watermark": None if last is None else {"timestamp": last[0].isoformat(), "id": last[1]}}
+
+
+def export_all(db: Session, tables: Optional[List[str]] = None, **options) -> List[dict]:
+    return [export_table(db, table, **options) for table in (tables or list(TABLES))]
+
+
+# 관리자 API용: Arrow IPC 스트림 조각(bytes)을 배치마다 내보냄 (응답 본문에 바로 이어 붙일 수 있음)
+class _ChunkSink:
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def stream_ipc(db: Session, table: str, since: Optional[Tuple[datetime, int]] = None,
+               until: Optional[datetime] = None, batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    require_pyarrow()
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema(table))
+    yield sink.take()
+    for batch in iter_batches(db, table, since, until, batch_size):
+        writer.write_batch(batch)
+        yield sink.take()
+    writer.close()
+    yield sink.take()
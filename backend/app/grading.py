@@ -0,0 +1,141 @@
+# grading.py
+# 세 가지 캡챠 모드의 채점 규칙 (라우트의 온라인 채점과 저장된 결과 재채점/오프라인 평가에서 같이 사용)
+#  - first:  질문 카테고리에 해당하는 칸을 모두 골랐으면 정답 (다른 칸을 더 골라도 됨)
+#  - second: 칸별로 고른 라벨이 맞은 개수가 pass_count 이상이면 정답 (미분류 칸은 항상 틀린 것으로 셈)
+#  - third:  카테고리별로 답한 개수와 실제 개수 차이의 합이 max_errors 이하이면 정답
+# grade()는 제출 한 건, grade_batch()는 NumPy 배열로 여러 건을 한 번에 채점 (같은 결과를 내야 함)
+from collections import namedtuple
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+
+UNCLASSIFIED = "unclassified"
+
+# is_correct: 통과 여부, unclassified_category: 실제보다 1 많게 답한 카테고리(미분류 이미지에 붙일 라벨, 없으면 "")
+# exact: 미분류 몫(+1)을 빼면 모든 카테고리 개수가 맞았는지
+ThirdGrade = namedtuple("ThirdGrade", ["is_correct", "unclassified_category", "exact"])
+
+
+# 칸 번호 목록 -> 비트마스크 (칸은 최대 64개)
+def to_mask(indices: Iterable[int]) -> int:
+    mask = 0
+    for i in indices:
+        mask |= 1 << i
+    return mask
+
+
+class FirstGrader:
+    def grade(self, correct: Iterable[int], selected: Iterable[int]) -> bool:
+        correct = set(correct)
+        return set(selected) & correct == correct
+
+    # correct, selected: 제출별 칸 비트마스크 (uint64 배열)
+    def grade_batch(self, correct: np.ndarray, selected: np.ndarray) -> np.ndarray:
+        return (selected & correct) == correct
+
+
+class SecondGrader:
+    def __init__(self, images: int = 5, pass_count: int = None):
+        self.images = images
+        self.pass_count = images - 1 if pass_count is None else pass_count
+
+    def grade(self, labels: Sequence[str], answers: Sequence[str]) -> bool:
+        hits = sum(1 for label, answer in zip(labels, answers) if label != UNCLASSIFIED and label == answer)
+        return hits >= self.pass_count
+
+    # labels, answers: (제출 수, 칸 수) 문자열 배열, 칸 수가 모자란 행은 labels를 UNCLASSIFIED로 채울 것
+    def grade_batch(self, labels: np.ndarray, answers: np.ndarray) -> np.ndarray:
+        hits = ((labels == answers) & (labels != UNCLASSIFIED)).sum(axis=1)
+        return hits >= self.pass_count
+
+
+class ThirdGrader:
+    def __init__(self, max_errors: int = 1):
+        self.max_errors = max_errors
+
+    # expected: 카테고리 -> 실제 개수, answers: (카테고리, 답한 개수) 목록
+    # 답하지 않은 카테고리는 오차에 넣지 않음 (같은 카테고리를 여러 번 답하면 각각 셈)
+    def grade(self, expected: Dict[str, int], answers: Iterable[Tuple[str, int]]) -> ThirdGrade:
+        errors = 0
+        unclassified_category = ""
+        amounts = {}
+        for category, amount in answers:
+            amounts[category] = amount
+            count = expected.get(category, 0)
+            errors += abs(count - amount)
+            if count + 1 == amount:
+                unclassified_category = category
+        exact = all(amounts.get(c, 0) - n == (c == unclassified_category) for c, n in expected.items())
+        return ThirdGrade(errors <= self.max_errors, unclassified_category, exact)
+
+    # expected: (제출 수, 카테고리 수) 실제 개수 행렬
+    # 답은 펼쳐서 항목별로: rows(제출 번호), columns(카테고리 번호), amounts(답한 개수)
+    # 문제에 없는 카테고리는 expected에서 0인 열을 가리키면 됨
+    def errors_batch(self, expected: np.ndarray, rows: np.ndarray, columns: np.ndarray,
+                     amounts: np.ndarray) -> np.ndarray:
+        diff = np.abs(expected[rows, columns] - amounts)
+        return np.bincount(rows, weights=diff, minlength=len(expected)).astype(np.int64)
+
+    def grade_batch(self, expected: np.ndarray, rows: np.ndarray, columns: np.ndarray,
+                    amounts: np.ndarray) -> np.ndarray:
+        return self.errors_batch(expected, rows, columns, amounts) <= self.max_errors
+
+    # 사전/목록 형태의 제출들을 grade_batch 입력 배열로 변환
+    @staticmethod
+    def to_arrays(expected: Sequence[Dict[str, int]], answers: Sequence[Iterable[Tuple[str, int]]]):
+        column = {}
+        for counts in expected:
+            for category in counts:
+                column.setdefault(category, len(column))
+        unknown = len(column)  # 어느 문제에도 없는 카테고리용 0 열
+        matrix = np.zeros((len(expected), unknown + 1), dtype=np.int64)
+        for row, counts in enumerate(expected):
+            for category, count in counts.items():
+                matrix[row, column[category]] = count
+        rows, columns, amounts = [], [], []
+        for row, entries in enumerate(answers):
+            for category, amount in entries:
+                rows.append(row)
+                columns.append(column.get(category, unknown))
+                amounts.append(amount)
+        return matrix, np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64), \
+            np.array(amounts, dtype=np.int64)
+
+
+# 저장된 /second 결과(results_second)를 현재 라벨로 다시 채점
+# asked_questions는 칸별 이미지 id, selected_answers는 칸별로 고른 라벨 (쉼표로 구분)
+# 반환: (재채점한 행 수, 저장된 결과와 같은 수, 통과 -> 실패로 바뀐 수, 실패 -> 통과로 바뀐 수)
+def replay_second(db: Session, grader: "SecondGrader" = None, batch_size: int = 10000):
+    grader = grader or second
+    total = same = to_fail = to_pass = 0
+    rows = db.execute(select(models.ResultSecond.is_correct, models.ResultSecond.asked_questions,
+                             models.ResultSecond.selected_answers).execution_options(yield_per=batch_size))
+    for chunk in rows.partitions():
+        ids = [[int(i) for i in row.asked_questions.split(",") if i] for row in chunk]
+        wanted = {i for row in ids for i in row}
+        labels = dict(db.execute(select(models.ImagePath.id, models.ImagePath.label)
+                                 .where(models.ImagePath.id.in_(wanted))).all())
+        width = max(max(len(row) for row in ids), 1)
+        # 지워진 이미지나 모자란 칸은 미분류로 채워서 맞힌 것으로 세지 않음
+        label_matrix = np.full((len(chunk), width), UNCLASSIFIED, dtype=object)
+        answer_matrix = np.full((len(chunk), width), "", dtype=object)
+        for r, (row, row_ids) in enumerate(zip(chunk, ids)):
+            label_matrix[r, :len(row_ids)] = [labels.get(i, UNCLASSIFIED) for i in row_ids]
+            answers = (row.selected_answers or "").split(",")[:width]
+            answer_matrix[r, :len(answers)] = answers
+        regraded = grader.grade_batch(label_matrix, answer_matrix)
+        stored = np.array([bool(row.is_correct) for row in chunk])
+        total += len(chunk)
+        same += int(np.count_nonzero(regraded == stored))
+        to_fail += int(np.count_nonzero(stored & ~regraded))
+        to_pass += int(np.count_nonzero(~stored & regraded))
+    return total, same, to_fail, to_pass
+
+
+first = FirstGrader()
+second = SecondGrader()
+third = ThirdGrader()
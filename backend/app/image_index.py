@@ -0,0 +1,212 @@
+# image_index.py
+# 이미지 풀이 쓰는 읽기 전용 이미지 정보(id, uuid, 경로, 라벨)를 열 단위 배열로 담는 인덱스
+# 여러 워커로 실행할 때는 파일로 한 번만 만들고 각 워커는 mmap으로 열어서 같은 메모리 페이지를 공유
+# (워커마다 image_paths 전체를 조회해서 파이썬 객체로 들고 있지 않음, 시작 시간도 파일을 여는 시간 수준)
+#
+# 파일 형식: MAGIC 8B | 헤더 길이 4B | 헤더(JSON) | 8바이트 정렬된 배열들
+#  - ids(int64, 오름차순), uuids(S16), labels(int16, 헤더의 라벨 목록 번호)
+#  - str_offsets(int64, 3n+1): 행 i의 원본/tile/large 경로는 strings[str_offsets[3i+c]:str_offsets[3i+c+1]] (빈 값은 None)
+#  - uuid_keys(uint64), uuid_rows(int64): uuid 앞 8바이트를 정렬한 값과 그 행 번호 (uuid로 행 찾기용)
+# 헤더의 stamp는 만들 때의 catalog.stamp 수정 시각, 스탬프가 바뀌면 다시 만듦
+import json
+import mmap
+import os
+import time
+import uuid
+from bisect import bisect_left
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+
+MAGIC = b"RWIDX001"
+
+# 샘플링 결과로 돌려주는 가벼운 행 (ORM 객체 대신 사용)
+# tile, large: 적재 시 만든 축소 변형 경로 (없으면 None, 원본 path 사용)
+PooledImage = namedtuple("PooledImage", ["id", "uuid", "path", "label", "tile", "large"])
+
+_COLUMNS = ("ids", "uuids", "labels", "str_offsets", "uuid_keys", "uuid_rows", "strings")
+
+
+def _view(array: np.ndarray, fmt: str) -> memoryview:
+    return memoryview(np.ascontiguousarray(array)).cast("B").cast(fmt)
+
+
+# uuid.UUID(bytes=...)는 인자 검사 때문에 느려서 샘플링 경로에서는 슬롯을 직접 채움 (pickle 복원과 같은 방식)
+def _uuid_from_bytes(raw: bytes, _new=object.__new__, _set=object.__setattr__) -> uuid.UUID:
+    value = _new(uuid.UUID)
+    _set(value, "int", int.from_bytes(raw, "big"))
+    _set(value, "is_safe", uuid.SafeUUID.unknown)
+    return value
+
+
+def _uuid_bytes(value) -> bytes:
+    return value.bytes if isinstance(value, uuid.UUID) else uuid.UUID(str(value)).bytes
+
+
+class ImageIndex:
+    def __init__(self, arrays: Dict[str, np.ndarray], labels: List[str], stamp: float = 0.0, buffer=None):
+        self.ids = arrays["ids"]
+        self.uuids = arrays["uuids"]
+        self.labels = arrays["labels"]
+        self.str_offsets = arrays["str_offsets"]
+        self.uuid_keys = arrays["uuid_keys"]
+        self.uuid_rows = arrays["uuid_rows"]
+        self.strings = arrays["strings"]
+        self.label_names = labels
+        self.stamp = stamp
+        self._buffer = buffer  # mmap (배열들이 참조하는 동안 열려 있어야 함)
+        # 샘플링한 행을 만들 때는 numpy 스칼라 대신 memoryview로 읽음 (복사 없이 행 하나에 수백 ns)
+        self._ids = _view(self.ids, "q")
+        self._uuids = _view(self.uuids, "B")
+        self._uuid_keys = _view(self.uuid_keys, "Q")
+        self._uuid_rows = _view(self.uuid_rows, "q")
+        self._offsets = _view(self.str_offsets, "q")
+        self._strings = _view(self.strings, "B")
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def last_id(self) -> int:
+        return int(self.ids[-1]) if len(self.ids) else 0
+
+    @property
+    def mapped(self) -> bool:
+        return self._buffer is not None
+
+    # DB 조회 결과(id, uuid, path, label, tile, large 순서의 행)로 메모리 안에 만듦
+    @classmethod
+    def build(cls, rows: Iterable, stamp: float = 0.0) -> "ImageIndex":
+        ids, uuids, codes, offsets = [], [], [], [0]
+        label_codes: Dict[str, int] = {}
+        chunks, size = [], 0
+        for image_id, image_uuid, path, label, tile, large in rows:
+            ids.append(image_id)
+            uuids.append(_uuid_bytes(image_uuid))
+            codes.append(label_codes.setdefault(label, len(label_codes)))
+            for value in (path, tile, large):
+                encoded = (value or "").encode()
+                chunks.append(encoded)
+                size += len(encoded)
+                offsets.append(size)
+        uuid_array = np.array(uuids, dtype="S16")
+        keys = np.array([int.from_bytes(u[:8], "big") for u in uuids], dtype=np.uint64)
+        order = np.argsort(keys, kind="stable").astype(np.int64)
+        arrays = {
+            "ids": np.array(ids, dtype=np.int64),
+            "uuids": uuid_array,
+            "labels": np.array(codes, dtype=np.int16),
+            "str_offsets": np.array(offsets, dtype=np.int64),
+            "uuid_keys": keys[order],
+            "uuid_rows": order,
+            "strings": np.frombuffer(b"".join(chunks), dtype=np.uint8),
+        }
+        return cls(arrays, list(label_codes), stamp)
+
+    # 다른 프로세스가 읽는 중에도 안전하도록 임시 파일에 쓰고 바꿔 끼움
+    def write(self, path: str):
+        arrays = {name: getattr(self, name) for name in _COLUMNS}
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = [offset, array.dtype.str, len(array)]
+            offset += (array.nbytes + 7) // 8 * 8
+        header = json.dumps({"labels": self.label_names, "stamp": self.stamp, "arrays": layout}).encode()
+        header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + len(header).to_bytes(4, "little") + header)
+            for array in arrays.values():
+                data = np.ascontiguousarray(array).tobytes()
+                f.write(data + b"\0" * (-len(data) % 8))
+        os.replace(tmp, path)
+
+    @classmethod
+    def open(cls, path: str) -> "ImageIndex":
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}는 이미지 인덱스 파일이 아닙니다.")
+        header_size = int.from_bytes(buffer[len(MAGIC):len(MAGIC) + 4], "little")
+        start = len(MAGIC) + 4
+        header = json.loads(buffer[start:start + header_size])
+        base = start + header_size
+        arrays = {name: np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=base + offset)
+                  for name, (offset, dtype, count) in header["arrays"].items()}
+        return cls(arrays, header["labels"], header["stamp"], buffer)
+
+    def image(self, row: int, label: str = None, _tuple=tuple.__new__) -> PooledImage:
+        offsets, strings = self._offsets, self._strings
+        slot = 3 * row
+        path, tile, large, end = offsets[slot], offsets[slot + 1], offsets[slot + 2], offsets[slot + 3]
+        return _tuple(PooledImage, (
+            self._ids[row],
+            _uuid_from_bytes(self._uuids[16 * row:16 * row + 16]),
+            str(strings[path:tile], "utf-8"),
+            label if label is not None else self.label_names[self.labels[row]],
+            str(strings[tile:large], "utf-8") if large > tile else None,
+            str(strings[large:end], "utf-8") if end > large else None,
+        ))
+
+    # uuid -> 행 번호 (없으면 -1), 앞 8바이트로 이진 탐색한 뒤 16바이트 전체 비교
+    def find_uuid(self, image_uuid) -> int:
+        raw = _uuid_bytes(image_uuid)
+        key = int.from_bytes(raw[:8], "big")
+        keys, rows = self._uuid_keys, self._uuid_rows
+        i = bisect_left(keys, key)
+        while i < len(keys) and keys[i] == key:
+            row = rows[i]
+            if self._uuids[16 * row:16 * row + 16] == raw:
+                return row
+            i += 1
+        return -1
+
+    # 이미지 id -> 행 번호 (없으면 -1), ids는 오름차순
+    def find_id(self, image_id: int) -> int:
+        i = bisect_left(self._ids, image_id)
+        if i < len(self._ids) and self._ids[i] == image_id:
+            return i
+        return -1
+
+
+# 프로세스 사이의 배타적 잠금 (유닉스 fcntl.flock, 윈도우 msvcrt.locking)
+# 인덱스 파일을 만들 때와 image_stats 저장 때만 필요하므로 모듈을 불러올 때가 아니라 여기서 import
+@contextmanager
+def file_lock(path: str):
+    with open(path, "a+") as lock:
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+            lock.seek(0)
+            while True:
+                try:
+                    # LK_LOCK은 10초 동안 다시 시도한 뒤 실패하므로 잡을 때까지 반복
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            try:
+                yield
+            finally:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+            return
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+# 인덱스 파일이 현재 스탬프로 만들어져 있으면 그대로 열고, 아니면 한 프로세스만 다시 만듦
+# 여러 워커가 동시에 시작해도 잠금 파일로 순서를 정해서 처음 워커만 DB를 조회하고 나머지는 만들어진 파일을 엶
+def ensure(path: str, stamp: float, fetch_rows: Callable[[], Iterable], rebuild: bool = False) -> ImageIndex:
+    with file_lock(path + ".lock"):
+        if not rebuild and os.path.exists(path):
+            index = ImageIndex.open(path)
+            if index.stamp == stamp:
+                return index
+        ImageIndex.build(fetch_rows(), stamp).write(path)
+        return ImageIndex.open(path)
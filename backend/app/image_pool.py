@@ -0,0 +1,270 @@
+# image_pool.py
+# image_paths 테이블을 라벨별 배열로 메모리에 올려두고 질문 생성 시 SQL 없이 샘플링하기 위한 인덱스
+# ORDER BY random()은 테이블 전체를 정렬하므로 이미지 수가 늘어날수록 /question 응답이 느려짐
+# 분류된 이미지는 image_stats의 정확도 단계별 가중치로 샘플링 (사람이 자주 틀리는 이미지는 덜 나옴)
+#
+# 이미지 정보(uuid, 경로)는 읽기 전용 열 배열(image_index.ImageIndex)에 두고, 풀은 행 번호만 다룸
+# 샘플링한 행만 PooledImage로 만들어서 돌려줌 (문제 하나에 몇 개)
+# RWCAPTCHA_IMAGE_INDEX 파일 경로를 주면(워커가 여럿일 때 기본값) 인덱스를 파일로 한 번만 만들고
+# 워커들은 그 파일을 mmap으로 열어서 같은 페이지를 공유, 워커마다 가지는 건 라벨/가중치 단계 같은 작은 배열뿐
+import os
+import random
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session, aliased
+
+from . import image_index, models
+from .image_index import ImageIndex, PooledImage
+from .image_stats import LEVEL_WEIGHTS, ImageStats, stats
+from .sampling import WeightedSet
+from .state import MULTI_WORKER
+
+UNCLASSIFIED = "unclassified"
+
+INDEX_PATH = os.environ.get("RWCAPTCHA_IMAGE_INDEX") or ("./image_index.bin" if MULTI_WORKER else "")
+
+
+class ImagePool:
+    def __init__(self, image_stats: ImageStats = None, index_path: str = INDEX_PATH):
+        self._lock = threading.Lock()
+        self.image_stats = image_stats or ImageStats()
+        self.index_path = index_path
+        self._index = ImageIndex.build(())  # 마지막 전체 로드 때의 이미지 (행 번호 = 인덱스 행)
+        self._base = 0  # len(_index)
+        # 인덱스 파일을 쓰지 않을 때(워커 하나)는 로드하면서 만든 행을 그대로 두고 씀 (샘플링 시 행을 다시 만들지 않음)
+        self._cache: Optional[List[PooledImage]] = None
+        self._extra: List[PooledImage] = []  # 그 뒤 refresh로 추가된 이미지 (행 번호 = len(_index) + i)
+        self._extra_rows: Dict[str, int] = {}  # 추가된 이미지 uuid 문자열 -> 행 번호
+        self._label_names: List[str] = []
+        self._label_codes: Dict[str, int] = {}
+        self._labels = np.zeros(0, dtype=np.int16)  # 행 번호 -> 현재 라벨 번호 (라벨 변경은 이 배열만 바꿈)
+        self._pos = np.zeros(0, dtype=np.int64)  # 행 번호 -> 라벨 배열 내 위치, 라벨 변경 시 O(1) 삭제용
+        self._by_label: Dict[str, array] = {}  # 라벨 -> 행 번호 배열
+        # unclassified를 제외한 전체 행 (가중치 단계별 배열, 가중 샘플링용)
+        self._classified = WeightedSet(LEVEL_WEIGHTS)
+        self._rows = 0
+        self._last_id = 0
+        self.version = 0  # 풀 내용이 바뀔 때마다 증가 (캐시 무효화용)
+
+    def __len__(self):
+        return self._rows
+
+    def _code(self, label: str) -> int:
+        code = self._label_codes.get(label)
+        if code is None:
+            code = self._label_codes[label] = len(self._label_names)
+            self._label_names.append(label)
+        return code
+
+    # 인덱스 전체를 풀에 올림 (행마다 파이썬 객체를 만들지 않고 numpy로 한 번에)
+    def _attach(self, index: ImageIndex):
+        self._index, self._base = index, len(index)
+        self._label_names = list(index.label_names)
+        self._label_codes = {label: code for code, label in enumerate(self._label_names)}
+        self._labels = index.labels.astype(np.int16)  # 워커마다 쓰기 가능한 사본
+        self._pos = np.zeros(len(index), dtype=np.int64)
+        order = np.argsort(self._labels, kind="stable")
+        start = 0
+        for code, count in enumerate(np.bincount(self._labels, minlength=len(self._label_names)).tolist()):
+            rows = order[start:start + count]
+            start += count
+            if count:
+                self._by_label[self._label_names[code]] = array("q", rows.astype(np.int64).tobytes())
+                self._pos[rows] = np.arange(count)
+        rows = np.flatnonzero(self._labels != self._label_codes.get(UNCLASSIFIED, -1))
+        self._classified.add_many(rows, self.image_stats.levels(index.ids[rows]))
+        self._rows = len(index)
+        self._last_id = index.last_id
+
+    # 행 번호별 배열 크기를 두 배씩 늘림
+    def _ensure(self, size: int):
+        if size <= len(self._labels):
+            return
+        capacity = max(size, len(self._labels) * 2, 1024)
+        for name in ("_labels", "_pos"):
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def _place(self, row: int, label: str, image_id: int):
+        images = self._by_label.setdefault(label, array("q"))
+        self._labels[row] = self._code(label)
+        self._pos[row] = len(images)
+        images.append(row)
+        if label != UNCLASSIFIED:
+            self._classified.add(row, self.image_stats.level(image_id))
+
+    def _add(self, img: PooledImage):
+        row = self._rows
+        self._ensure(row + 1)
+        self._extra.append(img)
+        self._extra_rows[str(img.uuid)] = row
+        self._place(row, img.label, img.id)
+        self._rows += 1
+        if img.id > self._last_id:
+            self._last_id = img.id
+
+    # 배열 중간 원소를 마지막 원소와 바꿔서 지움 (O(1))
+    def _unplace(self, row: int, label: str):
+        images = self._by_label[label]
+        pos = int(self._pos[row])
+        last = images.pop()
+        if pos < len(images):
+            images[pos] = last
+            self._pos[last] = pos
+        if label != UNCLASSIFIED:
+            self._classified.remove(row)
+
+    def _row(self, image_uuid) -> int:
+        row = self._extra_rows.get(str(image_uuid))
+        if row is not None:
+            return row
+        try:
+            return self._index.find_uuid(image_uuid)
+        except ValueError:  # uuid 형식이 아님
+            return -1
+
+    def _row_by_id(self, image_id: int) -> int:
+        row = self._index.find_id(image_id)
+        if row < 0 and self._extra and image_id > self._index.last_id:
+            # 추가된 이미지는 id 순서로 붙으므로 이진 탐색
+            lo, hi = 0, len(self._extra)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._extra[mid].id < image_id:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo < len(self._extra) and self._extra[lo].id == image_id:
+                row = self._base + lo
+        return row
+
+    def _image(self, row: int) -> PooledImage:
+        label = self._label_names[self._labels[row]]
+        if row >= self._base:
+            img = self._extra[row - self._base]
+        elif self._cache is not None:
+            img = self._cache[row]
+        else:
+            return self._index.image(row, label)
+        return img if img.label == label else img._replace(label=label)
+
+    def _query(self, db: Session, after_id: int):
+        tile = aliased(models.ImageVariant)
+        large = aliased(models.ImageVariant)
+        return db.query(models.ImagePath.id, models.ImagePath.uuid, models.ImagePath.path, models.ImagePath.label,
+                        tile.path, large.path) \
+            .outerjoin(tile, (tile.image_uuid == models.ImagePath.uuid) & (tile.name == "tile")) \
+            .outerjoin(large, (large.image_uuid == models.ImagePath.uuid) & (large.name == "large")) \
+            .filter(models.ImagePath.id > after_id, models.ImagePath.duplicate_of.is_(None)) \
+            .order_by(models.ImagePath.id) \
+            .yield_per(10000)
+
+    # 서버 시작 시와 적재 스크립트가 라벨을 바꿨을 때(catalog 스탬프) 전체 로드
+    # 인덱스 파일을 쓰면 스탬프가 같은 파일이 이미 있을 때 DB를 조회하지 않고 열기만 함 (rebuild=True면 항상 다시 만듦)
+    def load(self, db: Session, stamp: float = 0.0, rebuild: bool = False):
+        # 새 풀을 따로 만든 뒤 한 번에 바꿔 끼움 (로드 중에도 기존 풀로 샘플링 가능)
+        fresh = ImagePool(self.image_stats, self.index_path)
+        if self.index_path:
+            index = image_index.ensure(self.index_path, stamp, lambda: self._query(db, 0), rebuild)
+        else:
+            fresh._cache = [PooledImage(*r) for r in self._query(db, 0)]
+            index = ImageIndex.build(fresh._cache, stamp)
+        fresh._attach(index)
+        with self._lock:
+            self._index, self._base, self._cache = fresh._index, fresh._base, fresh._cache
+            self._extra, self._extra_rows = fresh._extra, fresh._extra_rows
+            self._label_names, self._label_codes = fresh._label_names, fresh._label_codes
+            self._labels, self._pos, self._by_label = fresh._labels, fresh._pos, fresh._by_label
+            self._classified, self._rows, self._last_id = fresh._classified, fresh._rows, fresh._last_id
+            self.version += 1
+        # 파일을 만든 뒤에 추가된 이미지
+        if index.mapped:
+            self.refresh(db)
+        return self._rows
+
+    # 마지막으로 본 id 이후에 추가된 이미지만 가져옴 (증분 갱신)
+    def refresh(self, db: Session):
+        rows = [PooledImage(*r) for r in self._query(db, self._last_id)]
+        if rows:
+            self.add(rows)
+        return len(rows)
+
+    def add(self, images: List[PooledImage]):
+        with self._lock:
+            for img in images:
+                self._add(img)
+            self.version += 1
+
+    # 라벨이 바뀐 이미지를 다른 라벨 배열로 옮김 (관리자 API, 미분류 이미지 승격 등)
+    def relabel(self, image_uuid, label: str) -> bool:
+        with self._lock:
+            row = self._row(image_uuid)
+            if row < 0:
+                return False
+            current = self._label_names[self._labels[row]]
+            if current != label:
+                image_id = self._image(row).id
+                self._unplace(row, current)
+                # 이전 라벨 기준으로 맞고 틀린 기록은 더 이상 의미 없음
+                self.image_stats.reset(image_id)
+                self._place(row, label, image_id)
+                self.version += 1
+        return True
+
+    # 채점된 제출 결과 반영: (이미지 id, 맞았는지, 틀렸을 때 대신 고른 라벨) 목록
+    # 정확도 단계가 바뀐 이미지만 가중치 단계 배열 사이에서 옮김 (전체 재계산 없음)
+    def record(self, answers: Iterable[Tuple[int, bool, Optional[str]]]):
+        with self._lock:
+            for image_id, correct, answered in answers:
+                level = self.image_stats.record(image_id, correct, answered)
+                row = self._row_by_id(image_id)
+                if row >= 0:
+                    self._classified.move(row, level)
+
+    def get(self, image_uuid) -> Optional[PooledImage]:
+        row = self._row(image_uuid)
+        return self._image(row) if row >= 0 else None
+
+    def label_counts(self) -> Dict[str, int]:
+        return {label: len(rows) for label, rows in self._by_label.items()}
+
+    def count(self, label: str) -> int:
+        return len(self._by_label.get(label, ()))
+
+    # random.sample은 모집단이 커도 k개만 뽑으므로 O(k)
+    # 이미지가 부족하면 LIMIT처럼 있는 만큼만 반환
+    @staticmethod
+    def _sample(population: array, num: int) -> List[int]:
+        if num <= 0:
+            return []
+        if num >= len(population):
+            result = list(population)
+            random.shuffle(result)
+            return result
+        return random.sample(population, num)
+
+    def sample_unclassified(self, num: int) -> List[PooledImage]:
+        return [self._image(row) for row in self._sample(self._by_label.get(UNCLASSIFIED, ()), num)]
+
+    # 정확도 가중치에 비례한 비복원 샘플링, O(k)
+    def sample_classified(self, num: int) -> List[PooledImage]:
+        return [self._image(row) for row in self._classified.sample(num)]
+
+    def weight_levels(self) -> List[int]:
+        return self._classified.level_counts()
+
+    def sample_label(self, label: str, num: int) -> List[PooledImage]:
+        return [self._image(row) for row in self._sample(self._by_label.get(label, ()), num)]
+
+    # 인덱스 상태 (관리자 API)
+    def index_info(self) -> dict:
+        return {"path": self.index_path or None, "mapped": self._index.mapped, "indexed": len(self._index),
+                "added": len(self._extra), "stamp": self._index.stamp}
+
+
+pool = ImagePool(stats)
@@ -0,0 +1,189 @@
+# image_stats.py
+# 분류된 이미지별 누적 통계: 정답이 확인된 제출에서 보여준 횟수, 맞힌 횟수, 대신 고른 라벨(혼동)
+# 이미지 id(autoincrement라 거의 연속)를 그대로 인덱스로 쓰는 numpy 배열에 보관하고 제출마다 해당 칸만 갱신
+# 사람도 자주 틀리는 이미지는 라벨이 애매하거나 잘못됐을 가능성이 높으므로 문제에 덜 나오도록 가중치를 낮춤
+#  - 정확도 = (맞힌 횟수 + PRIOR_CORRECT) / (보여준 횟수 + PRIOR_CORRECT + PRIOR_WRONG)  (기록이 없으면 0.8)
+#  - 정확도를 LEVELS 단계로 나누고 단계 가중치 = max(MIN_WEIGHT, 단계 중앙값 ** GAMMA)  (GAMMA=0 이면 균등 샘플링)
+# 서버 종료 시와 이미지 풀 갱신 주기마다 RWCAPTCHA_IMAGE_STATS_PATH 파일에 저장하고 시작 시 불러옴
+# 워커마다 따로 집계하므로 저장할 때 파일을 덮어쓰지 않고, 파일 잠금 안에서 파일의 값에 이 워커가 마지막 저장 뒤에
+# 더한 만큼만 더해서 씀 (그 뒤로는 다른 워커가 더한 통계까지 합쳐진 파일 값을 기준으로 집계)
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .image_index import file_lock
+
+PRIOR_CORRECT = 4
+PRIOR_WRONG = 1
+LEVELS = 16
+GAMMA = float(os.environ.get("RWCAPTCHA_SAMPLING_GAMMA", "2"))
+MIN_WEIGHT = 0.02
+STATS_PATH = os.environ.get("RWCAPTCHA_IMAGE_STATS_PATH", "./image_stats.npz")
+
+LEVEL_WEIGHTS = [max(MIN_WEIGHT, ((level + 0.5) / LEVELS) ** GAMMA) for level in range(LEVELS)]
+
+
+class ImageStats:
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.Lock()
+        self.shown = np.zeros(capacity, dtype=np.uint32)
+        self.correct = np.zeros(capacity, dtype=np.uint32)
+        # 틀린 적 있는 이미지만: 이미지 id -> {사용자가 대신 고른 라벨: 횟수}
+        self.confusion: Dict[int, Dict[str, int]] = {}
+        self.dirty = False  # 마지막 저장 이후 바뀌었는지
+        # 마지막으로 저장(불러오기)할 때의 파일 값, 지금 값과의 차이가 이 워커가 아직 파일에 더하지 않은 몫
+        self._saved_shown = np.zeros(capacity, dtype=np.uint32)
+        self._saved_correct = np.zeros(capacity, dtype=np.uint32)
+        self._confusion_delta: Dict[int, Dict[str, int]] = {}
+        self._resets = set()  # 마지막 저장 뒤에 기록을 지운 이미지 id (파일에서도 지움)
+
+    # 배열 크기를 두 배씩 늘림
+    def _ensure(self, image_id: int):
+        if image_id < len(self.shown):
+            return
+        capacity = max(image_id + 1, len(self.shown) * 2)
+        for name in ("shown", "correct", "_saved_shown", "_saved_correct"):
+            grown = np.zeros(capacity, dtype=np.uint32)
+            old = getattr(self, name)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def accuracy(self, image_id: int) -> float:
+        shown = int(self.shown[image_id]) if image_id < len(self.shown) else 0
+        correct = int(self.correct[image_id]) if image_id < len(self.correct) else 0
+        return (correct + PRIOR_CORRECT) / (shown + PRIOR_CORRECT + PRIOR_WRONG)
+
+    def level(self, image_id: int) -> int:
+        return min(LEVELS - 1, int(self.accuracy(image_id) * LEVELS))
+
+    # 여러 이미지의 가중치 단계를 한 번에 (풀 전체 로드용)
+    def levels(self, image_ids: np.ndarray) -> np.ndarray:
+        image_ids = np.asarray(image_ids, dtype=np.int64)
+        inside = image_ids < len(self.shown)
+        shown = np.zeros(len(image_ids))
+        correct = np.zeros(len(image_ids))
+        shown[inside] = self.shown[image_ids[inside]]
+        correct[inside] = self.correct[image_ids[inside]]
+        accuracy = (correct + PRIOR_CORRECT) / (shown + PRIOR_CORRECT + PRIOR_WRONG)
+        return np.minimum(LEVELS - 1, (accuracy * LEVELS).astype(np.int64))
+
+    # 제출 한 건에서 이미지 하나의 결과 반영, 바뀐 가중치 단계를 반환
+    # answered: 틀렸을 때 사용자가 대신 고른 라벨 (모르면 None)
+    def record(self, image_id: int, correct: bool, answered: Optional[str] = None) -> int:
+        with self._lock:
+            self._ensure(image_id)
+            self.shown[image_id] += 1
+            if correct:
+                self.correct[image_id] += 1
+            elif answered:
+                for confusion in (self.confusion, self._confusion_delta):
+                    votes = confusion.setdefault(image_id, {})
+                    votes[answered] = votes.get(answered, 0) + 1
+            self.dirty = True
+        return self.level(image_id)
+
+    # 관리자가 라벨을 바꾸는 등 이전 기록이 의미 없어졌을 때
+    def reset(self, image_id: int):
+        with self._lock:
+            if image_id < len(self.shown):
+                self.shown[image_id] = self.correct[image_id] = 0
+                self._saved_shown[image_id] = self._saved_correct[image_id] = 0
+            self.confusion.pop(image_id, None)
+            self._confusion_delta.pop(image_id, None)
+            self._resets.add(image_id)
+            self.dirty = True
+
+    def summary(self, image_id: int) -> dict:
+        level = self.level(image_id)
+        return {
+            "shown": int(self.shown[image_id]) if image_id < len(self.shown) else 0,
+            "correct": int(self.correct[image_id]) if image_id < len(self.correct) else 0,
+            "accuracy": round(self.accuracy(image_id), 4),
+            "weight": LEVEL_WEIGHTS[level],
+            "confusion": self.confusion.get(image_id, {}),
+        }
+
+    def save(self, path: str = STATS_PATH):
+        with self._lock:
+            shown = self.shown.astype(np.int64) - self._saved_shown
+            correct = self.correct.astype(np.int64) - self._saved_correct
+            confusion, resets = self._confusion_delta, self._resets
+            self._saved_shown, self._saved_correct = self.shown.copy(), self.correct.copy()
+            self._confusion_delta, self._resets = {}, set()
+            self.dirty = False
+        with file_lock(path + ".lock"):
+            saved_shown, saved_correct, saved_confusion = _read(path)
+            size = max(len(saved_shown), len(shown))
+            saved_shown, saved_correct = _fit(saved_shown, size), _fit(saved_correct, size)
+            for image_id in resets:
+                if image_id < size:
+                    saved_shown[image_id] = saved_correct[image_id] = 0
+                saved_confusion.pop(image_id, None)
+            saved_shown[:len(shown)] += shown
+            saved_correct[:len(correct)] += correct
+            _add_confusion(saved_confusion, confusion)
+            tmp = path + ".tmp.npz"
+            encoded = json.dumps({str(k): v for k, v in saved_confusion.items()}).encode()
+            np.savez(tmp, shown=saved_shown.astype(np.uint32), correct=saved_correct.astype(np.uint32),
+                     confusion=np.frombuffer(encoded, dtype=np.uint8))
+            os.replace(tmp, path)
+        # 다른 워커가 더한 통계 반영 (저장하는 동안 새로 기록된 몫은 그대로 남김)
+        with self._lock:
+            self._rebase(saved_shown, saved_correct, saved_confusion)
+
+    def load(self, path: str = STATS_PATH) -> int:
+        if not os.path.exists(path):
+            return 0
+        shown, correct, confusion = _read(path)
+        with self._lock:
+            self.shown, self.correct = shown.astype(np.uint32), correct.astype(np.uint32)
+            self._saved_shown, self._saved_correct = self.shown.copy(), self.correct.copy()
+            self.confusion = confusion
+            self._confusion_delta, self._resets = {}, set()
+            self.dirty = False
+        return int(np.count_nonzero(self.shown))
+
+    # 기준을 파일 값으로 바꾸고 아직 파일에 더하지 않은 몫을 그 위에 얹음 (self._lock 안에서 호출)
+    def _rebase(self, shown: np.ndarray, correct: np.ndarray, confusion: Dict[int, Dict[str, int]]):
+        size = max(len(shown), len(self.shown))
+        for name, saved in (("shown", shown), ("correct", correct)):
+            pending = _fit(getattr(self, name).astype(np.int64) - getattr(self, "_saved_" + name), size)
+            base = _fit(saved, size)
+            for image_id in self._resets:
+                if image_id < size:
+                    base[image_id] = 0
+            setattr(self, "_saved_" + name, base.astype(np.uint32))
+            setattr(self, name, (base + pending).astype(np.uint32))
+        self.confusion = {k: dict(v) for k, v in confusion.items() if k not in self._resets}
+        _add_confusion(self.confusion, self._confusion_delta)
+
+
+def _fit(array: np.ndarray, size: int) -> np.ndarray:
+    if len(array) >= size:
+        return array.astype(np.int64)
+    grown = np.zeros(size, dtype=np.int64)
+    grown[:len(array)] = array
+    return grown
+
+
+def _add_confusion(target: Dict[int, Dict[str, int]], delta: Dict[int, Dict[str, int]]):
+    for image_id, votes in delta.items():
+        merged = target.setdefault(image_id, {})
+        for label, count in votes.items():
+            merged[label] = merged.get(label, 0) + count
+
+
+# 반환: (보여준 횟수, 맞힌 횟수, 혼동), 파일이 없으면 빈 값
+def _read(path: str) -> Tuple[np.ndarray, np.ndarray, Dict[int, Dict[str, int]]]:
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), {}
+    with np.load(path) as data:
+        shown, correct = data["shown"].astype(np.int64), data["correct"].astype(np.int64)
+        confusion = json.loads(data["confusion"].tobytes().decode() or "{}")
+    return shown, correct, {int(k): v for k, v in confusion.items()}
+
+
+stats = ImageStats()
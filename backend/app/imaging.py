@@ -0,0 +1,61 @@
+# imaging.py
+# 적재 시 이미지를 디코딩해서 EXIF를 제거하고, 그리드 타일 크기로 줄인 WebP 변형(variant)을 만듦
+# 원본을 그대로 내려보내면 100px 타일 하나에 수 MB를 받게 되므로 문제당 전송량과 로딩 시간을 줄이기 위함
+# Pillow가 설치되어 있지 않으면 변형 생성 없이 원본만 적재
+import os
+from typing import List, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # 선택 의존성
+    Image = None
+
+# 이름 -> (가로, 세로, 잘라내기 여부)
+# tile: /first, /third 그리드 칸(100px)의 2배 해상도, 정사각형으로 잘라냄
+# large: /second 한 장씩 보여주는 이미지(최대 300px)의 2배, 비율 유지
+VARIANTS = {
+    "tile": (200, 200, True),
+    "large": (600, 600, False),
+}
+WEBP_QUALITY = 80
+
+
+def available() -> bool:
+    return Image is not None
+
+
+# 반환: [(이름, 파일명, 가로, 세로, 바이트 수), ...]
+def make_variants(src: str, storage_root: str, stem: str) -> List[Tuple[str, str, int, int, int]]:
+    if Image is None:
+        raise RuntimeError("이미지 변형을 만들려면 Pillow가 필요합니다. (pip install pillow)")
+    results = []
+    with Image.open(src) as im:
+        im.draft("RGB", (VARIANTS["large"][0], VARIANTS["large"][1]))  # JPEG은 디코딩 단계에서 축소
+        im = ImageOps.exif_transpose(im)  # 회전 정보만 반영하고 EXIF는 저장하지 않음
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info else "RGB")
+        for name, (width, height, crop) in VARIANTS.items():
+            if crop:
+                out = ImageOps.fit(im, (width, height), Image.Resampling.LANCZOS)
+            else:
+                out = im.copy()
+                out.thumbnail((width, height), Image.Resampling.LANCZOS)
+            filename = f"{stem}_{name}.webp"
+            dest = os.path.join(storage_root, filename)
+            out.save(dest, "WEBP", quality=WEBP_QUALITY, method=4)
+            results.append((name, filename, out.width, out.height, os.path.getsize(dest)))
+    return results
+
+
+# dHash: 9x8 흑백으로 줄인 뒤 가로로 이웃한 픽셀의 밝기 비교 결과를 64비트로 (크기 변경/재압축에 강함)
+def dhash(src: str) -> int:
+    if Image is None:
+        raise RuntimeError("지각 해시를 계산하려면 Pillow가 필요합니다. (pip install pillow)")
+    with Image.open(src) as im:
+        im.draft("L", (64, 64))
+        pixels = list(im.convert("L").resize((9, 8), Image.Resampling.LANCZOS).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
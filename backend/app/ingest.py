@@ -0,0 +1,319 @@
+# ingest.py
+# 이미지 폴더를 image_paths 테이블로 대량 적재하는 파이프라인 (ingest.py CLI, ImageSaver.py 에서 사용)
+#  - 파일 복사/형식 검사는 스레드(또는 프로세스) 풀에서 병렬로 처리
+#  - DB에는 BATCH_SIZE 개씩 한 번에 insert 후 commit
+#  - 저널 파일에 처리한 원본 경로를 기록해서 중간에 멈춰도 이어서 실행 가능
+#  - 지각 해시(dHash)로 이미 있는 이미지와 거의 같은 이미지는 거부하거나 원본에 연결 (dedup.py)
+import json
+import os
+import shutil
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+
+from . import catalog, dedup, imaging, models
+
+STORAGE_ROOT = os.environ.get("RWCAPTCHA_IMAGE_ROOT", "./img")
+URL_PREFIX = "/img"
+BATCH_SIZE = 5000
+JOURNAL_NAME = "ingest_journal.jsonl"
+
+# 중복 처리 방식
+#  reject: 저장한 파일을 지우고 적재하지 않음
+#  link: 적재하되 duplicate_of에 원본 uuid를 기록 (이미지 풀 샘플링에서 제외)
+#  keep: 검사하지 않음
+DUPLICATE_POLICIES = ("reject", "link", "keep")
+
+# 파일 앞부분(매직 넘버)으로 실제 형식 판별 -> 저장 확장자
+MAGIC_NUMBERS = [
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+]
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for magic, ext in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return ext
+    return None
+
+
+# (원본 경로, 라벨) 목록 생성
+# label이 없으면 ImageSaver.py처럼 하위 폴더 이름을 라벨로 사용, 있으면 폴더 안(또는 단일 파일)을 모두 그 라벨로
+def scan(source: str, label: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+    if os.path.isfile(source):
+        if label is None:
+            raise ValueError("단일 파일을 적재할 때는 라벨을 지정해야 합니다.")
+        yield os.path.abspath(source), label
+        return
+    for entry in sorted(os.scandir(source), key=lambda e: e.name):
+        if entry.is_dir() and label is None:
+            for f in sorted(os.scandir(entry.path), key=lambda e: e.name):
+                if f.is_file():
+                    yield os.path.abspath(f.path), entry.name
+        elif entry.is_file() and label is not None:
+            yield os.path.abspath(entry.path), label
+
+
+# 작업 결과 (실패하면 uuid가 None이고 error에 사유)
+IngestedFile = namedtuple("IngestedFile", ["src", "label", "uuid", "path", "size", "variants", "phash", "error"])
+
+
+# 작업자에서 실행: 형식 검사 + 저장소로 복사(또는 이동) + (선택) 축소 변형 생성, 지각 해시 계산
+def process_file(src: str, label: str, storage_root: str, move: bool = False, make_variants: bool = False,
+                 compute_phash: bool = False):
+    try:
+        with open(src, "rb") as f:
+            ext = sniff_format(f.read(16))
+        if ext is None:
+            return IngestedFile(src, label, None, None, None, [], None, "지원되지 않는 이미지 형식")
+        u = uuid.uuid4()
+        name = f"{u}.{ext}"
+        dest = os.path.join(storage_root, name)
+        if move:
+            shutil.move(src, dest)
+        else:
+            shutil.copyfile(src, dest)
+        variants, phash = [], None
+        try:
+            if make_variants:
+                variants = imaging.make_variants(dest, storage_root, str(u))
+            if compute_phash:
+                phash = imaging.dhash(dest)
+        except Exception as e:  # 디코딩 실패 = 깨진 이미지
+            _remove_files(storage_root, name, variants)
+            return IngestedFile(src, label, None, None, 0, [], None, f"이미지 디코딩 실패: {e}")
+        return IngestedFile(src, label, str(u), f"{URL_PREFIX}/{name}", os.path.getsize(dest), variants, phash, None)
+    except OSError as e:
+        return IngestedFile(src, label, None, None, 0, [], None, str(e))
+
+
+def _remove_files(storage_root: str, name: Optional[str], variants: list):
+    for filename in ([name] if name else []) + [v[1] for v in variants]:
+        try:
+            os.remove(os.path.join(storage_root, filename))
+        except OSError:
+            pass
+
+
+def _process_args(args):
+    return process_file(*args)
+
+
+class Journal:
+    # 배치를 DB에 넣기 전에 intent를 기록하고, commit 후 commit 표시를 기록
+    # commit 표시가 없는 배치는 재시작 시 DB에 uuid가 있는지 확인해서 완료 여부를 판단
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        self.pending: List[dict] = []
+        if os.path.exists(path):
+            self._read()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _read(self):
+        intents = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 쓰다가 멈춘 마지막 줄
+                if "commit" in record:
+                    for src, _ in intents.pop(record["commit"], []):
+                        self.done.add(src)
+                else:
+                    intents[record["batch"]] = record["files"]
+        self.pending = [{"src": src, "uuid": u} for files in intents.values() for src, u in files]
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def intent(self, batch_id: str, files: List[Tuple[str, str]]):
+        self._write({"batch": batch_id, "files": files})
+
+    def commit(self, batch_id: str):
+        self._write({"commit": batch_id})
+
+    def close(self):
+        self._file.close()
+
+
+class IngestReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.images = 0
+        self.bytes = 0
+        self.skipped = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.variant_bytes = {}  # 변형 이름 -> 누적 바이트 수
+
+    def line(self) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        line = (f"적재 {self.images}개, 건너뜀 {self.skipped}개, 실패 {self.failed}개, 중복 {self.duplicates}개 | "
+                f"{elapsed:.1f}s, {self.images / elapsed:.1f} images/s, "
+                f"{self.bytes / elapsed / 1024 / 1024:.2f} MB/s")
+        if self.images and self.variant_bytes:
+            sizes = ", ".join(f"{name} {total / self.images / 1024:.1f}KB"
+                              for name, total in self.variant_bytes.items())
+            line += f" | 평균 원본 {self.bytes / self.images / 1024:.1f}KB, {sizes}"
+        return line
+
+
+def _recover_pending(db, journal: Journal):
+    if not journal.pending:
+        return
+    uuids = [uuid.UUID(p["uuid"]) for p in journal.pending]
+    found = set()
+    for i in range(0, len(uuids), 900):
+        found.update(str(u) for u in db.execute(
+            select(models.ImagePath.uuid).where(models.ImagePath.uuid.in_(uuids[i:i + 900]))).scalars())
+    for p in journal.pending:
+        if p["uuid"] in found:
+            journal.done.add(p["src"])
+
+
+# batch: [(IngestedFile, 원본 uuid 또는 None), ...]
+def _flush(db, journal: Journal, batch: list, batch_no: int, source_name: Optional[str]):
+    batch_id = f"{os.getpid()}-{time.time_ns()}-{batch_no}"
+    journal.intent(batch_id, [[r.src, r.uuid] for r, _ in batch])
+    db.execute(insert(models.ImagePath), [
+        {"uuid": uuid.UUID(r.uuid), "path": r.path, "label": r.label, "source": source_name,
+         "phash": None if r.phash is None else dedup.to_signed(r.phash),
+         "duplicate_of": uuid.UUID(original) if original else None}
+        for r, original in batch
+    ])
+    variants = [
+        {"image_uuid": uuid.UUID(r.uuid), "name": name, "path": f"{URL_PREFIX}/{filename}",
+         "width": width, "height": height, "bytes": size}
+        for r, _ in batch for name, filename, width, height, size in r.variants
+    ]
+    if variants:
+        db.execute(insert(models.ImageVariant), variants)
+    db.commit()
+    journal.commit(batch_id)
+
+
+def run(db, items: Iterable[Tuple[str, str]], storage_root: str = STORAGE_ROOT, source_name: Optional[str] = None,
+        workers: int = None, batch_size: int = BATCH_SIZE, use_processes: bool = False, move: bool = False,
+        journal_path: Optional[str] = None, progress_every: int = 10000,
+        make_variants: bool = None, duplicates: str = "reject",
+        max_distance: int = dedup.MAX_DISTANCE) -> IngestReport:
+    if duplicates not in DUPLICATE_POLICIES:
+        raise ValueError(f"duplicates는 {DUPLICATE_POLICIES} 중 하나여야 합니다.")
+    # 변형 생성, 지각 해시는 CPU 작업이므로 기본적으로 프로세스 풀 사용
+    if make_variants is None:
+        make_variants = imaging.available()
+    compute_phash = duplicates != "keep" and imaging.available()
+    if duplicates != "keep" and not compute_phash:
+        print("경고: Pillow가 없어 중복 이미지 검사를 건너뜁니다.")
+    if make_variants or compute_phash:
+        use_processes = True
+    os.makedirs(storage_root, exist_ok=True)
+    journal = Journal(journal_path or os.path.join(storage_root, JOURNAL_NAME))
+    _recover_pending(db, journal)
+    report = IngestReport()
+    index = dedup.HashIndex.load(db, max_distance) if compute_phash else None
+
+    todo = []
+    for src, label in items:
+        if src in journal.done:
+            report.skipped += 1
+        else:
+            todo.append((src, label, storage_root, move, make_variants, compute_phash))
+
+    workers = workers or ((os.cpu_count() or 1) if use_processes else min(32, (os.cpu_count() or 1) * 4))
+    executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    batch, batch_no = [], 0
+    try:
+        with executor_cls(max_workers=workers) as executor:
+            chunksize = 64 if use_processes else 1
+            for result in executor.map(_process_args, todo, chunksize=chunksize):
+                if result.uuid is None:
+                    report.failed += 1
+                    print(f"경고: {result.src} 건너뜀 ({result.error})")
+                    continue
+                original = None
+                if index is not None and result.phash is not None:
+                    match = index.find(result.phash)
+                    if match is None:
+                        index.add(result.phash, result.uuid)  # 같은 적재 안에서의 중복도 검사
+                    elif duplicates == "reject":
+                        report.duplicates += 1
+                        print(f"중복: {result.src} (기존 {match[0]}, 거리 {match[1]})")
+                        if move:  # 원본을 옮겨 왔으면 제자리로 되돌림
+                            shutil.move(os.path.join(storage_root, os.path.basename(result.path)), result.src)
+                            _remove_files(storage_root, None, result.variants)
+                        else:
+                            _remove_files(storage_root, os.path.basename(result.path), result.variants)
+                        continue
+                    else:
+                        report.duplicates += 1
+                        original = match[0]
+                batch.append((result, original))
+                report.images += 1
+                report.bytes += result.size
+                for name, _, _, _, size in result.variants:
+                    report.variant_bytes[name] = report.variant_bytes.get(name, 0) + size
+                if len(batch) >= batch_size:
+                    _flush(db, journal, batch, batch_no, source_name)
+                    batch, batch_no = [], batch_no + 1
+                if progress_every and report.images % progress_every == 0:
+                    print(report.line())
+        if batch:
+            _flush(db, journal, batch, batch_no, source_name)
+    finally:
+        journal.close()
+        # 실행 중인 서버가 카테고리 카탈로그와 이미지 풀을 다시 읽도록 알림
+        catalog.touch_stamp()
+    return report
+
+
+def _variants_args(args):
+    image_uuid, src, storage_root = args
+    try:
+        return image_uuid, imaging.make_variants(src, storage_root, image_uuid), None
+    except Exception as e:
+        return image_uuid, [], str(e)
+
+
+# 이미 적재된 이미지 중 변형이 없는 이미지에 대해 변형 생성 (기존 라이브러리용)
+def backfill_variants(db, storage_root: str = STORAGE_ROOT, workers: int = None, batch_size: int = 1000) -> IngestReport:
+    has_variants = select(models.ImageVariant.image_uuid)
+    rows = db.execute(select(models.ImagePath.uuid, models.ImagePath.path)
+                      .where(models.ImagePath.uuid.notin_(has_variants))).all()
+    todo = [(str(u), os.path.join(storage_root, os.path.basename(path)), storage_root) for u, path in rows]
+    report = IngestReport()
+    batch = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for image_uuid, variants, error in executor.map(_variants_args, todo, chunksize=16):
+            if error:
+                report.failed += 1
+                print(f"경고: {image_uuid} 변형 생성 실패 ({error})")
+                continue
+            report.images += 1
+            for name, filename, width, height, size in variants:
+                report.variant_bytes[name] = report.variant_bytes.get(name, 0) + size
+                batch.append({"image_uuid": uuid.UUID(image_uuid), "name": name, "path": f"{URL_PREFIX}/{filename}",
+                              "width": width, "height": height, "bytes": size})
+            if len(batch) >= batch_size:
+                db.execute(insert(models.ImageVariant), batch)
+                db.commit()
+                batch = []
+    if batch:
+        db.execute(insert(models.ImageVariant), batch)
+        db.commit()
+    catalog.touch_stamp()
+    return report
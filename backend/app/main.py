@@ -1,26 +1,128 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from .database import Base, engine
-from .routes import api1, api2, api3
+from .database import engine, async_engine, ensure_schema, SessionLocal
+from .challenge_pool import challenges
+from .consensus import consensus
+from .image_pool import pool
+from .image_stats import stats as image_stats
+from .writer import writer
+from . import admission, catalog, metrics, proof_of_work, ratelimit, retention
+from .routes import admin, api1, api2, api3, images, metrics as metrics_routes
+
+# 새로 추가된 이미지를 이미지 풀에 반영하는 주기 (초)
+POOL_REFRESH_SECONDS = 30
+
+
+def _load_pool(stamp: float):
+    with SessionLocal() as db:
+        pool.load(db, stamp)
+
+
+# 워커가 여럿이면 첫 워커만 이미지 인덱스 파일을 만들고 나머지는 만들어진 파일을 열기만 함 (image_pool.INDEX_PATH)
+def _startup_load():
+    image_stats.load()
+    with SessionLocal() as db:
+        pool.load(db, catalog.read_stamp())
+        consensus.load(db)
+
+
+def _refresh_pool():
+    with SessionLocal() as db:
+        pool.refresh(db)
+
+
+async def _refresh_pool_periodically():
+    stamp = catalog.read_stamp()
+    while True:
+        await asyncio.sleep(POOL_REFRESH_SECONDS)
+        try:
+            # 적재 스크립트가 라벨을 바꿨다면 전체 다시 로드, 아니면 추가된 이미지만 반영
+            new_stamp = catalog.read_stamp()
+            if new_stamp != stamp:
+                stamp = new_stamp
+                await asyncio.to_thread(_load_pool, stamp)
+            else:
+                await asyncio.to_thread(_refresh_pool)
+        except Exception as e:
+            print(f"이미지 풀 갱신 실패: {e}")
+        if image_stats.dirty:
+            try:
+                await asyncio.to_thread(image_stats.save)
+            except Exception as e:
+                print(f"이미지 통계 저장 실패: {e}")
+
+
+# 보존 기간이 지난 결과/피드백을 날짜별 요약으로 접음 (RWCAPTCHA_RETENTION_DAYS, 짧은 배치로 나눠서 서버를 멈추지 않음)
+async def _retention_periodically():
+    while True:
+        try:
+            await asyncio.to_thread(retention.run_default)
+        except Exception as e:
+            print(f"보존 기간 정리 실패: {e}")
+        await asyncio.sleep(retention.INTERVAL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(_startup_load)
+    refresher = asyncio.create_task(_refresh_pool_periodically())
+    compactor = asyncio.create_task(_retention_periodically()) if retention.ENABLED else None
+    await writer.start()
+    await challenges.start()
+    if admission.ENABLED:
+        await admission.controller.start()
+    yield
+    await admission.controller.stop()
+    await challenges.stop()
+    refresher.cancel()
+    if compactor is not None:
+        compactor.cancel()
+    # 큐에 남아 있는 결과/피드백을 모두 저장한 뒤 종료
+    await writer.stop()
+    image_stats.save()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     docs_url=None,
     redoc_url=None,
     openapi_url=None,
+    lifespan=lifespan,
 )
-Base.metadata.create_all(bind=engine)
+ensure_schema(engine)
 
+# question 앞 작업 증명 관문 (요청 제한 안쪽: 요청 제한을 넘은 요청에는 퍼즐도 내주지 않음)
+if proof_of_work.ENABLED:
+    app.add_middleware(proof_of_work.ProofOfWorkMiddleware, gate=proof_of_work.gate)
+# DB가 느릴 때 question/submit 동시 처리 수 제한, 기능 축소, 503 거절 (요청 제한 안쪽)
+if admission.ENABLED:
+    app.add_middleware(admission.AdmissionMiddleware, controller=admission.controller)
+# 클라이언트별 요청 제한 (CORS 미들웨어 안쪽에 두어야 429 응답에도 CORS 헤더가 붙음)
+if ratelimit.ENABLED:
+    app.add_middleware(ratelimit.RateLimitMiddleware, limiter=ratelimit.limiter)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 수락 제어(admission.py)의 503 재시도 시각과 기능 축소 여부를 브라우저 스크립트에서 읽을 수 있도록
+    expose_headers=["Retry-After", "X-RWCAPTCHA-Degraded"],
 )
+# 가장 바깥에서 라우트별 요청 수/지연 시간 기록 (요청 제한으로 거부된 요청도 포함)
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
 
-#app.mount("/img", StaticFiles(directory="img"), name="img")
+#app.mount("/img", StaticFiles(directory="img"), name="img")  # routes/images.py 로 대체
 #app.mount('/', StaticFiles(directory='../../frontend/public', html=True), name='page')
+app.include_router(admin.router)
 app.include_router(api1.router)
 app.include_router(api2.router)
 app.include_router(api3.router)
+app.include_router(images.router)
+if metrics.ENABLED:
+    app.include_router(metrics_routes.router)
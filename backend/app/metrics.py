@@ -0,0 +1,224 @@
+# metrics.py
+# /metrics 에서 Prometheus 텍스트 형식으로 내보내는 프로세스 내 카운터/히스토그램/게이지
+# 요청 경로에서는 미리 만든 자식(라벨 조합)의 리스트 칸만 더하므로 관측 한 번에 1us 미만
+#  - Counter.labels(...).inc(), Histogram.labels(...).observe(초), GaugeFunc는 수집 시점에 콜백으로 값 계산
+#  - 잠금 없음: 거의 모든 갱신이 이벤트 루프 스레드에서 일어나고, 드물게 다른 스레드와 겹쳐도 관측 하나를 놓치는 정도
+# 워커 프로세스마다 따로 집계되므로 여러 워커로 실행하면 Prometheus에서 워커별로 수집해서 합칠 것
+import asyncio
+import functools
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+ENABLED = os.environ.get("RWCAPTCHA_METRICS", "1") != "0"  # 0 이면 요청별 미들웨어와 /metrics 를 끔
+
+# 초 단위 지연 시간 버킷 (0.5ms ~ 10s)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY: List = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self, values, child) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines += self._samples(values, child)
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _samples(self, values, child):
+        return [f"{self.name}_total{_label_text(self.labelnames, values)} {child.value}"]
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _samples(self, values, child):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), list(child.counts)):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+            lines.append(f"{self.name}_bucket{_label_text(self.labelnames, values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_label_text(self.labelnames, values)} {child.sum}")
+        lines.append(f"{self.name}_count{_label_text(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+# 수집 시점에 콜백으로 값을 읽는 게이지/카운터, 콜백은 숫자 또는 {라벨 값 튜플: 숫자}를 반환
+class GaugeFunc(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, func: Callable, labelnames: Sequence[str] = (),
+                 kind: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.func = func
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            value = self.func()
+        except Exception as e:  # 수집 실패가 /metrics 전체를 막지 않도록
+            return lines + [f"# {self.name} 수집 실패: {_escape(e)}"]
+        name = f"{self.name}_total" if self.kind == "counter" else self.name
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        for values, v in items:
+            values = values if isinstance(values, tuple) else (values,)
+            lines.append(f"{name}{_label_text(self.labelnames, values)} {float(v)}")
+        return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+# DB를 사용하는 함수의 실행 시간을 DB_SECONDS{function=name}에 기록 (동기/비동기 함수 모두)
+def timed(name: str):
+    def decorator(fn):
+        child = DB_SECONDS.labels(name)
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - start)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# 라우트별 요청 수/지연 시간 기록 (경로는 /img/{image_id} 같은 라우트 템플릿, 라우트가 없으면 "unmatched")
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._children = {}  # (메서드, 라우트, 상태 코드) -> 히스토그램 자식 (요청 수는 _count)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else "unmatched", status)
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = REQUEST_SECONDS.labels(key[0], key[1], str(status))
+            child.observe(elapsed)
+
+
+REQUEST_SECONDS = Histogram("rwcaptcha_http_request_duration_seconds", "HTTP request latency by route and status",
+                            ("method", "route", "status"))
+DB_SECONDS = Histogram("rwcaptcha_db_query_duration_seconds", "Database time by calling function", ("function",))
+SUBMISSIONS = Counter("rwcaptcha_submissions", "Graded submissions by mode, asked category and result",
+                      ("mode", "category", "result"))
+FEEDBACK = Counter("rwcaptcha_feedback", "Unclassified image feedback votes accepted", ("mode",))
+FEEDBACK_EXCLUDED = Counter("rwcaptcha_feedback_excluded",
+                            "Passed submissions whose feedback was dropped for a low bot score", ("mode",))
+BOT_SCORE = Histogram("rwcaptcha_bot_score", "Per-submission human-likeness score (botscore.py)", ("mode",),
+                      buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0))
+WRITER_ROWS = Counter("rwcaptcha_writer_rows", "Rows written or dropped by the write-behind queue",
+                      ("table", "outcome"))
+ADMISSION_SHED = Counter("rwcaptcha_admission_shed", "Requests rejected with 503 by admission control",
+                         ("action", "reason"))
+QUESTION_SHORTFALL = Counter("rwcaptcha_question_shortfall",
+                             "Questions built with fewer unclassified images than requested", ("mode",))
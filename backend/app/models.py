@@ -1,21 +1,44 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, UUID, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, Date, DateTime, Uuid, ForeignKey, Index
 from sqlalchemy.orm import relationship  # relationship import 추가
 from .database import Base
 from datetime import datetime
 
 
+# uuid 컬럼은 Uuid 타입 사용: SQLite에서 CHAR(32)(TEXT 친화성)로 만들어짐
+# (UUID로 선언하면 NUMERIC 친화성이 되어 숫자처럼 보이는 hex 문자열(예: 1234e5...)이 실수로 바뀌어 저장됨)
+
 # 데이터베이스로 이미지를 관리하기 위한 모델, 이미지 저장시 uuid를 통해 저장 -> 이미지 id만 보고서 종류 추론 막기 위함
 class ImagePath(Base):
     __tablename__ = "image_paths"
     id = Column(Integer, primary_key=True, index=True)
-    uuid = Column(UUID, nullable=False)
+    uuid = Column(Uuid, nullable=False, unique=True, index=True)  # 다른 테이블의 외래 키가 참조
     path = Column(String, nullable=False)
     label = Column(String, nullable=False)
     source = Column(String)
+    phash = Column(BigInteger, index=True)  # 지각 해시(dHash), 거의 같은 이미지 찾기용 (dedup.py)
+    duplicate_of = Column(Uuid)  # 이미 있는 이미지의 중복이면 원본 uuid, 샘플링에서 제외
 
     # UnclassifiedFeedback과의 관계 정의 (선택 사항이지만 유용)
     feedback_entries = relationship("UnclassifiedFeedback", back_populates="image_path_ref")
+    variants = relationship("ImageVariant", back_populates="image_path_ref")
+
+    # 라벨별 조회/개수 세기와 라벨 안에서 id 순서로 읽기(이미지 풀 로드, id 구간 샘플링)
+    __table_args__ = (Index("ix_image_paths_label_id", "label", "id"),)
+
+
+# 적재 시 만든 축소/재인코딩 이미지 (tile: 그리드 칸용, large: /second 용), 원본은 ImagePath.path
+class ImageVariant(Base):
+    __tablename__ = "image_variants"
+    id = Column(Integer, primary_key=True, index=True)
+    image_uuid = Column(Uuid, ForeignKey("image_paths.uuid"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    path = Column(String, nullable=False)
+    width = Column(Integer)
+    height = Column(Integer)
+    bytes = Column(Integer)
+
+    image_path_ref = relationship("ImagePath", back_populates="variants")
 
 
 class Result(Base):
@@ -26,6 +49,9 @@ class Result(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     category_asked = Column(String, nullable=False)
 
+    # 기간별 집계/내보내기(export.py)용
+    __table_args__ = (Index("ix_results_timestamp", "timestamp"),)
+
 class ResultSecond(Base):
     __tablename__ = "results_second"
     id = Column(Integer, primary_key=True, index=True)
@@ -34,16 +60,45 @@ class ResultSecond(Base):
     selected_answers = Column(String)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (Index("ix_results_second_timestamp", "timestamp"),)
+
 
 # 추가: 미분류 이미지에 대한 사용자 피드백을 저장하는 테이블
 class UnclassifiedFeedback(Base):
     __tablename__ = "unclassified_feedback"
     id = Column(Integer, primary_key=True, index=True)
-    image_uuid = Column(UUID, ForeignKey("image_paths.uuid"), nullable=False)  # 어떤 미분류 이미지인지
+    image_uuid = Column(Uuid, ForeignKey("image_paths.uuid"), nullable=False)  # 어떤 미분류 이미지인지
     user_assigned_label = Column(String, nullable=False)  # 사용자가 어떤 카테고리 질문에 이 미분류 이미지를 선택했는지
     timestamp = Column(DateTime, default=datetime.utcnow)
     # 메인 캡챠가 정답이었을 때만 저장되므로 항상 True가 될 것이지만 명시적으로 포함
     is_correct_main_captcha = Column(Boolean, default=True, nullable=False)
 
     # ImagePath와의 관계 정의
-    image_path_ref = relationship("ImagePath", back_populates="feedback_entries")
\ No newline at end of file
+    image_path_ref = relationship("ImagePath", back_populates="feedback_entries")
+
+    # 이미지별 라벨 득표 집계(consensus.py)를 인덱스만으로 처리, 기간별 집계/내보내기용 timestamp
+    __table_args__ = (
+        Index("ix_unclassified_feedback_image_label", "image_uuid", "user_assigned_label"),
+        Index("ix_unclassified_feedback_timestamp", "timestamp"),
+    )
+
+
+# 보존 기간(retention.py)이 지난 결과를 날짜별로 접은 요약: 모드(first/second/third)와 카테고리별 제출 수, 통과 수
+# (results_second 는 카테고리가 없으므로 "")
+class DailyResultSummary(Base):
+    __tablename__ = "daily_result_summary"
+    day = Column(Date, primary_key=True)
+    mode = Column(String, primary_key=True)
+    category = Column(String, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    passed = Column(Integer, nullable=False, default=0)
+
+
+# 보존 기간이 지난 미분류 피드백을 날짜별 이미지/라벨 득표수로 접은 것 (consensus.py 가 원본 피드백과 합쳐서 집계)
+# 기본 키가 image_uuid 로 시작하므로 이미지별 조회에 그대로 사용
+class DailyLabelVotes(Base):
+    __tablename__ = "daily_label_votes"
+    image_uuid = Column(Uuid, primary_key=True)
+    label = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    votes = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,164 @@
+# proof_of_work.py
+# /{모드}/question 앞단의 작업 증명(proof of work) 관문 (선택 기능, RWCAPTCHA_POW=1)
+# 스크래퍼가 몰려도 문제 그리드(샘플링, 이미지 id 봉인, 스프라이트)는 계산을 마친 클라이언트에게만 만들어 줌
+#  1) pow 없이 요청하면 428 과 함께 서명된 퍼즐을 돌려줌 (서버에 상태를 남기지 않음)
+#     퍼즐 = base64url(만료 시각 4B | 난이도 1B | 임의 값 8B | HMAC 태그 12B)
+#  2) 클라이언트는 SHA-256("<퍼즐>.<nonce>") 앞 난이도 비트가 모두 0인 nonce(10진수)를 찾아서
+#     같은 주소에 ?pow=<퍼즐>.<nonce> 를 붙여 다시 요청
+#  3) 검증: 만료/난이도 확인 -> SHA-256 한 번으로 풀이 확인 (틀린 풀이는 여기서 끝)
+#     -> 맞으면 HMAC 태그로 서버가 낸 퍼즐인지 확인 -> 챌린지 상태 저장소(state.py)에 한 번만 쓸 수 있도록 기록
+# 난이도는 최근 question 요청 속도(EWMA)가 TARGET_RATE 의 두 배가 될 때마다 1비트(평균 계산량 2배)씩 올라감
+#   MIN_BITS=12 이면 브라우저에서 평균 수천 번 해시 (수십 ms), MAX_BITS 에서 멈춤
+# 요청 제한(ratelimit.py) 안쪽에서 동작하므로 퍼즐을 받는 요청도 요청 제한에 걸림
+import base64
+import hashlib
+import hmac
+import json
+import math
+import os
+import secrets
+import time
+from typing import Optional, Tuple
+from urllib.parse import parse_qs
+
+from . import challenge, state
+
+ENABLED = os.environ.get("RWCAPTCHA_POW", "0") == "1"
+MIN_BITS = int(os.environ.get("RWCAPTCHA_POW_MIN_BITS", "12"))
+MAX_BITS = int(os.environ.get("RWCAPTCHA_POW_MAX_BITS", "22"))
+TARGET_RATE = float(os.environ.get("RWCAPTCHA_POW_TARGET_RATE", "20"))  # 이 속도(초당 question 요청)까지는 MIN_BITS
+PUZZLE_TTL_SECONDS = 60
+RATE_WINDOW = 1.0
+RATE_SMOOTHING = 0.3
+GATED_MODES = ("first", "second", "third")
+
+RANDOM_SIZE = 8
+TAG_SIZE = 12
+_KEY = hmac.new(challenge.SECRET, b"rwcaptcha-pow", hashlib.sha256).digest()
+
+
+def leading_zero_bits(digest: bytes) -> int:
+    value = int.from_bytes(digest, "big")
+    return len(digest) * 8 - value.bit_length()
+
+
+class ProofOfWorkGate:
+    def __init__(self, min_bits: int = MIN_BITS, max_bits: int = MAX_BITS, target_rate: float = TARGET_RATE):
+        self.min_bits = min_bits
+        self.max_bits = max_bits
+        self.target_rate = target_rate
+        self.rate = 0.0
+        self._count = 0
+        self._window_start = time.monotonic()
+        self.issued = 0
+        self.solved = 0
+        self.rejected = 0
+        self.replayed = 0
+
+    # question 요청 한 건을 세고 현재 난이도 반환
+    def observe(self) -> int:
+        now = time.monotonic()
+        self._count += 1
+        elapsed = now - self._window_start
+        if elapsed >= RATE_WINDOW:
+            current = self._count / elapsed
+            # 한동안 요청이 없었으면 바로 낮춤
+            self.rate = current if elapsed > 5 * RATE_WINDOW else self.rate + RATE_SMOOTHING * (current - self.rate)
+            self._count = 0
+            self._window_start = now
+        return self.difficulty()
+
+    def difficulty(self) -> int:
+        if self.rate <= self.target_rate:
+            return self.min_bits
+        return min(self.max_bits, self.min_bits + math.ceil(math.log2(self.rate / self.target_rate)))
+
+    def issue(self, bits: int) -> dict:
+        expires_at = int(time.time()) + PUZZLE_TTL_SECONDS
+        body = expires_at.to_bytes(4, "big") + bytes([bits]) + secrets.token_bytes(RANDOM_SIZE)
+        tag = hmac.new(_KEY, body, hashlib.sha256).digest()[:TAG_SIZE]
+        self.issued += 1
+        puzzle = base64.urlsafe_b64encode(body + tag).rstrip(b"=").decode()
+        return {"challenge": puzzle, "difficulty": bits, "expires": expires_at}
+
+    # 풀이 검증, 실패 사유(없으면 None) 반환
+    async def verify(self, solution: str, required_bits: int) -> Optional[str]:
+        puzzle, _, nonce = solution.rpartition(".")
+        if not puzzle or not nonce.isdigit() or len(nonce) > 20:
+            return "Malformed proof of work"
+        try:
+            raw = base64.urlsafe_b64decode(puzzle + "=" * (-len(puzzle) % 4))
+        except (ValueError, TypeError):
+            return "Malformed proof of work"
+        if len(raw) != 5 + RANDOM_SIZE + TAG_SIZE:
+            return "Malformed proof of work"
+        body, tag = raw[:-TAG_SIZE], raw[-TAG_SIZE:]
+        expires_at, bits = int.from_bytes(body[:4], "big"), body[4]
+        # 난이도가 오른 뒤에는 조금 전에 받은 퍼즐까지만 인정 (한 단계 여유)
+        if expires_at < time.time() or bits < required_bits - 1:
+            return "Proof of work expired"
+        if leading_zero_bits(hashlib.sha256(solution.encode()).digest()) < bits:
+            return "Invalid proof of work"
+        if not hmac.compare_digest(tag, hmac.new(_KEY, body, hashlib.sha256).digest()[:TAG_SIZE]):
+            return "Invalid proof of work"
+        if not await state.attempt(b"pow:" + body[5:], expires_at, 1):
+            self.replayed += 1
+            return "Proof of work already used"
+        return None
+
+    def stats(self) -> dict:
+        return {"enabled": ENABLED, "difficulty": self.difficulty(), "rate": round(self.rate, 2),
+                "target_rate": self.target_rate, "issued": self.issued, "solved": self.solved,
+                "rejected": self.rejected, "replayed": self.replayed}
+
+
+gate = ProofOfWorkGate()
+
+
+def _query_value(scope, name: str) -> Optional[str]:
+    query = scope.get("query_string", b"")
+    if f"{name}=".encode() not in query:
+        return None
+    values = parse_qs(query.decode("latin-1")).get(name)
+    return values[0] if values else None
+
+
+class ProofOfWorkMiddleware:
+    def __init__(self, app, gate: ProofOfWorkGate):
+        self.app = app
+        self.gate = gate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        parts = scope["path"].strip("/").split("/")
+        if len(parts) != 2 or parts[0] not in GATED_MODES or parts[1] != "question":
+            return await self.app(scope, receive, send)
+        bits = self.gate.observe()
+        solution = _query_value(scope, "pow")
+        detail = "Proof of work required"
+        if solution:
+            detail = await self.gate.verify(solution, bits)
+            if detail is None:
+                self.gate.solved += 1
+                return await self.app(scope, receive, send)
+            self.gate.rejected += 1
+        body = json.dumps({"detail": detail, "pow": self.gate.issue(bits)}).encode()
+        await send({"type": "http.response.start", "status": 428, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"cache-control", b"no-store"),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+
+# 테스트/벤치마크용: 퍼즐 풀기 (브라우저는 같은 일을 crypto.subtle 로 함)
+def solve(puzzle: dict) -> Tuple[str, int]:
+    bits = puzzle["difficulty"]
+    prefix = puzzle["challenge"] + "."
+    nonce = 0
+    while True:
+        solution = prefix + str(nonce)
+        if leading_zero_bits(hashlib.sha256(solution.encode()).digest()) >= bits:
+            return solution, nonce + 1
+        nonce += 1
@@ -0,0 +1,176 @@
+# ratelimit.py
+# /first, /second, /third 의 question, submit 요청을 클라이언트(IP)별로 제한하는 ASGI 미들웨어
+# 토큰 버킷을 GCRA(Generic Cell Rate Algorithm)로 구현해서 키마다 "다음 요청이 허용되는 이론상 시각(TAT)" 하나만 저장
+#  - rate: 초당 채워지는 토큰 수, burst: 버킷 크기 (한 번에 몰아서 보낼 수 있는 요청 수)
+#  - 버킷이 다 찬(TAT가 지난) 키는 지워도 결과가 같으므로, 두 세대(dict)를 번갈아 쓰면서 오래 안 쓰인 키를 통째로 버림
+# 모드별 제한은 RWCAPTCHA_RATE_LIMIT_FIRST="5,30" (rate,burst) 처럼 설정, RWCAPTCHA_RATE_LIMIT=0 이면 끔
+# 여러 워커/서버가 같은 제한을 공유하려면 RWCAPTCHA_RATE_LIMIT_REDIS_URL 설정 (redis 패키지 필요)
+# 설정하지 않고 여러 워커(WEB_CONCURRENCY > 1)로 실행하면 워커마다 따로 세므로 rate, burst를 워커 수로 나눈 몫을 씀
+# (연결이 워커에 고르게 나뉜다고 보는 근사치, 정확한 제한이 필요하면 Redis 사용)
+# 챌린지 토큰 재사용은 challenge.py 의 제출 기록이 이미 막고 있으므로 키는 클라이언트 주소만 사용
+import json
+import math
+import os
+import time
+from typing import Dict, Tuple
+
+from .state import WORKERS
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # 선택 의존성
+    redis_asyncio = None
+
+ENABLED = os.environ.get("RWCAPTCHA_RATE_LIMIT", "1") != "0"
+# 프록시(로드 밸런서) 뒤에서 실행할 때만 켤 것, 아니면 클라이언트가 X-Forwarded-For를 마음대로 바꿔서 제한을 피함
+TRUST_PROXY = os.environ.get("RWCAPTCHA_TRUST_PROXY", "0") == "1"
+REDIS_URL = os.environ.get("RWCAPTCHA_RATE_LIMIT_REDIS_URL", "")
+
+# 모드 -> (rate, burst), 한 문제를 푸는 데 question + submit 두 번, 같은 IP 뒤에 여러 사용자가 있을 수 있음
+DEFAULT_LIMITS = {
+    "first": (5.0, 30),
+    "second": (5.0, 30),
+    "third": (5.0, 30),
+}
+LIMITED_ACTIONS = ("question", "submit")
+
+
+def _limit_from_env(mode: str, default: Tuple[float, int]) -> Tuple[float, int]:
+    value = os.environ.get(f"RWCAPTCHA_RATE_LIMIT_{mode.upper()}")
+    if not value:
+        return default
+    rate, burst = value.split(",")
+    return float(rate), int(burst)
+
+
+LIMITS = {mode: _limit_from_env(mode, limit) for mode, limit in DEFAULT_LIMITS.items()}
+
+
+class MemoryBackend:
+    # 워커 프로세스 안에서만 공유되는 저장소, 키 문자열 대신 해시(int) -> TAT(float)만 보관
+    def __init__(self, period: float):
+        self.period = period  # 이 시간 동안 한 번도 안 쓰인 키는 버킷이 다 찬 상태이므로 버려도 됨
+        self._current: Dict[int, float] = {}
+        self._previous: Dict[int, float] = {}
+        self._rotated_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._current) + len(self._previous)
+
+    def _rotate(self, now: float):
+        if now - self._rotated_at >= self.period:
+            # 두 세대 전 키는 마지막 사용 후 period 이상 지났으므로 그대로 버림
+            self._previous, self._current = self._current, {}
+            self._rotated_at = now
+
+    # 반환: (허용 여부, 다시 시도할 때까지 기다릴 시간(초))
+    async def hit(self, key: str, interval: float, tolerance: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        self._rotate(now)
+        h = hash(key)
+        tat = self._current.get(h)
+        if tat is None:
+            tat = self._previous.pop(h, now)
+        new_tat = max(tat, now) + interval
+        if new_tat - now > tolerance:
+            self._current[h] = tat
+            return False, new_tat - now - tolerance
+        self._current[h] = new_tat
+        return True, 0.0
+
+
+# 같은 GCRA를 Redis Lua 스크립트로 원자적으로 실행 (시각은 Redis 서버 기준)
+_GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+if new_tat - now > tolerance then
+  return {0, tostring(new_tat - now - tolerance)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0'}
+"""
+
+
+class RedisBackend:
+    def __init__(self, url: str, prefix: str = "rwcaptcha:rl:"):
+        if redis_asyncio is None:
+            raise RuntimeError("공유 rate limit 저장소를 쓰려면 redis 패키지가 필요합니다. (pip install redis)")
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(_GCRA_SCRIPT)
+        self.prefix = prefix
+
+    def __len__(self):
+        return 0  # 키 수는 Redis가 관리 (만료 시간 = 버킷이 다 차는 시각)
+
+    async def hit(self, key: str, interval: float, tolerance: float) -> Tuple[bool, float]:
+        allowed, retry_after = await self._script(keys=[self.prefix + key], args=[interval, tolerance])
+        return bool(allowed), float(retry_after)
+
+
+class RateLimiter:
+    # workers: 같은 제한을 나눠 가지는 워커 수 (공유 저장소 없이 여러 워커로 실행할 때)
+    def __init__(self, limits: Dict[str, Tuple[float, int]] = None, backend=None, workers: int = 1):
+        self.limits = {}
+        for mode, (rate, burst) in (limits or LIMITS).items():
+            rate, burst = rate / workers, max(1, math.ceil(burst / workers))
+            interval = 1.0 / rate
+            # burst개까지는 연달아 허용: 이번 요청을 더한 TAT가 지금보다 burst * interval 넘게 앞서면 거부
+            self.limits[mode] = (interval, burst * interval)
+        period = max([tolerance for interval, tolerance in self.limits.values()] + [1.0])
+        self.backend = backend if backend is not None else MemoryBackend(period)
+        self.allowed = 0
+        self.limited = 0
+
+    async def hit(self, mode: str, client: str) -> Tuple[bool, float]:
+        interval, tolerance = self.limits[mode]
+        allowed, retry_after = await self.backend.hit(f"{mode}:{client}", interval, tolerance)
+        if allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return allowed, retry_after
+
+    def stats(self) -> dict:
+        return {"allowed": self.allowed, "limited": self.limited, "keys": len(self.backend)}
+
+
+# 요청 제한과 봇 점수(botscore.py)에서 클라이언트를 구분하는 키
+def client_address(scope) -> str:
+    if TRUST_PROXY:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+        # 경로: /{모드}/{question|submit}
+        parts = scope["path"].strip("/").split("/")
+        if len(parts) != 2 or parts[0] not in self.limiter.limits or parts[1] not in LIMITED_ACTIONS:
+            return await self.app(scope, receive, send)
+        allowed, retry_after = await self.limiter.hit(parts[0], client_address(scope))
+        if allowed:
+            return await self.app(scope, receive, send)
+        body = json.dumps({"detail": "Too Many Requests"}).encode()
+        await send({"type": "http.response.start", "status": 429, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+
+limiter = RateLimiter(backend=RedisBackend(REDIS_URL)) if REDIS_URL else RateLimiter(workers=WORKERS)
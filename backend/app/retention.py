@@ -0,0 +1,222 @@
+# retention.py
+# 결과/피드백 테이블 보존 기간 관리: 보존 기간(RWCAPTCHA_RETENTION_DAYS)이 지난 원본 행을 날짜별 요약으로 접고 지움
+#  - results, results_second -> daily_result_summary (날짜, 모드, 카테고리별 제출 수/통과 수)
+#  - unclassified_feedback   -> daily_label_votes (날짜, 이미지, 라벨별 득표수, consensus.py 가 원본과 합쳐서 집계)
+#  - RWCAPTCHA_ARCHIVE_URL 을 주면 지우기 전에 원본 행을 월별 보관 DB에 복사 ({month} -> YYYY-MM)
+#    예) sqlite:///./archive/results-{month}.db
+# 서버를 멈추지 않고 돌릴 수 있도록 BATCH_SIZE 행씩 짧은 트랜잭션으로 처리하고 배치 사이에 쉬어서 결과 저장(writer.py)이 끼어들 수 있게 함
+#  - 배치마다 DELETE ... RETURNING 으로 지운 행을 그대로 요약에 더함 (같은 트랜잭션)
+#    -> 워커 여럿이 동시에 돌아도 한 행은 한 번만 요약됨, 늦게 들어온 행은 이미 있는 요약 행에 더해짐
+#  - 보관 DB에는 원본 DB 커밋 전에 먼저 쓰고, 같은 id는 무시 (중간에 실패하면 다음 실행이 같은 행을 다시 처리)
+# 지운 행의 공간은 SQLite 파일 안의 빈 페이지로 남아 이후 저장에 다시 쓰이므로 파일이 계속 커지지 않음
+# (파일 크기 자체를 줄이려면 retention.py --vacuum, 그동안 DB 전체가 잠김)
+# 내보내기(export.py) 워터마크가 있으면 아직 내보내지 않은 행은 지우지 않음
+import os
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import Column, MetaData, Table, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from . import database, export, models
+
+RETENTION_DAYS = float(os.environ.get("RWCAPTCHA_RETENTION_DAYS", "0"))  # 0 이면 사용 안 함
+ARCHIVE_URL = os.environ.get("RWCAPTCHA_ARCHIVE_URL", "")
+BATCH_SIZE = int(os.environ.get("RWCAPTCHA_RETENTION_BATCH_SIZE", "2000"))
+INTERVAL_SECONDS = float(os.environ.get("RWCAPTCHA_RETENTION_INTERVAL", "3600"))
+PAUSE_SECONDS = 0.05  # 배치 사이 쉬는 시간
+ENABLED = RETENTION_DAYS > 0
+
+
+def _summarize_results(rows) -> Dict[tuple, Counter]:
+    sums: Dict[tuple, Counter] = {}
+    for row in rows:
+        key = (row.timestamp.date(), "first", row.category_asked or "")
+        sums.setdefault(key, Counter()).update(total=1, passed=int(bool(row.is_correct)))
+    return sums
+
+
+def _summarize_second(rows) -> Dict[tuple, Counter]:
+    sums: Dict[tuple, Counter] = {}
+    for row in rows:
+        key = (row.timestamp.date(), "second", "")
+        sums.setdefault(key, Counter()).update(total=1, passed=int(bool(row.is_correct)))
+    return sums
+
+
+def _summarize_feedback(rows) -> Dict[tuple, Counter]:
+    sums: Dict[tuple, Counter] = {}
+    for row in rows:
+        key = (row.image_uuid, row.user_assigned_label, row.timestamp.date())
+        sums.setdefault(key, Counter()).update(votes=1)
+    return sums
+
+
+class Source(NamedTuple):
+    model: type
+    summary: type
+    keys: List[str]
+    counters: List[str]
+    summarize: Callable
+
+
+SOURCES: Dict[str, Source] = {
+    "results": Source(models.Result, models.DailyResultSummary,
+                      ["day", "mode", "category"], ["total", "passed"], _summarize_results),
+    "results_second": Source(models.ResultSecond, models.DailyResultSummary,
+                             ["day", "mode", "category"], ["total", "passed"], _summarize_second),
+    "unclassified_feedback": Source(models.UnclassifiedFeedback, models.DailyLabelVotes,
+                                    ["image_uuid", "label", "day"], ["votes"], _summarize_feedback),
+}
+
+last_run: dict = {}
+
+
+def cutoff_for(now: datetime, days: float = RETENTION_DAYS) -> datetime:
+    # 날짜 경계로 맞춰서 하루치가 원본과 요약으로 나뉘지 않게 함 (시간대 없는 UTC, DB와 같은 기준)
+    cutoff = now - timedelta(days=days)
+    return datetime(cutoff.year, cutoff.month, cutoff.day)
+
+
+# 요약 행에 더하기 (없으면 새로 넣기)
+def _upsert_add(db: Session, summary: type, keys: List[str], counters: List[str], values: List[dict]):
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite.insert(summary)
+    elif dialect == "postgresql":
+        stmt = postgresql.insert(summary)
+    else:
+        raise RuntimeError(f"보존 기간 관리는 SQLite/PostgreSQL만 지원합니다. ({dialect})")
+    table = summary.__table__
+    stmt = stmt.on_conflict_do_update(index_elements=keys,
+                                      set_={c: table.c[c] + stmt.excluded[c] for c in counters})
+    db.execute(stmt, values)
+
+
+# 월별 보관 DB (외래 키와 인덱스 없이 원본 테이블과 같은 컬럼만)
+class Archive:
+    def __init__(self, url_template: str):
+        self.url_template = url_template
+        self._metadata = MetaData()
+        self._tables = {
+            name: Table(name, self._metadata,
+                        *(Column(c.name, c.type, primary_key=c.primary_key) for c in source.model.__table__.columns))
+            for name, source in SOURCES.items()
+        }
+        self._engines = {}
+
+    def _engine(self, month: str):
+        url = self.url_template.replace("{month}", month)
+        engine = self._engines.get(url)
+        if engine is None:
+            if database.is_sqlite(url):
+                path = make_url(url).database
+                if path and os.path.dirname(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+            engine = self._engines[url] = database.make_engine(url)
+            self._metadata.create_all(bind=engine)
+        return engine
+
+    def write(self, name: str, rows):
+        by_month: Dict[str, list] = {}
+        for row in rows:
+            by_month.setdefault(row.timestamp.strftime("%Y-%m"), []).append(row._asdict())
+        table = self._tables[name]
+        for month, values in by_month.items():
+            engine = self._engine(month)
+            dialect = sqlite if engine.dialect.name == "sqlite" else postgresql
+            with engine.begin() as conn:
+                conn.execute(dialect.insert(table).on_conflict_do_nothing(index_elements=["id"]), values)
+
+    def close(self):
+        for engine in self._engines.values():
+            engine.dispose()
+        self._engines.clear()
+
+
+# cutoff 이전의 가장 오래된 행 batch_size 개를 지우고 지운 행을 돌려받는 문장 (timestamp 인덱스 사용)
+def compact_statement(name: str, cutoff: datetime, batch_size: int = BATCH_SIZE):
+    table = SOURCES[name].model.__table__
+    oldest = (select(table.c.id).where(table.c.timestamp < cutoff)
+              .order_by(table.c.timestamp).limit(batch_size).scalar_subquery())
+    return delete(table).where(table.c.id.in_(oldest)).returning(*table.c)
+
+
+# cutoff 이전 행을 최대 batch_size 개 접고 지움, 처리한 행 수 반환 (0 이면 끝)
+def compact_batch(db: Session, name: str, cutoff: datetime, batch_size: int = BATCH_SIZE,
+                  archive: Optional[Archive] = None) -> int:
+    source = SOURCES[name]
+    rows = db.execute(compact_statement(name, cutoff, batch_size)).all()
+    if not rows:
+        db.rollback()
+        return 0
+    if archive is not None:
+        archive.write(name, rows)
+    sums = source.summarize(rows)
+    values = [{**dict(zip(source.keys, key)), **{c: counts[c] for c in source.counters}}
+              for key, counts in sums.items()]
+    _upsert_add(db, source.summary, source.keys, source.counters, values)
+    db.commit()
+    return len(rows)
+
+
+# 내보내기를 쓰고 있으면 워터마크 이전까지만 (그 뒤의 행은 아직 파일에 없음)
+def _export_limit(name: str, export_dir: Optional[str]) -> Optional[datetime]:
+    if not export_dir:
+        return None
+    mark = export.read_watermarks(export_dir).get(name)
+    if mark is not None:
+        return mark[0]
+    # 내보내기 폴더는 있는데 이 테이블을 아직 한 번도 내보내지 않았으면 지우지 않음
+    return datetime.min if os.path.isdir(export_dir) else None
+
+
+def run_once(db: Session, days: float = RETENTION_DAYS, now: Optional[datetime] = None,
+             tables: Optional[List[str]] = None, batch_size: int = BATCH_SIZE, archive_url: str = ARCHIVE_URL,
+             export_dir: Optional[str] = export.EXPORT_DIR, pause: float = PAUSE_SECONDS) -> dict:
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    cutoff = cutoff_for(now, days)
+    archive = Archive(archive_url) if archive_url else None
+    started = time.perf_counter()
+    compacted = {}
+    try:
+        for name in tables or list(SOURCES):
+            limit = _export_limit(name, export_dir)
+            table_cutoff = min(cutoff, limit) if limit is not None else cutoff
+            total = 0
+            while True:
+                n = compact_batch(db, name, table_cutoff, batch_size, archive)
+                total += n
+                if n < batch_size:
+                    break
+                if pause:
+                    time.sleep(pause)
+            compacted[name] = total
+    finally:
+        if archive is not None:
+            archive.close()
+    result = {"cutoff": cutoff.isoformat(), "compacted": compacted,
+              "seconds": round(time.perf_counter() - started, 3), "finished_at": now.isoformat()}
+    last_run.clear()
+    last_run.update(result)
+    return result
+
+
+def run_default() -> dict:
+    with database.SessionLocal() as db:
+        return run_once(db)
+
+
+# 보관된 날짜별 결과 요약 (관리자 API, 원본이 남아 있는 최근 날짜는 포함되지 않음)
+def daily_summary(db: Session, since: Optional[date] = None) -> List[dict]:
+    query = select(models.DailyResultSummary).order_by(models.DailyResultSummary.day,
+                                                       models.DailyResultSummary.mode,
+                                                       models.DailyResultSummary.category)
+    if since is not None:
+        query = query.where(models.DailyResultSummary.day >= since)
+    return [{"day": row.day.isoformat(), "mode": row.mode, "category": row.category,
+             "total": row.total, "passed": row.passed} for row in db.scalars(query)]
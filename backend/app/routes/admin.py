@@ -0,0 +1,189 @@
+# admin.py
+# 카테고리 카탈로그 조회 및 이미지 라벨 변경용 관리자 API
+# RWCAPTCHA_ADMIN_TOKEN 환경 변수가 설정된 경우에만 활성화되고 X-Admin-Token 헤더로 인증
+import asyncio
+import hmac
+import os
+import uuid
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import admission, botscore, catalog as catalog_module, database, export, models, proof_of_work, ratelimit, retention
+from ..catalog import catalog
+from ..challenge_pool import challenges
+from ..consensus import consensus
+from ..image_pool import pool
+
+ADMIN_TOKEN = os.environ.get("RWCAPTCHA_ADMIN_TOKEN", "")
+
+
+def require_admin(x_admin_token: str = Header(default="")):
+    if not ADMIN_TOKEN or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+_export_lock = asyncio.Lock()
+
+
+class LabelIn(BaseModel):
+    label: str
+
+
+@router.get("/categories")
+async def get_categories():
+    return {
+        "categories": catalog.counts(),
+        "unclassified": catalog.unclassified_count(),
+    }
+
+
+# 모드별 미리 만든 문제 버퍼 상태 (깊이, 목표치, 요청 속도, 버퍼 미스, 재충전 지연)
+@router.get("/challenge-pool")
+async def get_challenge_pool():
+    return challenges.stats()
+
+
+# 요청 제한 상태 (허용/거부 수, 메모리에 있는 키 수)
+@router.get("/rate-limit")
+async def get_rate_limit():
+    return ratelimit.limiter.stats()
+
+
+# 수락 제어 상태 (단계, DB 지연, 쓰기 큐가 찬 비율, 종류별 동시 요청 한도/처리 중/대기/거절 수)
+@router.get("/admission")
+async def get_admission():
+    return admission.controller.stats()
+
+
+# 작업 증명 관문 상태 (현재 난이도, question 요청 속도, 퍼즐 발급/통과/거부 수)
+@router.get("/pow")
+async def get_pow():
+    return proof_of_work.gate.stats()
+
+
+# 봇 점수 상태 (추적 중인 클라이언트 수, 기준 미만으로 피드백에서 제외된 제출 수, 모드별 사람 응답 시간 중앙값)
+@router.get("/bot-score")
+async def get_bot_score():
+    return botscore.scorer.stats()
+
+
+# 이 워커가 쓰는 이미지 인덱스 (파일 경로, mmap 여부, 인덱스 이후 추가된 이미지 수)
+@router.get("/image-index")
+async def get_image_index():
+    return pool.index_info()
+
+
+# 보존 기간 설정, 마지막 정리 결과, 날짜별 요약 (보존 기간이 지나 원본이 지워진 날짜만)
+@router.get("/retention")
+async def get_retention(since: Optional[date] = None):
+    def _summary():
+        with database.SessionLocal() as db:
+            return retention.daily_summary(db, since)
+
+    return {"enabled": retention.ENABLED, "days": retention.RETENTION_DAYS, "archive": bool(retention.ARCHIVE_URL),
+            "last_run": retention.last_run or None, "daily": await asyncio.to_thread(_summary)}
+
+
+# 분류된 이미지의 누적 통계와 현재 샘플링 가중치
+@router.get("/image-stats/{image_uuid}")
+async def get_image_stats(image_uuid: str):
+    img = pool.get(image_uuid)
+    if img is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return {"uuid": image_uuid, "label": img.label, **pool.image_stats.summary(img.id)}
+
+
+# 미분류 이미지의 현재 라벨 합의 상태
+@router.get("/consensus/{image_uuid}")
+async def get_consensus(image_uuid: str):
+    label, confidence, votes = consensus.confidence(image_uuid)
+    return {"uuid": image_uuid, "label": label, "confidence": confidence, "votes": votes,
+            "min_votes": consensus.min_votes, "min_confidence": consensus.min_confidence}
+
+
+@router.put("/images/{image_uuid}/label")
+async def set_label(image_uuid: str, payload: LabelIn, db: AsyncSession = Depends(database.get_db)):
+    try:
+        u = uuid.UUID(image_uuid)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid uuid")
+    result = await db.execute(select(models.ImagePath).filter(models.ImagePath.uuid == u).limit(1))
+    image = result.scalars().first()
+    if image is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    image.label = payload.label
+    await db.commit()
+    # 이 프로세스는 바로 반영하고, 다른 워커는 스탬프 파일을 보고 다시 로드
+    pool.relabel(u, payload.label)
+    catalog.invalidate()
+    catalog_module.touch_stamp()
+    return {"uuid": image_uuid, "label": payload.label}
+
+
+@router.post("/catalog/refresh")
+async def refresh_catalog():
+    # 인덱스 파일을 다시 만들고, 다른 워커는 스탬프가 바뀐 것을 보고 새 파일을 엶
+    def _reload():
+        catalog_module.touch_stamp()
+        with database.SessionLocal() as db:
+            return pool.load(db, catalog_module.read_stamp(), rebuild=True)
+
+    loaded = await asyncio.to_thread(_reload)
+    catalog.invalidate()
+    return {"images": loaded, "categories": catalog.counts()}
+
+
+def _require_export(table: Optional[str] = None):
+    if export.pa is None:
+        raise HTTPException(status_code=501, detail="pyarrow is not installed")
+    if table is not None and table not in export.TABLES:
+        raise HTTPException(status_code=404, detail="Unknown table")
+
+
+# 시간대가 붙어 오면 DB와 같은 시간대 없는 UTC로 맞춤
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# 테이블 하나를 Arrow IPC 스트림으로 바로 내려받기 (배치마다 응답에 이어 씀, 서버 메모리는 배치 하나 분량)
+# since/since_id: 이 (timestamp, id) 다음 행부터 (내보내기 워터마크를 그대로 넘기면 이어받기)
+@router.get("/export/{table}")
+async def stream_export(table: str, since: Optional[datetime] = None, since_id: int = 0,
+                        until: Optional[datetime] = None):
+    _require_export(table)
+    after = (_utc(since), since_id) if since is not None else None
+
+    def _chunks():
+        with database.SessionLocal() as db:
+            yield from export.stream_ipc(db, table, after, _utc(until))
+
+    return StreamingResponse(_chunks(), media_type="application/vnd.apache.arrow.stream",
+                             headers={"Content-Disposition": f'attachment; filename="{table}.arrows"'})
+
+
+# 서버의 RWCAPTCHA_EXPORT_DIR 로 증분 내보내기 (export.py CLI와 같은 동작, 한 번에 하나만)
+@router.post("/export")
+async def run_export(tables: List[str] = Query(default=[]), format: str = "parquet"):
+    _require_export()
+    for table in tables:
+        _require_export(table)
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail="Unknown format")
+    if _export_lock.locked():
+        raise HTTPException(status_code=409, detail="Export already running")
+
+    def _run():
+        with database.SessionLocal() as db:
+            return export.export_all(db, tables or None, fmt=format)
+
+    async with _export_lock:
+        return {"tables": await asyncio.to_thread(_run)}
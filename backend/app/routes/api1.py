@@ -1,102 +1,129 @@
 # api.py
 import random
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Dict
+import uuid
+from fastapi import APIRouter, HTTPException, Request
 
-from .. import crud, database, models
+from .. import admission, botscore, challenge, crud_async as crud, grading, metrics, ratelimit
+from ..catalog import catalog
+from ..challenge_pool import challenges
+from ..image_pool import pool
 from ..schemas import schemas_first as schemas
+from ..sprite import available as sprite_available, layout, sprite_size, TILE_SIZE
+from .images import image_url, sprite_url
 
 router = APIRouter(prefix="/first")
 
-
-# DB 세션 의존성 주입
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+GRID_COLUMNS = 3
 
 
-# 새 엔드포인트: 특정 질문 카테고리와 함께 이미지를 반환
-@router.get("/question", response_model=schemas.QuestionInfo)
-async def get_question(db: Session = Depends(get_db)):
-    # 데이터베이스에서 모든 고유한 분류된 카테고리 가져오기
-    db_categories = db.query(models.ImagePath.label) \
-        .filter(models.ImagePath.label != "unclassified") \
-        .distinct().all()
-    all_classified_categories = [cat[0] for cat in db_categories]
+# 문제 하나를 만들어 (응답 모델, 채점 데이터) 반환, challenge_pool 백그라운드 태스크에서 호출
+# sprite=True 이면 칸별 이미지 주소 대신 그리드 전체를 합성한 스프라이트 주소와 칸 좌표를 넣음
+# unclassified: 미분류 이미지 칸 수 (DB가 느릴 때는 0, admission.py)
+def build_question(sprite: bool = False, unclassified: int = 3):
+    # 캐시된 카탈로그에서 모든 분류된 카테고리 가져오기
+    all_classified_categories = catalog.categories()
 
     if not all_classified_categories:
         raise HTTPException(status_code=500, detail="No classified categories found in database for questions.")
 
     target_category = random.choice(all_classified_categories)
 
-    unclassified_images = crud.get_unclassified_random_images(db=db, num=3)
+    unclassified_images = pool.sample_unclassified(unclassified) if unclassified else []
 
-    if len(unclassified_images) < 3:
-        print(f"경고: 데이터베이스에 미분류 이미지가 {len(unclassified_images)}개 밖에 없습니다. 3개를 채우지 못했습니다.")
+    if len(unclassified_images) < unclassified:
+        print(f"경고: 데이터베이스에 미분류 이미지가 {len(unclassified_images)}개 밖에 없습니다. {unclassified}개를 채우지 못했습니다.")
+        metrics.QUESTION_SHORTFALL.labels("first").inc()
 
     num_classified_to_fetch = 9 - len(unclassified_images)
-    classified_images = crud.get_classified_random_images(db=db, num=num_classified_to_fetch,
-                                                          exclude_categories=["unclassified"])
+    classified_images = pool.sample_classified(num_classified_to_fetch)
 
     all_selected_images = unclassified_images + classified_images
     random.shuffle(all_selected_images)
 
-    images_for_frontend = [
-        schemas.ImageInfo(url=img.path, index=i, uuid=str(img.uuid))
-        for i, img in enumerate(all_selected_images)
-    ]
-
-    return schemas.QuestionInfo(
+    if sprite and sprite_available():
+        width, height = sprite_size(len(all_selected_images), GRID_COLUMNS)
+        sprite_info = schemas.SpriteInfo(url=sprite_url(all_selected_images, GRID_COLUMNS), width=width, height=height)
+        images_for_frontend = [
+            schemas.ImageInfo(index=i, x=x, y=y, width=TILE_SIZE, height=TILE_SIZE)
+            for i, (x, y) in enumerate(layout(len(all_selected_images), GRID_COLUMNS))
+        ]
+    else:
+        sprite_info = None
+        images_for_frontend = [
+            schemas.ImageInfo(url=image_url(img, "tile"), index=i)
+            for i, img in enumerate(all_selected_images)
+        ]
+
+    # 채점용 데이터: 정답 인덱스, 칸별 이미지 id(통계용), 미분류 이미지 위치/uuid (토큰 안에 암호화되어 클라이언트는 볼 수 없음)
+    data = {
+        "c": target_category,
+        "i": [img.id for img in all_selected_images],
+        "a": [i for i, img in enumerate(all_selected_images) if img.label == target_category],
+        "u": [[i, str(img.uuid)] for i, img in enumerate(all_selected_images) if img.label == "unclassified"],
+    }
+
+    question = schemas.QuestionInfo(
         category=target_category,
-        images=images_for_frontend
+        images=images_for_frontend,
+        token="",
+        sprite=sprite_info
     )
+    return question, data
 
 
-@router.post("/submit", response_model=schemas.ResultOut)
-async def submit_selection(payload: schemas.ResultIn, db: Session = Depends(get_db)):
-    selected_indices_set = set(payload.selected)
-    category_asked = payload.category_asked
-    images_uuids_from_payload = [i.uuid for i in payload.images]
+challenges.register("first", build_question)
+challenges.register("first/sprite", lambda: build_question(sprite=True))
+challenges.register("first/classified", lambda: build_question(unclassified=0))
+challenges.register("first/sprite/classified", lambda: build_question(sprite=True, unclassified=0))
 
-    # payload에 있는 모든 이미지의 DB 데이터를 한 번에 가져옵니다.
-    image_data_from_db = crud.get_image_data(db=db, image_uuids=images_uuids_from_payload)
 
-    # UUID를 키로, DB 이미지 객체를 값으로 하는 맵을 만들어 효율적인 조회를 가능하게 합니다.
-    db_image_map = {str(img.uuid): img for img in image_data_from_db}
+# 새 엔드포인트: 특정 질문 카테고리와 함께 이미지를 반환
+# sprite=true 이면 이미지 요청을 한 번으로 줄이는 스프라이트 모드
+@router.get("/question", response_model=schemas.QuestionInfo, response_model_exclude_none=True)
+async def get_question(sprite: bool = False):
+    # 미리 만들어 둔 문제를 꺼내고 토큰만 새로 발급 (만료 시간은 꺼낸 시점부터)
+    question, data = challenges.take(admission.controller.question_key("first/sprite" if sprite else "first"))
+    return question.model_copy(update={"token": challenge.issue("first", data)})
+
 
-    correct_indices_for_category = set()
-    for i, img_info_from_payload in enumerate(payload.images):
-        db_img = db_image_map.get(img_info_from_payload.uuid)
-        if db_img and db_img.label == category_asked:
-            correct_indices_for_category.add(i)
+@router.post("/submit", response_model=schemas.ResultOut)
+async def submit_selection(payload: schemas.ResultIn, request: Request):
+    try:
+        challenge_id, data, issued_at = await challenge.redeem(payload.token, "first")
+    except challenge.ChallengeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    user_selected_classified_indices = set()
-    for selected_idx in selected_indices_set:
-        if 0 <= selected_idx < len(payload.images):
-            img_info_from_payload = payload.images[selected_idx]
-            db_img = db_image_map.get(img_info_from_payload.uuid)
-            if db_img and db_img.label == category_asked:  # 선택된 이미지 중 질문 카테고리와 일치하는 것만
-                user_selected_classified_indices.add(selected_idx)
+    category_asked = data["c"]
+    correct_indices_for_category = set(data["a"])
+    unclassified_uuids = {i: u for i, u in data["u"]}
+    selected_indices_set = set(payload.selected)
 
-    is_correct = (user_selected_classified_indices == correct_indices_for_category)
+    # 질문 카테고리에 해당하는 칸을 모두 골랐는지
+    is_correct = grading.first.grade(correct_indices_for_category, selected_indices_set)
+    metrics.SUBMISSIONS.labels("first", category_asked, "pass" if is_correct else "fail").inc()
+    score = botscore.score("first", ratelimit.client_address(request.scope), issued_at, is_correct, payload.selected)
 
     # 메인 캡챠가 정답인 경우에만 결과 및 미분류 이미지 피드백을 저장
     if is_correct:
-        #crud.save_result(db, [img.id for img in image_data_from_db], is_correct, category_asked)  # 메인 캡챠 결과 저장 // 이미지의 데이터베이스상의 id가 저장되도록 수정
+        await challenge.close(challenge_id)
+        # 봇으로 보이는 제출은 이미지 통계와 미분류 피드백에 반영하지 않음 (botscore.py)
+        if not botscore.trusted(score):
+            metrics.FEEDBACK_EXCLUDED.labels("first").inc()
+            return schemas.ResultOut(is_correct=is_correct)
+        # 이미지별 통계: 통과한 제출에서도 질문 카테고리가 아닌데 고른 이미지는 그 카테고리와 헷갈린 것
+        pool.record(
+            (image_id, (i in selected_indices_set) == (i in correct_indices_for_category),
+             category_asked if i in selected_indices_set else None)
+            for i, image_id in enumerate(data.get("i", ())) if i not in unclassified_uuids
+        )
+        #await crud.queue_result([img.id for img in image_data_from_db], is_correct, category_asked)  # 메인 캡챠 결과 저장 // 이미지의 데이터베이스상의 id가 저장되도록 수정
 
         # 사용자가 선택한 이미지들 중 'unclassified' 이미지가 있다면 피드백 저장
         for selected_idx in selected_indices_set:
-            if 0 <= selected_idx < len(payload.images):
-                img_info_from_payload = payload.images[selected_idx]
-                db_img = db_image_map.get(img_info_from_payload.uuid)
-
-                if db_img and db_img.label == "unclassified":
-                    # 이 미분류 이미지가 사용자에 의해 'category_asked' 카테고리와 함께 선택되었다고 기록
-                    crud.save_unclassified_feedback(db, db_img.uuid, category_asked)
+            if selected_idx in unclassified_uuids:
+                # 이 미분류 이미지가 사용자에 의해 'category_asked' 카테고리와 함께 선택되었다고 기록
+                await crud.queue_unclassified_feedback(uuid.UUID(unclassified_uuids[selected_idx]), category_asked)
+                metrics.FEEDBACK.labels("first").inc()
     # 오답인 경우 아무것도 저장하지 않음 (이전 요구사항 유지)
 
-    return schemas.ResultOut(is_correct=is_correct)
\ No newline at end of file
+    return schemas.ResultOut(is_correct=is_correct)
@@ -1,61 +1,94 @@
 import random
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Request
 import uuid
 
-from .. import crud, database, models
+from .. import admission, botscore, challenge, crud_async as crud, grading, metrics, ratelimit
+from ..challenge_pool import challenges
+from ..image_pool import pool
 from ..schemas import schemas_second as schemas
+from .images import image_url
 
 NUMBER_OF_IMAGES = 5
 
 router = APIRouter(prefix="/second")
+grader = grading.SecondGrader(NUMBER_OF_IMAGES)
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-@router.get("/question", response_model=schemas.QuestionInfo)
-async def get_question(db: Session = Depends(get_db)):
-    unclassified_images = crud.get_unclassified_random_images(db=db, num=1)
+# 문제 하나를 만들어 (응답 모델, 채점 데이터) 반환, challenge_pool 백그라운드 태스크에서 호출
+# unclassified: 미분류 이미지 칸 수 (DB가 느릴 때는 0, admission.py)
+def build_question(unclassified: int = 1):
+    unclassified_images = pool.sample_unclassified(unclassified) if unclassified else []
+    if len(unclassified_images) < unclassified:
+        metrics.QUESTION_SHORTFALL.labels("second").inc()
     num_classified_to_fetch = NUMBER_OF_IMAGES - len(unclassified_images)
-    classified_images = crud.get_classified_random_images(db=db, num=num_classified_to_fetch,
-                                                          exclude_categories=["unclassified"])
+    classified_images = pool.sample_classified(num_classified_to_fetch)
 
     all_selected_images = unclassified_images + classified_images
     random.shuffle(all_selected_images)
 
     images_for_frontend = [
-        schemas.ImageInfo(url=img.path, index=i, uuid=str(img.uuid))
+        schemas.ImageInfo(url=image_url(img, "large"), index=i)
         for i, img in enumerate(all_selected_images)
     ]
 
-    return schemas.QuestionInfo(
-        images=images_for_frontend
+    # 채점용 데이터: 이미지별 정답 라벨, 이미지 id, 미분류 이미지 위치/uuid
+    unclassified_slot = next(((i, str(img.uuid)) for i, img in enumerate(all_selected_images)
+                              if img.label == "unclassified"), None)
+    data = {
+        "l": [img.label for img in all_selected_images],
+        "i": [img.id for img in all_selected_images],
+        "u": unclassified_slot,
+    }
+
+    question = schemas.QuestionInfo(
+        images=images_for_frontend,
+        token=""
     )
+    return question, data
+
+
+challenges.register("second", build_question)
+challenges.register("second/classified", lambda: build_question(unclassified=0))
+
+
+@router.get("/question", response_model=schemas.QuestionInfo)
+async def get_question():
+    question, data = challenges.take(admission.controller.question_key("second"))
+    return question.model_copy(update={"token": challenge.issue("second", data)})
     
 
 @router.post("/submit", response_model=schemas.ResultOut)
-async def submit_selection(payload: schemas.ResultIn, db: Session = Depends(get_db)):
-    correct_counts = 0
-    images_uuids_from_payload = [i.uuid for i in payload.images]
-    answers_from_payload = payload.answers
-
-    image_data_from_db = [crud.get_image_path(db=db, u=i) for i in images_uuids_from_payload]
+async def submit_selection(payload: schemas.ResultIn, request: Request):
+    try:
+        challenge_id, data, issued_at = await challenge.redeem(payload.token, "second")
+    except challenge.ChallengeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(payload.answers) != len(data["l"]):
+        raise HTTPException(status_code=400, detail="Answer count does not match the challenge")
 
-    db_category_list = [str(img.label) for img in image_data_from_db]
+    answers_from_payload = payload.answers
+    db_category_list = data["l"]
+    unclassified_slot = data["u"]
 
-    for i in range(NUMBER_OF_IMAGES):
-        if db_category_list[i] == 'unclassified':
-            unclassified_uuid = uuid.UUID(images_uuids_from_payload[i])
-            unclassified_category = answers_from_payload[i]
-        else:
-            if(db_category_list[i] == answers_from_payload[i]): correct_counts += 1
-    is_correct = correct_counts >= NUMBER_OF_IMAGES-1
+    # 미분류 칸을 빼고 NUMBER_OF_IMAGES-1 개 이상 맞혔는지
+    is_correct = grader.grade(db_category_list, answers_from_payload)
+    metrics.SUBMISSIONS.labels("second", "mixed", "pass" if is_correct else "fail").inc()
+    score = botscore.score("second", ratelimit.client_address(request.scope), issued_at, is_correct)
     # 메인 캡챠가 정답인 경우에만 결과 및 미분류 이미지 피드백을 저장
     if is_correct:
-        crud.save_result_second(db, is_correct, [img.id for img in image_data_from_db], answers_from_payload)  # 메인 캡챠 결과 저장
-        crud.save_unclassified_feedback(db, unclassified_uuid, unclassified_category)
+        await challenge.close(challenge_id)
+        await crud.queue_result_second(is_correct, data["i"], answers_from_payload)  # 메인 캡챠 결과 저장
+        # 봇으로 보이는 제출은 이미지 통계와 미분류 피드백에 반영하지 않음 (botscore.py)
+        if not botscore.trusted(score):
+            metrics.FEEDBACK_EXCLUDED.labels("second").inc()
+            return schemas.ResultOut(is_correct=is_correct)
+        # 이미지별 통계 (한 장까지 틀려도 통과하므로 틀린 이미지는 고른 라벨과 헷갈린 것)
+        pool.record(
+            (image_id, label == answer, None if label == answer else answer)
+            for image_id, label, answer in zip(data["i"], db_category_list, answers_from_payload)
+            if label != 'unclassified'
+        )
+        if unclassified_slot is not None:
+            index, unclassified_uuid = unclassified_slot
+            await crud.queue_unclassified_feedback(uuid.UUID(unclassified_uuid), answers_from_payload[index])
+            metrics.FEEDBACK.labels("second").inc()
     return schemas.ResultOut(is_correct=is_correct)
\ No newline at end of file
@@ -1,82 +1,117 @@
 # api.py
 import random
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Dict
+import uuid
+from fastapi import APIRouter, HTTPException, Request
 
-from .. import crud, database, models
+from .. import admission, botscore, challenge, crud_async as crud, grading, metrics, ratelimit
+from ..catalog import catalog
+from ..challenge_pool import challenges
+from ..image_pool import pool
 from ..schemas import schemas_third as schemas
+from ..sprite import available as sprite_available, layout, sprite_size, TILE_SIZE
+from .images import image_url, sprite_url
 
 router = APIRouter(prefix="/third")
 
-
-# DB 세션 의존성 주입
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+GRID_COLUMNS = 4
 
 
-@router.get("/question", response_model=schemas.QuestionInfo)
-async def get_question(db: Session = Depends(get_db)):
-    # 데이터베이스에서 모든 고유한 분류된 카테고리 가져오기
-    db_categories = db.query(models.ImagePath.label) \
-        .filter(models.ImagePath.label != "unclassified") \
-        .distinct().all()
-    all_classified_categories = [cat[0] for cat in db_categories]
+# 문제 하나를 만들어 (응답 모델, 채점 데이터) 반환, challenge_pool 백그라운드 태스크에서 호출
+# sprite=True 이면 칸별 이미지 주소 대신 그리드 전체를 합성한 스프라이트 주소와 칸 좌표를 넣음
+# unclassified: 미분류 이미지 칸 수 (DB가 느릴 때는 0, admission.py)
+def build_question(sprite: bool = False, unclassified: int = 1):
+    # 캐시된 카탈로그에서 모든 분류된 카테고리 가져오기
+    all_classified_categories = catalog.categories()
 
     if not all_classified_categories:
         raise HTTPException(status_code=500, detail="No classified categories found in database for questions.")
 
-    unclassified_images = crud.get_unclassified_random_images(db=db, num=1)
+    unclassified_images = pool.sample_unclassified(unclassified) if unclassified else []
+    if len(unclassified_images) < unclassified:
+        metrics.QUESTION_SHORTFALL.labels("third").inc()
 
     num_classified_to_fetch = 16 - len(unclassified_images)
-    classified_images = crud.get_classified_random_images(db=db, num=num_classified_to_fetch,
-                                                          exclude_categories=["unclassified"])
+    classified_images = pool.sample_classified(num_classified_to_fetch)
 
     all_selected_images = unclassified_images + classified_images
     random.shuffle(all_selected_images)
 
-    images_for_frontend = [
-        schemas.ImageInfo(url=img.path, index=i, uuid=str(img.uuid))
-        for i, img in enumerate(all_selected_images)
-    ]
-
-    return schemas.QuestionInfo(
-        images=images_for_frontend
+    if sprite and sprite_available():
+        width, height = sprite_size(len(all_selected_images), GRID_COLUMNS)
+        sprite_info = schemas.SpriteInfo(url=sprite_url(all_selected_images, GRID_COLUMNS), width=width, height=height)
+        images_for_frontend = [
+            schemas.ImageInfo(index=i, x=x, y=y, width=TILE_SIZE, height=TILE_SIZE)
+            for i, (x, y) in enumerate(layout(len(all_selected_images), GRID_COLUMNS))
+        ]
+    else:
+        sprite_info = None
+        images_for_frontend = [
+            schemas.ImageInfo(url=image_url(img, "tile"), index=i)
+            for i, img in enumerate(all_selected_images)
+        ]
+
+    # 채점용 데이터: 카테고리별 정답 개수, 분류된 이미지 id(통계용), 미분류 이미지 uuid
+    correct_category_count = {}
+    for img in all_selected_images:
+        if img.label != 'unclassified':
+            correct_category_count[img.label] = correct_category_count.get(img.label, 0) + 1
+    data = {
+        "n": correct_category_count,
+        "i": [img.id for img in all_selected_images if img.label != 'unclassified'],
+        "u": [str(img.uuid) for img in all_selected_images if img.label == "unclassified"],
+    }
+
+    question = schemas.QuestionInfo(
+        images=images_for_frontend,
+        token="",
+        sprite=sprite_info
     )
+    return question, data
+
+
+challenges.register("third", build_question)
+challenges.register("third/sprite", lambda: build_question(sprite=True))
+challenges.register("third/classified", lambda: build_question(unclassified=0))
+challenges.register("third/sprite/classified", lambda: build_question(sprite=True, unclassified=0))
+
+
+# sprite=true 이면 이미지 요청을 한 번으로 줄이는 스프라이트 모드
+@router.get("/question", response_model=schemas.QuestionInfo, response_model_exclude_none=True)
+async def get_question(sprite: bool = False):
+    question, data = challenges.take(admission.controller.question_key("third/sprite" if sprite else "third"))
+    return question.model_copy(update={"token": challenge.issue("third", data)})
 
 
 @router.post("/submit", response_model=schemas.ResultOut)
-async def submit(payload: schemas.ResultIn, db: Session = Depends(get_db)):
-    db_categories = [i[0] for i in db.query(models.ImagePath.label) \
-    .filter(models.ImagePath.label != "unclassified") \
-    .distinct().all()]
-    images_uuids_from_payload = [i.uuid for i in payload.images]
-
-    # payload에 있는 모든 이미지의 DB 데이터를 한 번에 가져옵니다.
-    image_data_from_db = crud.get_image_data(db=db, image_uuids=images_uuids_from_payload)
-    correct_category_count = {i:0 for i in db_categories}
-    for i in image_data_from_db:
-        if i.label != 'unclassified': correct_category_count[i.label] += 1
-    
-    # 분류 안 된 이미지는 1개뿐 => 1개 더 많은 카테고리로 라벨링
-    error_count = 0
-    unclassified_category = ''
-    for i in payload.answers:
-        error_count += abs(correct_category_count[i.category] - i.amount) 
-        if correct_category_count[i.category] +1 == i.amount:
-            unclassified_category = i.category
+async def submit(payload: schemas.ResultIn, request: Request):
+    try:
+        challenge_id, data, issued_at = await challenge.redeem(payload.token, "third")
+    except challenge.ChallengeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    is_correct = error_count <= 1
+    correct_category_count = data["n"]
+
+    # 분류 안 된 이미지는 1개뿐 => 1개 더 많은 카테고리로 라벨링
+    grade = grading.third.grade(correct_category_count, ((i.category, i.amount) for i in payload.answers))
+    is_correct = grade.is_correct
+    metrics.SUBMISSIONS.labels("third", "mixed", "pass" if is_correct else "fail").inc()
+    unclassified_category = grade.unclassified_category
+    score = botscore.score("third", ratelimit.client_address(request.scope), issued_at, is_correct)
 
     # 메인 캡챠가 정답인 경우에만 결과 및 미분류 이미지 피드백을 저장
     if is_correct:
-        # 사용자가 선택한 이미지들 중 'unclassified' 이미지가 있다면 피드백 저장
-        for index, img in enumerate(payload.images):
-            if image_data_from_db[index].label == "unclassified":
-                # 이 미분류 이미지가 사용자에 의해 'category_asked' 카테고리와 함께 선택되었다고 기록
-                crud.save_unclassified_feedback(db, image_data_from_db[index].uuid, unclassified_category)
+        await challenge.close(challenge_id)
+        # 봇으로 보이는 제출은 이미지 통계와 미분류 피드백에 반영하지 않음 (botscore.py)
+        if not botscore.trusted(score):
+            metrics.FEEDBACK_EXCLUDED.labels("third").inc()
+            return schemas.ResultOut(is_correct=is_correct)
+        # 개수만 답하므로 어느 이미지를 틀렸는지는 알 수 없음
+        # 미분류 이미지 몫(+1)을 빼고 모든 카테고리 개수가 맞았을 때만 분류된 이미지 전부를 맞힌 것으로 기록
+        if grade.exact:
+            pool.record((image_id, True, None) for image_id in data.get("i", ()))
+        if unclassified_category:
+            for unclassified_uuid in data["u"]:
+                # 이 미분류 이미지가 사용자에 의해 'unclassified_category' 카테고리로 분류되었다고 기록
+                await crud.queue_unclassified_feedback(uuid.UUID(unclassified_uuid), unclassified_category)
+                metrics.FEEDBACK.labels("third").inc()
     return schemas.ResultOut(is_correct=is_correct)
\ No newline at end of file
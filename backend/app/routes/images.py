@@ -0,0 +1,159 @@
+# images.py
+# 문제 이미지 전송 라우트: GET /img/{image_id}
+# image_id는 문제마다 새로 만드는 암호화된 id (challenge.seal_image)라서 주소에 이미지 uuid가 드러나지 않음
+#  - ETag도 image_id 기준으로 만들고 Last-Modified는 보내지 않음 (파일 정보로 같은 이미지임을 알 수 없도록)
+#  - 주소가 문제마다 다르고 그 동안 내용이 바뀌지 않으므로 private + immutable 로 캐시
+#  - If-None-Match(304), Range(206) 지원
+#  - 캐시하지 않는 큰 파일(원본 등)과 Range 요청은 FileResponse로 스트리밍
+#  - 자주 나오는 작은 타일은 LRU 바이트 캐시에서 바로 응답 (RWCAPTCHA_IMAGE_CACHE_MB, 0이면 사용 안 함)
+# GET /img/sprite/{sprite_id}: 그리드 전체를 합성한 스프라이트 (sprite.py)
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+from .. import challenge, sprite
+from ..image_pool import PooledImage, pool
+from ..ingest import STORAGE_ROOT, URL_PREFIX
+
+CACHE_MAX_BYTES = int(float(os.environ.get("RWCAPTCHA_IMAGE_CACHE_MB", "64")) * 1024 * 1024)
+CACHE_MAX_FILE = 256 * 1024  # 이보다 큰 파일(원본 등)은 캐시하지 않음
+
+router = APIRouter(prefix=URL_PREFIX)
+
+
+# 문제 응답에 넣을 이미지 주소 (변형이 없으면 원본)
+def image_url(img: PooledImage, variant: str = "tile") -> str:
+    if variant and getattr(img, variant) is None:
+        variant = ""
+    return f"{URL_PREFIX}/{challenge.seal_image(img.uuid, variant)}"
+
+
+# 스프라이트 모드 문제에 넣을 스프라이트 주소
+def sprite_url(images: List[PooledImage], columns: int) -> str:
+    return f"{URL_PREFIX}/sprite/{challenge.seal_sprite([img.uuid for img in images], columns)}"
+
+
+def _file_path(path: str) -> str:
+    return os.path.join(STORAGE_ROOT, os.path.basename(path))
+
+
+def _cache_headers(media_id: str, version: str, expires_at: int) -> dict:
+    etag = '"' + hashlib.blake2b(f"{media_id}-{version}".encode(), digest_size=16).hexdigest() + '"'
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max(0, expires_at - int(time.time()))}, immutable",
+    }
+
+
+def _not_modified(request: Request, headers: dict) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    return bool(if_none_match) and (if_none_match.strip() == "*" or
+                                    headers["ETag"] in [t.strip() for t in if_none_match.split(",")])
+
+
+class ByteCache:
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Tuple[bytes, int]]" = OrderedDict()  # 파일 경로 -> (내용, mtime_ns)
+
+    def get(self, path: str, st: os.stat_result) -> Optional[bytes]:
+        with self._lock:
+            item = self._items.get(path)
+            if item is not None and item[1] == st.st_mtime_ns and len(item[0]) == st.st_size:
+                self._items.move_to_end(path)
+                self.hits += 1
+                return item[0]
+        self.misses += 1
+        return None
+
+    def put(self, path: str, data: bytes, st: os.stat_result):
+        if len(data) > CACHE_MAX_FILE or len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(path, None)
+            if old is not None:
+                self.size -= len(old[0])
+            self._items[path] = (data, st.st_mtime_ns)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, (evicted, _) = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+cache = ByteCache()
+
+
+def _resolve(image_id: str) -> Tuple[str, int]:
+    try:
+        image_uuid, variant, expires_at = challenge.open_image(image_id)
+    except challenge.ChallengeError:
+        raise HTTPException(status_code=404, detail="Image not found")
+    img = pool.get(image_uuid)
+    path = img and ((getattr(img, variant) if variant else None) or img.path)
+    if not path:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return _file_path(path), expires_at
+
+
+# 합성은 CPU 작업이므로 sync 핸들러로 두어 스레드 풀에서 실행
+@router.get("/sprite/{sprite_id}")
+def get_sprite(sprite_id: str, request: Request):
+    try:
+        image_uuids, columns, expires_at = challenge.open_sprite(sprite_id)
+    except challenge.ChallengeError:
+        raise HTTPException(status_code=404, detail="Image not found")
+    headers = _cache_headers(sprite_id, "sprite", expires_at)
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    data = sprite.cache.get(sprite_id)
+    if data is None:
+        paths = []
+        for image_uuid in image_uuids:
+            img = pool.get(image_uuid)
+            if img is None:
+                raise HTTPException(status_code=404, detail="Image not found")
+            paths.append(_file_path(img.tile or img.path))
+        try:
+            data = sprite.render(paths, columns)
+        except OSError:
+            raise HTTPException(status_code=404, detail="Image not found")
+        sprite.cache.put(sprite_id, data)
+    return Response(content=data, media_type="image/jpeg", headers=headers)
+
+
+# 스레드 풀을 거치지 않도록 async로 처리 (stat, 작은 파일 읽기는 로컬 디스크에서 충분히 빠름, 큰 파일은 FileResponse가 나눠 읽음)
+@router.get("/{image_id}")
+async def get_image(image_id: str, request: Request):
+    path, expires_at = _resolve(image_id)
+    try:
+        st = os.stat(path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    headers = _cache_headers(image_id, f"{st.st_mtime_ns}-{st.st_size}", expires_at)
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if cache.max_bytes and "range" not in request.headers and st.st_size <= CACHE_MAX_FILE:
+        data = cache.get(path, st)
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+            cache.put(path, data, st)
+        return Response(content=data, media_type=media_type, headers=headers)
+
+    response = FileResponse(path, media_type=media_type, headers=headers, stat_result=st)
+    del response.headers["last-modified"]
+    return response
@@ -0,0 +1,50 @@
+# metrics.py
+# Prometheus 수집용 GET /metrics (텍스트 형식 0.0.4)
+# RWCAPTCHA_METRICS_TOKEN 이 설정되어 있으면 Authorization: Bearer <토큰> 헤더가 있어야 응답
+import hmac
+import os
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from .. import admission, metrics, proof_of_work, ratelimit
+from ..challenge_pool import challenges
+from ..consensus import consensus
+from ..image_pool import pool
+from ..writer import writer
+
+METRICS_TOKEN = os.environ.get("RWCAPTCHA_METRICS_TOKEN", "")
+
+router = APIRouter()
+
+# 수집 시점에 읽는 값들 (요청 경로에는 비용 없음)
+metrics.GaugeFunc("rwcaptcha_image_pool_images", "Images in the in-memory pool by label (includes unclassified)",
+                  pool.label_counts, ("label",))
+metrics.GaugeFunc("rwcaptcha_consensus_pending_images", "Unclassified images with feedback awaiting consensus",
+                  lambda: len(consensus))
+metrics.GaugeFunc("rwcaptcha_consensus_promotions", "Unclassified images promoted to a label",
+                  lambda: consensus.promoted, kind="counter")
+metrics.GaugeFunc("rwcaptcha_writer_pending_rows", "Rows waiting in the write-behind queue", writer.pending)
+metrics.GaugeFunc("rwcaptcha_writer_flush_seconds", "Smoothed write-behind flush latency", lambda: writer.flush_latency)
+metrics.GaugeFunc("rwcaptcha_admission_level", "Admission control level (0 normal, 1 degraded, 2 overloaded)",
+                  lambda: admission.controller.level)
+metrics.GaugeFunc("rwcaptcha_admission_limit", "Current concurrency limit by action",
+                  lambda: {action: s.limit for action, s in admission.controller.slots.items()}, ("action",))
+metrics.GaugeFunc("rwcaptcha_challenge_buffer_depth", "Prebuilt challenges waiting per mode",
+                  lambda: {mode: s["depth"] for mode, s in challenges.stats().items()}, ("mode",))
+metrics.GaugeFunc("rwcaptcha_challenge_buffer_misses", "Challenges built inline because the buffer was empty",
+                  lambda: {mode: s["misses"] for mode, s in challenges.stats().items()}, ("mode",), kind="counter")
+metrics.GaugeFunc("rwcaptcha_rate_limited_requests", "Requests rejected by the rate limiter",
+                  lambda: ratelimit.limiter.limited, kind="counter")
+metrics.GaugeFunc("rwcaptcha_pow_difficulty", "Current proof-of-work difficulty in leading zero bits",
+                  proof_of_work.gate.difficulty)
+metrics.GaugeFunc("rwcaptcha_pow_requests", "Question requests seen by the proof-of-work gate by outcome",
+                  lambda: {"issued": proof_of_work.gate.issued, "solved": proof_of_work.gate.solved,
+                           "rejected": proof_of_work.gate.rejected}, ("outcome",), kind="counter")
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(authorization: str = Header(default="")):
+    if METRICS_TOKEN and not hmac.compare_digest(authorization, f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,147 @@
+# sampling.py
+# 가중치에 비례한 비복원 샘플링 (문제에 넣을 분류된 이미지 선택용)
+# 가중치를 LEVELS 단계로 나눠서 단계별로 원소 배열을 두고, 단계 선택에만 alias 테이블(Vose)을 사용
+#  - 한 번 뽑기: alias 테이블로 단계 선택 O(1) + 단계 배열에서 균등 선택 O(1) => 문제 하나에 O(k)
+#  - 가중치(단계)가 바뀌면 배열 사이에서 원소 하나만 옮기고(O(1)), alias 테이블은 다음 샘플링 때 단계 수만큼(O(LEVELS))만 다시 만듦
+import heapq
+import random
+from array import array
+from typing import List, Sequence
+
+import numpy as np
+
+# 모집단이 k의 이 배수보다 작으면 중복 거절이 잦으므로 전체를 한 번 훑는 방식으로 뽑음
+SMALL_POPULATION_FACTOR = 4
+
+
+# Vose alias 테이블: (확률, 대체 인덱스)
+def alias_table(weights: Sequence[float]):
+    n = len(weights)
+    total = sum(weights)
+    scaled = [w * n / total for w in weights]
+    prob, alias = [1.0] * n, list(range(n))
+    small = [i for i, s in enumerate(scaled) if s < 1.0]
+    large = [i for i, s in enumerate(scaled) if s >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return prob, alias
+
+
+class WeightedSet:
+    # 원소는 0 이상의 정수(이미지 풀의 행 번호), 원소별 단계/위치는 원소 번호를 인덱스로 쓰는 numpy 배열에 보관
+    # (원소마다 dict 항목을 만들지 않으므로 이미지가 많아도 원소당 수십 바이트 이하)
+    def __init__(self, level_weights: Sequence[float]):
+        self.level_weights = list(level_weights)
+        self._levels: List[array] = [array("q") for _ in self.level_weights]
+        self._level = np.full(0, -1, dtype=np.int8)  # 원소 -> 단계 (-1: 없음)
+        self._pos = np.zeros(0, dtype=np.int64)  # 원소 -> 단계 배열 내 위치
+        self._size = 0
+        self._table = None  # (확률, 대체 인덱스, 원소가 있는 단계 배열), 단계별 원소 수가 바뀌면 None
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, item):
+        return 0 <= item < len(self._level) and self._level[item] >= 0
+
+    # 배열 크기를 두 배씩 늘림
+    def _ensure(self, size: int):
+        if size <= len(self._level):
+            return
+        capacity = max(size, len(self._level) * 2, 1024)
+        level = np.full(capacity, -1, dtype=np.int8)
+        level[:len(self._level)] = self._level
+        pos = np.zeros(capacity, dtype=np.int64)
+        pos[:len(self._pos)] = self._pos
+        self._level, self._pos = level, pos
+
+    def add(self, item: int, level: int):
+        self._ensure(item + 1)
+        items = self._levels[level]
+        self._level[item] = level
+        self._pos[item] = len(items)
+        items.append(item)
+        self._size += 1
+        self._table = None
+
+    # 여러 원소를 한 번에 추가 (풀 전체 로드용, 원소는 아직 없는 것이어야 함)
+    def add_many(self, items: np.ndarray, levels: np.ndarray):
+        if not len(items):
+            return
+        items = np.asarray(items, dtype=np.int64)
+        levels = np.asarray(levels)
+        self._ensure(int(items.max()) + 1)
+        for level in np.unique(levels).tolist():
+            chosen = items[levels == level]
+            target = self._levels[level]
+            self._level[chosen] = level
+            self._pos[chosen] = np.arange(len(target), len(target) + len(chosen))
+            target.frombytes(chosen.tobytes())
+        self._size += len(items)
+        self._table = None
+
+    # 배열 중간 원소를 마지막 원소와 바꿔서 지움 (O(1))
+    def _take(self, item: int):
+        level, pos = int(self._level[item]), int(self._pos[item])
+        items = self._levels[level]
+        last = items.pop()
+        if pos < len(items):
+            items[pos] = last
+            self._pos[last] = pos
+        self._level[item] = -1
+        self._size -= 1
+        self._table = None
+
+    def remove(self, item: int):
+        self._take(item)
+
+    # 가중치 단계 변경, 없는 원소면 False
+    def move(self, item: int, level: int) -> bool:
+        if item not in self:
+            return False
+        if self._level[item] != level:
+            self._take(item)
+            self.add(item, level)
+        return True
+
+    def level_counts(self) -> List[int]:
+        return [len(items) for items in self._levels]
+
+    def _alias(self):
+        if self._table is None:
+            used = [level for level, items in enumerate(self._levels) if items]
+            prob, alias = alias_table([self.level_weights[level] * len(self._levels[level]) for level in used])
+            self._table = (prob, alias, [self._levels[level] for level in used])
+        return self._table
+
+    # 전체를 훑는 가중 비복원 샘플링 (Efraimidis-Spirakis, 키 = u^(1/w) 상위 k개)
+    def _sample_scan(self, num: int) -> list:
+        keyed = ((random.random() ** (1.0 / self.level_weights[level]), item)
+                 for level, items in enumerate(self._levels) for item in items)
+        return [item for _, item in heapq.nlargest(num, keyed, key=lambda kv: kv[0])]
+
+    # 이미지가 부족하면 LIMIT처럼 있는 만큼만 반환
+    def sample(self, num: int) -> list:
+        if num <= 0:
+            return []
+        if num >= self._size:
+            result = [item for items in self._levels for item in items]
+            random.shuffle(result)
+            return result
+        if self._size < num * SMALL_POPULATION_FACTOR:
+            return self._sample_scan(num)
+        prob, alias, levels = self._alias()
+        n, rand = len(levels), random.random
+        picked = {}
+        for _ in range(num * 20):  # 가중치가 몇 개에 몰려 있으면 중복이 계속 나올 수 있으므로 시도 횟수 제한
+            i = int(rand() * n)
+            if rand() >= prob[i]:
+                i = alias[i]
+            items = levels[i]
+            picked[items[int(rand() * len(items))]] = None
+            if len(picked) == num:
+                return list(picked)
+        return self._sample_scan(num)
@@ -1,19 +1,29 @@
 from pydantic import BaseModel
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Union
 
 class ImageInfo(BaseModel):
-    uuid: str
-    url: str
+    url: Optional[str] = None # 스프라이트 모드에서는 None
     index: int # 프론트엔드에서 이미지의 인덱스를 쉽게 관리하기 위해 추가
+    # 스프라이트 모드에서 이 칸이 스프라이트 안에서 차지하는 영역 (픽셀)
+    x: Optional[int] = None
+    y: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+class SpriteInfo(BaseModel):
+    url: str # 그리드 전체를 합성한 이미지 한 장
+    width: int
+    height: int
 
 class QuestionInfo(BaseModel):
     category: str # 사용자가 맞춰야 할 카테고리 (예: "cardboard")
     images: List[ImageInfo] # 현재 질문에 사용될 이미지 목록
+    token: str # 채점 정보가 담긴 서명된 챌린지 토큰, 제출 시 그대로 돌려보냄
+    sprite: Optional[SpriteInfo] = None # ?sprite=true 로 요청한 경우
 
 class ResultIn(BaseModel):
-    images: List[ImageInfo]
+    token: str # /question 에서 받은 챌린지 토큰 (카테고리와 정답은 토큰에서 복원)
     selected: List[int]
-    category_asked: str # 사용자가 어떤 카테고리에 대해 답변했는지 백엔드에 전달
 
 class ResultOut(BaseModel):
     is_correct: bool
@@ -2,15 +2,15 @@ from pydantic import BaseModel
 from typing import List, Dict, Union
 
 class ImageInfo(BaseModel):
-    uuid: str
     url: str
     index: int
 
 class QuestionInfo(BaseModel):
     images: List[ImageInfo]
+    token: str
 
 class ResultIn(BaseModel):
-    images: List[ImageInfo]
+    token: str
     answers: List[str]
 
 class ResultOut(BaseModel):
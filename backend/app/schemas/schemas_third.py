@@ -1,10 +1,19 @@
 from pydantic import BaseModel
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Union
 
 class ImageInfo(BaseModel):
-    uuid: str
-    url: str
+    url: Optional[str] = None # 스프라이트 모드에서는 None
     index: int
+    # 스프라이트 모드에서 이 칸이 스프라이트 안에서 차지하는 영역 (픽셀)
+    x: Optional[int] = None
+    y: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+class SpriteInfo(BaseModel):
+    url: str # 그리드 전체를 합성한 이미지 한 장
+    width: int
+    height: int
 
 class CategoryAnswer(BaseModel):
     category: str
@@ -12,9 +21,11 @@ class CategoryAnswer(BaseModel):
 
 class QuestionInfo(BaseModel):
     images: List[ImageInfo]
+    token: str
+    sprite: Optional[SpriteInfo] = None # ?sprite=true 로 요청한 경우
     
 class ResultIn(BaseModel):
-    images: List[ImageInfo]
+    token: str
     answers: List[CategoryAnswer]
 
 class ResultOut(BaseModel):
@@ -0,0 +1,172 @@
+# state.py
+# 여러 워커 프로세스가 같이 봐야 하는 챌린지 상태(토큰별 남은 제출 횟수) 저장소
+# 토큰 자체는 서명/암호화되어 있어서 어느 워커든 검증할 수 있지만, 재사용 방지 기록은 워커끼리 공유해야
+# 한 워커에서 다 쓴 토큰을 다른 워커에 다시 제출하는 것을 막을 수 있음
+#
+# RWCAPTCHA_STATE_URL로 구현 선택 (모두 attempt/close 두 메서드만 구현)
+# 요청 처리 중에는 아래 async attempt/close로 호출: SQLite/Redis 저장소(blocking)는 쓰기 잠금이나 네트워크를
+# 기다리는 동안 이벤트 루프가 멈추지 않도록 스레드에서 실행, 메모리 저장소는 그대로 호출
+#  - memory:               프로세스 메모리 (기준 구현, 워커 하나일 때 기본값)
+#  - sqlite:///경로         같은 서버의 워커들이 공유하는 SQLite 파일 (WAL), 워커가 여럿일 때 기본값
+#  - redis://호스트:포트/번호  여러 서버가 공유 (redis 패키지 필요)
+#
+# 워커 수는 uvicorn/gunicorn과 같이 WEB_CONCURRENCY로 지정
+#   WEB_CONCURRENCY=4 RWCAPTCHA_SECRET=... uvicorn app.main:app --host 0.0.0.0
+# 워커가 여럿이면 모든 워커가 같은 토큰 키를 써야 하므로 RWCAPTCHA_SECRET이 필수 (challenge.py)
+import asyncio
+import heapq
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # Redis 저장소를 쓸 때만 필요
+    redis = None
+
+WORKERS = int(os.environ.get("WEB_CONCURRENCY", "1"))
+MULTI_WORKER = WORKERS > 1
+STATE_URL = os.environ.get("RWCAPTCHA_STATE_URL") or \
+    ("sqlite:///./challenge_state.db" if MULTI_WORKER else "memory")
+
+# 만료된 기록을 지우는 주기 (초, SQLite)
+PURGE_SECONDS = 30
+
+
+# 기준 구현: 챌린지 id -> [만료 시각, 남은 제출 횟수]
+# 챌린지(300초)와 작업 증명 1회용 기록(proof_of_work.py, 60초)의 TTL이 달라서 삽입 순서 != 만료 순서
+# -> (만료 시각, id) 힙에서 만료 시각이 지난 항목부터 꺼내서 지움
+class MemoryChallengeStore:
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "dict[bytes, list]" = {}
+        self._expiry: list = []  # (만료 시각, 챌린지 id) 힙
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _purge(self, now: float):
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+
+    # 제출 횟수를 하나 차감, 남은 횟수가 없으면 False
+    def attempt(self, challenge_id: bytes, expires_at: float, max_attempts: int) -> bool:
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            entry = self._entries.get(challenge_id)
+            if entry is None:
+                entry = self._entries[challenge_id] = [expires_at, max_attempts]
+                heapq.heappush(self._expiry, (expires_at, challenge_id))
+            if entry[1] <= 0:
+                return False
+            entry[1] -= 1
+            return True
+
+    def close(self, challenge_id: bytes):
+        with self._lock:
+            entry = self._entries.get(challenge_id)
+            if entry is not None:
+                entry[1] = 0
+
+
+# 같은 서버의 워커들이 공유하는 SQLite 파일, 문장 하나하나가 원자적이라 워커끼리 잠금 없이 사용
+# synchronous=NORMAL + WAL: 커밋마다 fsync하지 않음 (정전 시 마지막 몇 건의 기록을 잃는 정도)
+class SqliteChallengeStore:
+    blocking = True  # 다른 워커가 쓰는 중이면 최대 timeout(5초)까지 기다림
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._next_purge = 0.0
+        self._connect().execute("CREATE TABLE IF NOT EXISTS challenge_attempts ("
+                                "id BLOB PRIMARY KEY, expires_at REAL NOT NULL, remaining INTEGER NOT NULL"
+                                ") WITHOUT ROWID")
+
+    # 연결은 스레드마다 하나 (sqlite3 연결은 스레드 사이에 공유하지 않음)
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self):
+        return self._connect().execute("SELECT count(*) FROM challenge_attempts").fetchone()[0]
+
+    def attempt(self, challenge_id: bytes, expires_at: float, max_attempts: int) -> bool:
+        conn = self._connect()
+        now = time.time()
+        if now >= self._next_purge:
+            self._next_purge = now + PURGE_SECONDS
+            conn.execute("DELETE FROM challenge_attempts WHERE expires_at <= ?", (now,))
+        conn.execute("INSERT OR IGNORE INTO challenge_attempts VALUES (?, ?, ?)",
+                     (challenge_id, expires_at, max_attempts))
+        cursor = conn.execute("UPDATE challenge_attempts SET remaining = remaining - 1 "
+                              "WHERE id = ? AND remaining > 0", (challenge_id,))
+        return cursor.rowcount == 1
+
+    def close(self, challenge_id: bytes):
+        self._connect().execute("UPDATE challenge_attempts SET remaining = 0 WHERE id = ?", (challenge_id,))
+
+
+# 여러 서버가 공유하는 Redis, 키는 만료 시각에 자동으로 지워짐
+# SET NX(처음 제출일 때만 횟수 기록) + DECR을 한 트랜잭션으로 보내서 왕복 한 번
+class RedisChallengeStore:
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "rwcaptcha:challenge:"):
+        if redis is None:
+            raise RuntimeError("RWCAPTCHA_STATE_URL에 Redis를 쓰려면 redis 패키지를 설치해야 합니다.")
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def __len__(self):
+        return 0  # 키 수는 Redis가 관리
+
+    def attempt(self, challenge_id: bytes, expires_at: float, max_attempts: int) -> bool:
+        key = self.prefix + challenge_id.hex()
+        pipe = self._client.pipeline()
+        pipe.set(key, max_attempts, nx=True, exat=int(expires_at) + 1)
+        pipe.decr(key)
+        _, remaining = pipe.execute()
+        return remaining >= 0
+
+    def close(self, challenge_id: bytes):
+        self._client.set(self.prefix + challenge_id.hex(), 0, keepttl=True, xx=True)
+
+
+def make_store(url: str = STATE_URL):
+    if url == "memory":
+        if MULTI_WORKER:
+            print("경고: 워커가 여럿인데 챌린지 상태를 워커 메모리에 저장합니다. 다른 워커에서 토큰을 다시 제출할 수 있습니다.")
+        return MemoryChallengeStore()
+    if url.startswith("sqlite:///"):
+        return SqliteChallengeStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisChallengeStore(url)
+    raise ValueError(f"지원하지 않는 RWCAPTCHA_STATE_URL: {url}")
+
+
+store = make_store()
+
+
+async def attempt(challenge_id: bytes, expires_at: float, max_attempts: int) -> bool:
+    if store.blocking:
+        return await asyncio.to_thread(store.attempt, challenge_id, expires_at, max_attempts)
+    return store.attempt(challenge_id, expires_at, max_attempts)
+
+
+async def close(challenge_id: bytes):
+    if store.blocking:
+        await asyncio.to_thread(store.close, challenge_id)
+    else:
+        store.close(challenge_id)
@@ -0,0 +1,177 @@
+# writer.py
+# 결과(Result, ResultSecond)와 미분류 피드백(UnclassifiedFeedback)을 모아서 한 번에 저장하는 write-behind 큐
+# 행마다 add + commit + refresh 하면 SQLite에서는 저장할 때마다 fsync가 일어나므로,
+# 요청 핸들러는 큐에 넣기만 하고 백그라운드 태스크가 개수(MAX_BATCH) 또는 시간(FLUSH_INTERVAL) 기준으로 bulk insert
+# deferring 이 켜져 있으면(admission.py, DB가 느릴 때) 큐가 가득 차도 기다리지 않고 미뤄 두는 버퍼(MAX_DEFERRED)에 담음
+# flush 지연 시간(EWMA)과 진행 중인 flush 시간은 admission.py 가 DB 상태를 판단하는 데 씀
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import List, Tuple
+
+from sqlalchemy import insert
+
+from . import metrics
+from .database import AsyncSessionLocal
+
+MAX_BATCH = 500          # 한 번에 저장할 최대 행 수
+FLUSH_INTERVAL = 1.0     # 첫 행이 들어온 뒤 최대 대기 시간 (초)
+MAX_PENDING = 10000      # 큐 최대 크기, 가득 차면 enqueue가 대기 (backpressure)
+MAX_DEFERRED = 30000     # 큐가 가득 찼을 때 기다리지 않고 미뤄 둘 수 있는 최대 행 수, 넘으면 버림
+MAX_RETRIES = 3
+LATENCY_SMOOTHING = 0.3
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    def __init__(self, session_factory, max_batch: int = MAX_BATCH, flush_interval: float = FLUSH_INTERVAL,
+                 max_pending: int = MAX_PENDING, max_deferred: int = MAX_DEFERRED):
+        self._session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_deferred = max_deferred
+        self._queue: asyncio.Queue = None
+        self._task: asyncio.Task = None
+        self._deferred: deque = deque()
+        self.deferring = False
+        self.flush_latency = 0.0     # flush 한 번에 걸린 시간 (초, EWMA)
+        self._flush_started = None   # 진행 중인 flush 시작 시각
+        self.written = 0
+        self.dropped = 0
+        self.deferred = 0
+
+    # 큐와 미뤄 둔 버퍼에 남은 행 수
+    def pending(self) -> int:
+        return (self._queue.qsize() if self._queue else 0) + len(self._deferred)
+
+    # 큐가 찬 비율 / 미뤄 둔 버퍼가 찬 비율 (0~1)
+    def queue_fill(self) -> float:
+        return self._queue.qsize() / self.max_pending if self._queue else 0.0
+
+    def deferred_fill(self) -> float:
+        return len(self._deferred) / self.max_deferred if self.max_deferred else 0.0
+
+    # 현재 DB 쓰기 지연 (초): 진행 중인 flush가 평소보다 오래 걸리고 있으면 그 시간
+    # 저장할 행이 없으면 요청이 DB를 기다릴 일이 없으므로 0
+    def latency(self) -> float:
+        if self._flush_started is not None:
+            return max(self.flush_latency, time.monotonic() - self._flush_started)
+        return self.flush_latency if self.pending() else 0.0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run())
+
+    # 남은 행을 모두 저장한 뒤 종료 (lifespan 종료 시 호출)
+    async def stop(self):
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    # 큐가 가득 차 있으면 빈 자리가 날 때까지 대기
+    async def enqueue(self, model, values: dict):
+        if self._queue is None:
+            # 서버 lifespan 밖(스크립트 등)에서는 바로 저장
+            await self._flush([(model, values)])
+            return
+        if self.deferring:
+            self.defer(model, values)
+            return
+        await self._queue.put((model, values))
+
+    # 기다리지 않고 넣기: 큐가 가득 차 있으면 미뤄 두고, 미뤄 둔 버퍼도 가득 차면 버림
+    def defer(self, model, values: dict):
+        if not self._deferred:
+            try:
+                self._queue.put_nowait((model, values))
+                return
+            except asyncio.QueueFull:
+                pass
+        if len(self._deferred) >= self.max_deferred:
+            self.dropped += 1
+            metrics.WRITER_ROWS.labels(model.__tablename__, "dropped").inc()
+            return
+        self._deferred.append((model, values))
+        self.deferred += 1
+
+    # 미뤄 둔 행을 큐의 빈 자리로 옮김
+    def _move_deferred(self):
+        while self._deferred and not self._queue.full():
+            self._queue.put_nowait(self._deferred.popleft())
+
+    # (모은 행, 종료 여부) 반환
+    async def _collect(self) -> Tuple[List[Tuple], bool]:
+        rows = []
+        deadline = None
+        self._move_deferred()
+        while len(rows) < self.max_batch:
+            if deadline is None:
+                item = await self._queue.get()
+                deadline = time.monotonic() + self.flush_interval
+            else:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is _STOP:
+                return rows, True
+            rows.append(item)
+        return rows, False
+
+    async def _run(self):
+        while True:
+            rows, stopping = await self._collect()
+            if rows:
+                await self._flush(rows)
+            if stopping:
+                # 종료 신호 뒤에 남은 행(미뤄 둔 버퍼에서 옮겨진 행 포함)까지 저장
+                rest = [self._queue.get_nowait() for _ in range(self._queue.qsize())] + list(self._deferred)
+                self._deferred.clear()
+                for start in range(0, len(rest), self.max_batch):
+                    await self._flush(rest[start:start + self.max_batch])
+                return
+
+    async def _flush(self, rows: List[Tuple]):
+        self._flush_started = time.monotonic()
+        try:
+            await self._write(rows)
+        finally:
+            elapsed = time.monotonic() - self._flush_started
+            self._flush_started = None
+            self.flush_latency += LATENCY_SMOOTHING * (elapsed - self.flush_latency)
+
+    @metrics.timed("writer.flush")
+    async def _write(self, rows: List[Tuple]):
+        by_model = defaultdict(list)
+        for model, values in rows:
+            by_model[model].append(values)
+        for attempt in range(MAX_RETRIES):
+            try:
+                async with self._session_factory() as db:
+                    for model, values in by_model.items():
+                        await db.execute(insert(model), values)
+                    await db.commit()
+                self.written += len(rows)
+                for model, values in by_model.items():
+                    metrics.WRITER_ROWS.labels(model.__tablename__, "written").inc(len(values))
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"결과 저장 실패 ({attempt + 1}/{MAX_RETRIES}): {e}")
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        self.dropped += len(rows)
+        for model, values in by_model.items():
+            metrics.WRITER_ROWS.labels(model.__tablename__, "dropped").inc(len(values))
+        print(f"경고: 결과 {len(rows)}건을 저장하지 못하고 버렸습니다.")
+
+
+writer = WriteBehindQueue(AsyncSessionLocal)
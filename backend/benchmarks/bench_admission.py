@@ -0,0 +1,217 @@
+# bench_admission.py
+# DB가 느려질 때 수락 제어(app/admission.py)가 있을 때와 없을 때의 question -> submit 지연 시간
+# 실행: backend 폴더에서 python -m benchmarks.bench_admission [--scenario slow|locked] [--clients 50] [--mode second]
+#       [--think 0.2] (클라이언트가 한 번 풀고 쉬는 시간, 0 이면 쉬지 않고 요청해서 DB가 멀쩡해도 쓰기가 밀림)
+# 같은 프로세스에서 ASGI로 호출하며 구간을 나눠 측정
+#   healthy (--healthy 초) -> bad (--bad 초 동안 DB가 느림) -> recovered (--recover 초)
+#  - slow  : 느린 DB 대역(SlowDatabase)을 쓰기 큐에 끼워서 commit 마다 --delay 초 지연
+#  - locked: 다른 연결이 BEGIN EXCLUSIVE 로 SQLite 파일을 잠근 채 유지 (busy_timeout 동안 기다리다 실패하고 재시도)
+# 쓰기 큐를 --max-pending 행으로 줄여서 몇 초 만에 가득 차게 함 (기본 MAX_PENDING 10000은 같은 현상이 늦게 나타날 뿐)
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+from benchmarks.bench_cycle import BACKEND_DIR, make_answer, parse_labels, seed_library, DEFAULT_LABELS
+
+PHASES = ("healthy", "bad", "recovered")
+
+
+class _SlowSession:
+    def __init__(self, session, db: "SlowDatabase"):
+        self._session = session
+        self._db = db
+
+    async def __aenter__(self):
+        await self._session.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        return await self._session.__aexit__(*exc)
+
+    async def execute(self, *args, **kwargs):
+        return await self._session.execute(*args, **kwargs)
+
+    async def commit(self):
+        if self._db.delay:
+            await asyncio.sleep(self._db.delay)
+        await self._session.commit()
+
+
+# 느린 DB 대역: 세션 팩토리를 감싸서 commit 전에 delay 초 기다림 (delay는 실행 중에 바꿀 수 있음)
+class SlowDatabase:
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.delay = 0.0
+
+    def __call__(self):
+        return _SlowSession(self.session_factory(), self)
+
+
+# 다른 프로세스가 쓰기 트랜잭션을 오래 잡고 있는 상황: 별도 연결로 배타적 잠금을 걸어 둠
+class SqliteLock:
+    def __init__(self, path: str):
+        self.path = path
+        self._release = threading.Event()
+        self._thread = None
+
+    def _hold(self, locked: threading.Event):
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.execute("BEGIN EXCLUSIVE")
+        locked.set()
+        self._release.wait()
+        conn.execute("ROLLBACK")
+        conn.close()
+
+    def acquire(self):
+        locked = threading.Event()
+        self._release.clear()
+        self._thread = threading.Thread(target=self._hold, args=(locked,), daemon=True)
+        self._thread.start()
+        locked.wait()
+
+    def release(self):
+        self._release.set()
+        self._thread.join()
+
+
+async def client_loop(client, mode, deadline, categories, rng, phase, stats, think):
+    from app import challenge
+
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        r = await client.get(f"/{mode}/question")
+        if r.status_code == 200:
+            token = r.json()["token"]
+            _, data, _ = challenge.decode(token, mode)
+            r = await client.post(f"/{mode}/submit", json={"token": token, **make_answer(mode, data, True, categories, rng)})
+        s = stats[phase[0]]
+        if r.status_code == 503:
+            s["shed"] += 1
+            await asyncio.sleep(min(float(r.headers["retry-after"]), max(0.0, deadline - time.perf_counter())))
+            continue
+        r.raise_for_status()
+        s["cycles"].append(time.perf_counter() - start)
+        s["degraded"] += r.headers.get("x-rwcaptcha-degraded") == "1"
+        await asyncio.sleep(rng.uniform(0, 2 * think))
+
+
+async def run_arm(app, gated: bool, args, categories, database_path) -> dict:
+    from app import admission
+    from app.writer import writer
+
+    slow = SlowDatabase(writer._session_factory)
+    writer._session_factory = slow
+    lock = SqliteLock(database_path)
+    controller = admission.controller
+    target = admission.AdmissionMiddleware(app, controller) if gated else app
+    if gated:
+        await controller.start()
+    stats = {p: {"cycles": [], "shed": 0, "degraded": 0} for p in PHASES}
+    phase = [PHASES[0]]
+    written, dropped = writer.written, writer.dropped
+    rng = random.Random(0)
+    limits = httpx.Limits(max_connections=None)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=target), base_url="http://bench",
+                                     timeout=120, limits=limits) as client:
+            start = time.perf_counter()
+            deadline = start + args.healthy + args.bad + args.recover
+
+            async def timeline():
+                await asyncio.sleep(args.healthy)
+                phase[0] = "bad"
+                if args.scenario == "slow":
+                    slow.delay = args.delay
+                else:
+                    await asyncio.to_thread(lock.acquire)
+                await asyncio.sleep(args.bad)
+                phase[0] = "recovered"
+                if args.scenario == "slow":
+                    slow.delay = 0.0
+                else:
+                    await asyncio.to_thread(lock.release)
+
+            await asyncio.gather(timeline(), *(client_loop(client, args.mode, deadline, categories,
+                                                           random.Random(rng.random()), phase, stats, args.think)
+                                               for _ in range(args.clients)))
+    finally:
+        if gated:
+            await controller.stop()
+        writer._session_factory = slow.session_factory
+    # 다음 측정 전에 쓰기 큐 비우기
+    while writer.pending():
+        await asyncio.sleep(0.2)
+    return {"stats": stats, "written": writer.written - written, "dropped": writer.dropped - dropped,
+            "transitions": controller.transitions}
+
+
+def report(gated: bool, result: dict, args):
+    seconds = {"healthy": args.healthy, "bad": args.bad, "recovered": args.recover}
+    print(f"\nadmission {'on' if gated else 'off'}")
+    print(f"  {'phase':<10} {'cycles/s':>9} {'p50':>9} {'p99':>9} {'max':>9} {'shed':>6} {'degraded':>9}")
+    for p in PHASES:
+        s = result["stats"][p]
+        cycles = sorted(s["cycles"])
+        if len(cycles) > 1:
+            q = statistics.quantiles(cycles, n=100)
+            lat = f"{q[49] * 1000:>7.1f}ms {q[98] * 1000:>7.1f}ms {cycles[-1] * 1000:>7.0f}ms"
+        else:
+            lat = f"{'-':>9} {'-':>9} {'-':>9}"
+        degraded = s["degraded"] / len(cycles) if cycles else 0.0
+        print(f"  {p:<10} {len(cycles) / seconds[p]:>9.1f} {lat} {s['shed']:>6} {degraded:>9.0%}")
+    print(f"  rows written {result['written']}, dropped {result['dropped']}")
+
+
+async def bench(args, categories, database_path):
+    from app.main import app, lifespan
+    from app.writer import writer
+
+    writer.max_pending = args.max_pending
+    writer.max_deferred = args.max_pending * 3
+    print(f"{args.scenario} DB ({'commit delay %.1fs' % args.delay if args.scenario == 'slow' else 'exclusive lock'}), "
+          f"/{args.mode} question+submit over ASGI, {args.clients} clients, write queue {args.max_pending} rows")
+    async with lifespan(app):
+        for gated in (False, True):
+            report(gated, await run_arm(app, gated, args, categories, database_path), args)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", choices=("slow", "locked"), default="slow")
+    parser.add_argument("--mode", default="second", choices=("first", "second", "third"))
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--images", type=int, default=20000)
+    parser.add_argument("--delay", type=float, default=4.0)
+    parser.add_argument("--think", type=float, default=0.2)
+    parser.add_argument("--healthy", type=float, default=5)
+    parser.add_argument("--bad", type=float, default=20)
+    parser.add_argument("--recover", type=float, default=10)
+    parser.add_argument("--max-pending", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 미들웨어는 벤치마크에서 직접 감싸므로 앱 설정으로는 끔, 같은 IP로 바로 제출하므로 봇 점수 제외도 끔
+        os.environ.update(RWCAPTCHA_RATE_LIMIT="0", RWCAPTCHA_ADMISSION="0", RWCAPTCHA_BOT_SCORE_MIN="0",
+                          RWCAPTCHA_SECRET="bench-admission-secret")
+        sys.path.insert(0, BACKEND_DIR)
+        os.chdir(tmp)
+        database_path = os.path.join(tmp, "results.db")
+        database_url = f"sqlite:///{database_path}"
+        os.environ["RWCAPTCHA_DATABASE_URL"] = database_url
+        labels = parse_labels(DEFAULT_LABELS)
+        seed_library(database_url, args.images, labels)
+        categories = [label for label in labels if label != "unclassified"]
+        asyncio.run(bench(args, categories, database_path))
+
+
+if __name__ == "__main__":
+    main()
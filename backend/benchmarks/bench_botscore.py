@@ -0,0 +1,126 @@
+# bench_botscore.py
+# 봇 점수(app/botscore.py) 비용과 구분 능력
+# 실행: backend 폴더에서 python -m benchmarks.bench_botscore [--images 20000] [--submits 3000]
+#  1) score() 한 번의 비용 (클라이언트 1만 개에 나눠서 100만 번)
+#  2) 가상 시각으로 사람/봇 클라이언트를 흉내 내서 기준 미만(피드백 제외)으로 판정되는 비율
+#  3) /second/submit 지연 시간: 같은 프로세스에서 ASGI로 호출하며 점수 계산을 켠 라운드와 끈 라운드를 번갈아 측정
+import argparse
+import asyncio
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_cycle import BACKEND_DIR, make_answer, parse_labels, seed_library, DEFAULT_LABELS
+
+
+def bench_score(calls: int = 1_000_000, clients: int = 10_000):
+    from app.botscore import BotScorer
+
+    scorer = BotScorer()
+    rng = random.Random(0)
+    names = [f"10.0.{i // 256}.{i % 256}" for i in range(clients)]
+    inputs = [(rng.choice(names), rng.lognormvariate(math.log(6), 0.5), rng.random() < 0.85) for _ in range(calls)]
+    modes = ("first", "second", "third")
+    start = time.perf_counter()
+    for i, (client, elapsed, passed) in enumerate(inputs):
+        scorer.score(modes[i % 3], client, elapsed, passed)
+    per_call = (time.perf_counter() - start) / calls
+    selection = [4, 1, 7]
+    start = time.perf_counter()
+    for client, elapsed, passed in inputs[:calls // 4]:
+        scorer.score("first", client, elapsed, passed, selection)
+    with_selection = (time.perf_counter() - start) / (calls // 4)
+    print(f"score(): {per_call * 1e6:.2f} us/call, with /first selection {with_selection * 1e6:.2f} us/call, "
+          f"{len(scorer)} clients tracked")
+
+
+# (이름, 걸린 시간 생성, 제출 간격 생성, 통과 확률, 선택 순서 정렬 여부)
+PROFILES = [
+    ("human", lambda r: r.lognormvariate(math.log(6), 0.5), lambda r: r.uniform(8, 60), 0.85, False),
+    ("human, fast", lambda r: r.lognormvariate(math.log(3.5), 0.4), lambda r: r.uniform(4, 20), 0.9, False),
+    ("bot, instant", lambda r: r.uniform(0.1, 0.4), lambda r: r.uniform(0.3, 1.0), 0.99, True),
+    ("bot, fixed delay", lambda r: 4.0 * r.uniform(0.98, 1.02), lambda r: 4.5, 0.99, True),
+    ("bot, jittered", lambda r: r.uniform(2.5, 5.0), lambda r: r.uniform(3, 6), 0.97, True),
+]
+
+
+def bench_discrimination(clients: int = 200, submits: int = 30):
+    from app.botscore import BotScorer
+
+    scorer = BotScorer()
+    rng = random.Random(1)
+    # 먼저 사람 제출로 전체 분포를 채움
+    now = 0.0
+    for i in range(2000):
+        now += 0.5
+        scorer.score("first", f"warm{i % 500}", PROFILES[0][1](rng), True, [3, 0, 5], now=now)
+    print(f"\n{'profile':<18} {'flagged':>8}  (score < {scorer.min_score}, {clients} clients x {submits} submits)")
+    for p, (name, elapsed, interval, pass_rate, ordered) in enumerate(PROFILES):
+        flagged = total = 0
+        for c in range(clients):
+            t = now
+            for _ in range(submits):
+                t += interval(rng)
+                selection = [1, 4, 7] if ordered else rng.sample([1, 4, 7], 3)
+                value = scorer.score("first", f"{p}-{c}", elapsed(rng), rng.random() < pass_rate, selection, now=t)
+                flagged += not scorer.trusted(value)
+                total += 1
+        print(f"{name:<18} {flagged / total:>8.1%}")
+
+
+async def bench_submit(args):
+    from app import botscore, challenge
+    from app.main import app, lifespan
+
+    labels = parse_labels(DEFAULT_LABELS)
+    categories = [label for label in labels if label != "unclassified"]
+    rng = random.Random(2)
+    timings = {True: [], False: []}
+    async with lifespan(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for round_ in range(args.rounds):
+                enabled = round_ % 2 == 0
+                botscore.ENABLED = enabled
+                for _ in range(args.submits // args.rounds):
+                    token = (await client.get("/second/question")).json()["token"]
+                    _, data, _ = challenge.decode(token, "second")
+                    body = make_answer("second", data, rng.random() < 0.7, categories, rng)
+                    start = time.perf_counter()
+                    r = await client.post("/second/submit", json={"token": token, **body})
+                    timings[enabled].append(time.perf_counter() - start)
+                    r.raise_for_status()
+    print(f"\n/second/submit over ASGI, {args.submits} submits in {args.rounds} alternating rounds")
+    for enabled in (False, True):
+        values = timings[enabled]
+        q = statistics.quantiles(values, n=100)
+        print(f"  bot score {'on ' if enabled else 'off'}  p50 {q[49] * 1000:.3f} ms  p95 {q[94] * 1000:.3f} ms  "
+              f"mean {statistics.fmean(values) * 1000:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=20000)
+    parser.add_argument("--submits", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(RWCAPTCHA_RATE_LIMIT="0", RWCAPTCHA_SECRET="bench-botscore-secret")
+        sys.path.insert(0, BACKEND_DIR)
+        os.chdir(tmp)
+        database_url = f"sqlite:///{os.path.join(tmp, 'results.db')}"
+        os.environ["RWCAPTCHA_DATABASE_URL"] = database_url
+        bench_score()
+        bench_discrimination()
+        seed_library(database_url, args.images, parse_labels(DEFAULT_LABELS))
+        asyncio.run(bench_submit(args))
+
+
+if __name__ == "__main__":
+    main()
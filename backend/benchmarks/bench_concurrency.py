@@ -0,0 +1,92 @@
+# bench_concurrency.py
+# 동시 접속 클라이언트 수에 따른 question -> submit 처리량 측정 (uvicorn 워커 1개)
+# 실행: backend 폴더에서 python -m benchmarks.bench_concurrency [--clients 200] [--seconds 10] [--url URL]
+# --url 을 주지 않으면 results.db 복사본으로 uvicorn을 임시로 띄워서 측정
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def submit_payload(mode: str, question: dict) -> dict:
+    if mode == "first":
+        return {"token": question["token"], "selected": []}
+    if mode == "second":
+        return {"token": question["token"], "answers": ["" for _ in question["images"]]}
+    return {"token": question["token"], "answers": []}
+
+
+async def client_loop(client: httpx.AsyncClient, mode: str, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            question = (await client.get(f"/{mode}/question")).json()
+            r = await client.post(f"/{mode}/submit", json=submit_payload(mode, question))
+            r.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(repr(e))
+
+
+async def run(url: str, mode: str, clients: int, seconds: float):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        latencies, errors = [], []
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(client_loop(client, mode, deadline, latencies, errors) for _ in range(clients)))
+    latencies.sort()
+    if not latencies:
+        print(f"{mode}: 성공한 요청 없음 ({len(errors)} errors, e.g. {errors[:1]})")
+        return
+    q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(f"{mode:<6} clients={clients} loops={len(latencies)} errors={len(errors)} "
+          f"throughput={len(latencies) / seconds:.1f} loops/s "
+          f"p50={q[49] * 1000:.1f}ms p95={q[94] * 1000:.1f}ms p99={q[98] * 1000:.1f}ms")
+
+
+def start_server(workdir: str, port: int):
+    shutil.copy(os.path.join(BACKEND_DIR, "results.db"), os.path.join(workdir, "results.db"))
+    # 모든 클라이언트가 같은 IP, 받자마자 제출하므로 봇 점수로 피드백 저장이 빠지지 않게 기준을 0으로
+    # 쉬지 않고 요청해서 쓰기가 밀리면 수락 제어가 기능을 줄이므로(미분류 칸 생략) 끄고 전체 경로를 측정
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, RWCAPTCHA_RATE_LIMIT="0", RWCAPTCHA_BOT_SCORE_MIN="0",
+               RWCAPTCHA_ADMISSION="0")
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=workdir, env=env)
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/first/question", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("uvicorn이 시작되지 않았습니다.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", nargs="+", default=["first", "second", "third"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = None if args.url else start_server(tmp, args.port)
+        url = args.url or f"http://127.0.0.1:{args.port}"
+        try:
+            for mode in args.modes:
+                asyncio.run(run(url, mode, args.clients, args.seconds))
+        finally:
+            if proc:
+                proc.terminate()
+                proc.wait()
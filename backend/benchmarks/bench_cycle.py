@@ -0,0 +1,310 @@
+# bench_cycle.py
+# 세 모드의 question -> submit 한 사이클 전체를 재현 가능하게 측정하는 벤치마크
+# 실행: backend 폴더에서 python -m benchmarks.bench_cycle [--images 100000] [--labels cat:4,dog:4,unclassified:1]
+#        [--targets asgi,http] [--clients 20] [--seconds 10] [--correct 0.7] [--output run.json] [--compare old.json]
+#  1) 임시 폴더에 합성 image_paths 라이브러리(크기, 라벨 분포 지정, 이미지 파일 없이 행만)를 만듦
+#  2) asgi: 같은 프로세스에서 앱을 ASGI로 직접 호출 (네트워크/서버 오버헤드 없이 앱과 DB 비용만)
+#     http: 같은 DB로 uvicorn을 띄워서 HTTP로 호출 (--workers 로 WEB_CONCURRENCY 지정 가능)
+#  3) 모드별로 --clients 개의 클라이언트가 --seconds 동안 문제를 받고, 토큰을 열어(같은 RWCAPTCHA_SECRET) --correct 비율만큼
+#     정답을, 나머지는 오답을 제출 (정답 제출은 결과/피드백 저장과 이미지 통계 갱신까지 모두 거침)
+#  4) 사이클/초, question/submit/사이클 지연 시간 p50/p95/p99, 통과율, 사이클당 DB 시간(/metrics의 함수별 DB 시간 차이)을 출력
+# --output 으로 결과를 JSON으로 저장하고 --compare 로 이전 JSON과 처리량/p95를 비교
+# --url 을 주면 라이브러리를 만들지 않고 떠 있는 서버를 HTTP로 측정 (그 서버의 RWCAPTCHA_SECRET을 환경 변수로 줄 것)
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.bench_images import BACKEND_DIR, start_server
+
+MODES = ("first", "second", "third")
+DEFAULT_LABELS = "cardboard:1,glass:1,metal:1,paper:1,plastic:1,trash:1,unclassified:0.6"
+_DB_LINE = re.compile(r'^rwcaptcha_db_query_duration_seconds_(sum|count)\{function="([^"]+)"\} (\S+)$')
+
+
+def parse_labels(text: str) -> Dict[str, float]:
+    labels = {}
+    for part in text.split(","):
+        label, _, weight = part.partition(":")
+        labels[label.strip()] = float(weight or 1)
+    if "unclassified" not in labels:
+        raise SystemExit("--labels 에 unclassified 비율이 있어야 합니다 (문제마다 미분류 이미지가 들어감)")
+    return labels
+
+
+def seed_library(url: str, images: int, labels: Dict[str, float], seed: int = 0):
+    from sqlalchemy import create_engine, insert
+
+    from app import models
+    from app.database import Base
+
+    rng = random.Random(seed)
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    names, weights = list(labels), list(labels.values())
+    with engine.begin() as conn:
+        for start in range(0, images, 50000):
+            rows = []
+            for label in rng.choices(names, weights, k=min(50000, images - start)):
+                u = uuid.UUID(int=rng.getrandbits(128), version=4)
+                rows.append({"uuid": u, "path": f"synthetic/{u}.jpg", "label": label, "source": "bench"})
+            conn.execute(insert(models.ImagePath), rows)
+    engine.dispose()
+
+
+# 토큰 안의 채점 데이터로 정답 또는 오답 제출 본문을 만듦
+def make_answer(mode: str, data: dict, correct: bool, categories: List[str], rng: random.Random) -> dict:
+    if mode == "first":
+        if not correct:
+            return {"selected": []} if data["a"] else {"selected": [0]}
+        # 사람처럼 미분류 칸도 가끔 같이 고름 (피드백 저장 경로)
+        extra = [i for i, _ in data["u"] if rng.random() < 0.5]
+        return {"selected": sorted(set(data["a"]) | set(extra))}
+    if mode == "second":
+        answers = [rng.choice(categories) if label == "unclassified" else label for label in data["l"]]
+        if not correct:
+            answers = ["" for _ in answers]
+        return {"answers": answers}
+    counts = dict(data["n"])
+    if correct:
+        # 미분류 이미지는 아무 카테고리로 하나 더 센 것으로
+        guess = rng.choice(categories)
+        counts[guess] = counts.get(guess, 0) + len(data["u"])
+    else:
+        counts = {c: n + 2 for c, n in counts.items()}
+    return {"answers": [{"category": c, "amount": n} for c, n in counts.items()]}
+
+
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    q = statistics.quantiles(values, n=100) if len(values) > 1 else values * 99
+    return {"p50": q[49] * 1000, "p95": q[94] * 1000, "p99": q[98] * 1000}
+
+
+async def client_loop(client, mode, deadline, categories, correct_rate, rng, stats):
+    from app import challenge
+
+    while time.perf_counter() < deadline:
+        try:
+            start = time.perf_counter()
+            r = await client.get(f"/{mode}/question")
+            r.raise_for_status()
+            asked = time.perf_counter()
+            token = r.json()["token"]
+            _, data, _ = challenge.decode(token, mode)
+            body = make_answer(mode, data, rng.random() < correct_rate, categories, rng)
+            submit_start = time.perf_counter()
+            r = await client.post(f"/{mode}/submit", json={"token": token, **body})
+            r.raise_for_status()
+            end = time.perf_counter()
+        except Exception as e:
+            stats["errors"].append(repr(e))
+            continue
+        stats["question"].append(asked - start)
+        stats["submit"].append(end - submit_start)
+        stats["cycle"].append(end - start)
+        stats["passed"] += bool(r.json()["is_correct"])
+
+
+def _metrics_headers() -> dict:
+    token = os.environ.get("RWCAPTCHA_METRICS_TOKEN", "")
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+# 함수별 (DB 시간 합계, 호출 수)
+async def db_snapshot(client) -> Dict[str, list]:
+    try:
+        r = await client.get("/metrics", headers=_metrics_headers())
+        r.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    snapshot = {}
+    for line in r.text.splitlines():
+        match = _DB_LINE.match(line)
+        if match:
+            kind, function, value = match.groups()
+            snapshot.setdefault(function, [0.0, 0])[kind == "count"] = float(value)
+    return snapshot
+
+
+async def wait_writer(client, timeout: float = 10.0):
+    # 쓰기 지연 큐가 비어야 이번 모드의 DB 쓰기 시간이 모두 잡힘
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            text = (await client.get("/metrics", headers=_metrics_headers())).text
+        except httpx.HTTPError:
+            return
+        match = re.search(r"^rwcaptcha_writer_pending_rows (\S+)$", text, re.M)
+        if match is None or float(match.group(1)) == 0:
+            return
+        await asyncio.sleep(0.2)
+
+
+async def run_mode(client, target: str, mode: str, args, categories: List[str]) -> dict:
+    rng = random.Random(f"{args.seed}-{target}-{mode}")
+    warmup = {"question": [], "submit": [], "cycle": [], "passed": 0, "errors": []}
+    await client_loop(client, mode, time.perf_counter() + args.warmup, categories, args.correct, rng, warmup)
+    await wait_writer(client)
+    before = await db_snapshot(client)
+    stats = {"question": [], "submit": [], "cycle": [], "passed": 0, "errors": []}
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    await asyncio.gather(*(client_loop(client, mode, deadline, categories, args.correct, random.Random(rng.random()),
+                                       stats) for _ in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    await wait_writer(client)
+    after = await db_snapshot(client)
+    cycles = len(stats["cycle"])
+    db = {f: [after[f][0] - before.get(f, [0.0, 0])[0], after[f][1] - before.get(f, [0.0, 0])[1]] for f in after}
+    db = {f: {"seconds": s, "calls": int(n)} for f, (s, n) in sorted(db.items(), key=lambda kv: -kv[1][0]) if n}
+    db_seconds = sum(v["seconds"] for v in db.values())
+    return {
+        "target": target, "mode": mode, "clients": args.clients, "seconds": elapsed, "cycles": cycles,
+        "errors": len(stats["errors"]), "error_sample": stats["errors"][:3],
+        "throughput": cycles / elapsed, "pass_rate": stats["passed"] / cycles if cycles else None,
+        "question_ms": percentiles(stats["question"]), "submit_ms": percentiles(stats["submit"]),
+        "cycle_ms": percentiles(stats["cycle"]),
+        "db_ms_per_cycle": db_seconds * 1000 / cycles if cycles and db else None, "db_functions": db,
+    }
+
+
+def report(result: dict):
+    def fmt(p):
+        return "/".join("-" if v is None else f"{v:.1f}" for v in (p["p50"], p["p95"], p["p99"]))
+
+    db = "-" if result["db_ms_per_cycle"] is None else f"{result['db_ms_per_cycle']:.2f}"
+    pass_rate = "-" if result["pass_rate"] is None else f"{result['pass_rate']:.0%}"
+    print(f"{result['target']:<5} {result['mode']:<6} {result['throughput']:8.1f} cycles/s  "
+          f"question {fmt(result['question_ms'])} ms  submit {fmt(result['submit_ms'])} ms  "
+          f"cycle {fmt(result['cycle_ms'])} ms (p50/p95/p99)  db {db} ms/cycle  pass {pass_rate}  "
+          f"errors {result['errors']}")
+
+
+async def run_target(client, target: str, args, categories: List[str]) -> List[dict]:
+    results = []
+    for mode in args.modes:
+        result = await run_mode(client, target, mode, args, categories)
+        report(result)
+        results.append(result)
+    return results
+
+
+async def run_asgi(args, categories: List[str]) -> List[dict]:
+    from app.main import app, lifespan
+
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await run_target(client, "asgi", args, categories)
+
+
+async def run_http(url: str, args, categories: List[str]) -> List[dict]:
+    limits = httpx.Limits(max_connections=args.clients + 2, max_keepalive_connections=args.clients + 2)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        return await run_target(client, "http", args, categories)
+
+
+def compare(results: List[dict], path: str):
+    with open(path) as f:
+        old = {(r["target"], r["mode"]): r for r in json.load(f)["results"]}
+    print(f"\ncompared with {path}:")
+    for r in results:
+        o = old.get((r["target"], r["mode"]))
+        if o is None or not o["throughput"] or o["cycle_ms"]["p95"] is None or r["cycle_ms"]["p95"] is None:
+            continue
+        print(f"{r['target']:<5} {r['mode']:<6} throughput {r['throughput'] / o['throughput'] - 1:+.1%}  "
+              f"cycle p95 {r['cycle_ms']['p95'] / o['cycle_ms']['p95'] - 1:+.1%}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=100000)
+    parser.add_argument("--labels", default=DEFAULT_LABELS, help="라벨:비율 목록 (unclassified 포함)")
+    parser.add_argument("--targets", default="asgi,http")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=1)
+    parser.add_argument("--correct", type=float, default=0.7, help="정답을 제출하는 비율")
+    parser.add_argument("--workers", type=int, default=1, help="http 대상 uvicorn 워커 수")
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="떠 있는 서버를 HTTP로 측정")
+    parser.add_argument("--output", help="결과 JSON 파일")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 파일")
+    args = parser.parse_args()
+    args.modes = args.modes.split(",")
+    # 라이브러리를 만들 때 임시 폴더로 이동하므로 미리 절대 경로로
+    args.output = args.output and os.path.abspath(args.output)
+    args.compare = args.compare and os.path.abspath(args.compare)
+    labels = parse_labels(args.labels)
+    categories = [label for label in labels if label != "unclassified"]
+    targets = ["http"] if args.url else args.targets.split(",")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # 앱 모듈을 불러오기 전에 설정 (토큰을 열 수 있도록 서버와 같은 키, 한 IP에서 보내므로 요청 제한 끔)
+        os.environ.setdefault("RWCAPTCHA_SECRET", "bench-cycle-secret")
+        os.environ.update(RWCAPTCHA_RATE_LIMIT="0", RWCAPTCHA_METRICS="1")
+        # 벤치마크 클라이언트는 받자마자 제출해서 봇 점수가 낮게 나오므로, 점수는 계산하되 피드백 저장 경로는 그대로 측정
+        os.environ.setdefault("RWCAPTCHA_BOT_SCORE_MIN", "0")
+        # 쉬지 않고 요청해서 쓰기가 밀리면 수락 제어가 기능을 줄이므로(미분류 칸 생략) 끄고 전체 경로를 측정
+        os.environ.setdefault("RWCAPTCHA_ADMISSION", "0")
+        sys.path.insert(0, BACKEND_DIR)
+        if not args.url:
+            os.chdir(tmp)  # 카탈로그 스탬프, 이미지 통계, 인덱스 파일 등을 임시 폴더에
+            database_url = f"sqlite:///{os.path.join(tmp, 'results.db')}"
+            os.environ["RWCAPTCHA_DATABASE_URL"] = database_url
+            start = time.perf_counter()
+            seed_library(database_url, args.images, labels, args.seed)
+            print(f"seeded {args.images:,} images ({args.labels}) in {time.perf_counter() - start:.1f} s")
+
+        if "asgi" in targets:
+            results += asyncio.run(run_asgi(args, categories))
+        if "http" in targets:
+            if args.url:
+                results += asyncio.run(run_http(args.url, args, categories))
+            else:
+                if args.workers > 1:
+                    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+                proc = start_server(tmp, args.port, 64)
+                try:
+                    results += asyncio.run(run_http(f"http://127.0.0.1:{args.port}", args, categories))
+                finally:
+                    proc.terminate()
+                    proc.wait()
+
+    run = {
+        "meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "commit": git_commit(), "python": platform.python_version(),
+                 "platform": platform.platform(), "cpus": os.cpu_count(), "args": vars(args)},
+        "library": {"images": 0 if args.url else args.images, "labels": labels},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"wrote {args.output}")
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,100 @@
+# bench_db_write.py
+# 여러 워커 프로세스가 동시에 unclassified_feedback에 쓸 때의 DB 쓰기 처리량 비교
+# 프로필: sqlite-default(rollback journal, synchronous=FULL), sqlite-wal(WAL, synchronous=NORMAL), postgres(--postgres-url)
+# 실행: backend 폴더에서 python -m benchmarks.bench_db_write [--workers 1 4 16] [--seconds 5] [--batch-size 10]
+#       python -m benchmarks.bench_db_write --postgres-url postgresql://user:pw@localhost/rwcaptcha_bench
+# 각 워커는 write-behind 큐(writer.py)처럼 batch-size 행씩 한 트랜잭션으로 insert
+# PostgreSQL은 비어 있는 벤치마크용 DB를 지정할 것 (테이블을 만들고 끝나면 넣은 행을 지움)
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import OperationalError
+
+from app import database, models
+
+LABEL = "bench-write"
+
+
+def worker(url: str, profile: str, image_uuid: str, batch_size: int, start_at: float, seconds: float, out):
+    engine = database.make_engine(url, profile)
+    rows = [{"image_uuid": uuid.UUID(image_uuid), "user_assigned_label": LABEL, "timestamp": datetime.utcnow(),
+             "is_correct_main_captcha": True} for _ in range(batch_size)]
+    written = errors = 0
+    latencies = []
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(models.UnclassifiedFeedback), rows)
+            written += batch_size
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:  # database is locked 등
+            errors += 1
+    engine.dispose()
+    out.put((written, errors, latencies))
+
+
+def prepare(url: str, profile: str) -> str:
+    engine = database.make_engine(url, profile)
+    database.Base.metadata.create_all(bind=engine)
+    image_uuid = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(insert(models.ImagePath), [{"uuid": image_uuid, "path": "/img/bench.jpg", "label": LABEL}])
+    engine.dispose()
+    return str(image_uuid)
+
+
+def cleanup(url: str, profile: str):
+    engine = database.make_engine(url, profile)
+    with engine.begin() as conn:
+        conn.execute(delete(models.UnclassifiedFeedback).where(models.UnclassifiedFeedback.user_assigned_label == LABEL))
+        conn.execute(delete(models.ImagePath).where(models.ImagePath.label == LABEL))
+    engine.dispose()
+
+
+def run(name: str, url: str, profile: str, workers: int, batch_size: int, seconds: float):
+    image_uuid = prepare(url, profile)
+    out = multiprocessing.Queue()
+    start_at = time.time() + 1.0  # 모든 프로세스가 준비된 뒤 동시에 시작
+    procs = [multiprocessing.Process(target=worker, args=(url, profile, image_uuid, batch_size, start_at, seconds, out))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    cleanup(url, profile)
+    written = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    latencies = sorted(latency for r in results for latency in r[2])
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else float("nan")
+    print(f"{name:<15} workers={workers:<3} {written / seconds:>10.0f} rows/s "
+          f"{len(latencies) / seconds:>8.0f} commits/s errors={errors} p99 commit={p99:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--postgres-url")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profiles = [
+            ("sqlite-default", f"sqlite:///{os.path.join(tmp, 'default.db')}", "default"),
+            ("sqlite-wal", f"sqlite:///{os.path.join(tmp, 'wal.db')}", "wal"),
+        ]
+        if args.postgres_url:
+            profiles.append(("postgres", args.postgres_url, database.SQLITE_PROFILE))
+        for name, url, profile in profiles:
+            for workers in args.workers:
+                run(name, url, profile, workers, args.batch_size, args.seconds)
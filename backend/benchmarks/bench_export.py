@@ -0,0 +1,111 @@
+# bench_export.py
+# 결과 테이블 내보내기(app/export.py): 배치 스트리밍 vs 한 번에 전부 읽기(fetchall 후 변환)의 처리 속도와 최대 메모리
+# 실행: backend 폴더에서 python -m benchmarks.bench_export [행 수 ...]
+# results_second 에 여러 날짜에 걸친 행을 넣고 방식마다 새 프로세스에서 Parquet로 내보내며
+# 최대 RSS(ru_maxrss)에서 import 직후 RSS를 뺀 값을 비교 (스트리밍은 행 수가 늘어도 거의 같아야 함)
+# 이어서 몇 행을 더 넣고 증분 실행이 새 행만 읽는지 확인
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import Base
+
+LABELS = ["cardboard", "glass", "metal", "paper", "plastic", "trash"]
+DAYS = 30
+
+WORKER = """
+import json, resource, sys, time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app import export
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+url, out, mode = sys.argv[1:4]
+db = Session(bind=create_engine(url))
+base = rss_kb()
+start = time.perf_counter()
+if mode == "stream":
+    result = export.export_table(db, "results_second", out_dir=out, lag=0)
+    rows = result["rows"]
+else:
+    import pyarrow as pa, pyarrow.parquet as pq
+    rows = db.execute(export.export_query("results_second")).all()
+    table = pa.Table.from_batches([export.to_batch("results_second", rows)])
+    pq.write_table(table, out + "/all.parquet", compression="zstd")
+    rows = len(rows)
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"rows": rows, "seconds": elapsed, "peak_kb": peak - base}))
+"""
+
+
+def seed(db, n: int, start: datetime, span: float = DAYS * 86400, first_id: int = 1):
+    rng = random.Random(n)
+    rows = []
+    for i in range(n):
+        questions = rng.sample(range(1, 100_000), 5)
+        rows.append({"id": first_id + i, "is_correct": rng.random() < 0.8,
+                     "asked_questions": ",".join(map(str, questions)),
+                     "selected_answers": ",".join(rng.choice(LABELS) for _ in questions),
+                     "timestamp": start + timedelta(seconds=span * i / n)})
+        if len(rows) == 50000:
+            db.execute(insert(models.ResultSecond), rows)
+            rows = []
+    if rows:
+        db.execute(insert(models.ResultSecond), rows)
+    db.commit()
+
+
+def worker(url: str, out: str, mode: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    out_text = subprocess.run([sys.executable, "-c", WORKER, url, out, mode], env=env, check=True,
+                              capture_output=True, text=True).stdout
+    return json.loads(out_text)
+
+
+def run(n: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        start = datetime.utcnow() - timedelta(days=DAYS + 1)
+        with Session() as db:
+            seed(db, n, start)
+
+        print(f"\n[{n:,} rows over {DAYS} days]")
+        for mode in ("fetchall", "stream"):
+            out = os.path.join(tmp, mode)
+            os.makedirs(out)
+            result = worker(url, out, mode)
+            size = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(out) for f in fs)
+            print(f"  {mode:<9} {result['rows'] / result['seconds']:10,.0f} rows/s   peak +{result['peak_kb'] / 1024:7.1f} MB"
+                  f"   output {size / 1e6:6.1f} MB")
+
+        # 증분: 새 행만 읽어야 함
+        with Session() as db:
+            seed(db, 1000, datetime.utcnow() - timedelta(hours=1), span=600, first_id=n + 1)
+        t = time.perf_counter()
+        again = worker(url, os.path.join(tmp, "stream"), "stream")
+        print(f"  incremental: {again['rows']} new rows in {(time.perf_counter() - t) * 1000:.0f} ms (incl. process start)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+    for n in sizes:
+        run(n)
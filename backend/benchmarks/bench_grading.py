@@ -0,0 +1,88 @@
+# bench_grading.py
+# 채점 엔진(app/grading.py) 처리량: 한 건씩 grade() 와 NumPy grade_batch() 의 초당 채점 수
+# 실행: backend 폴더에서 python -m benchmarks.bench_grading [--submissions 200000]
+# 합성 제출(절반쯤 정답)을 만들어 두 방식의 결과가 같은지도 확인
+import argparse
+import time
+
+import numpy as np
+
+from app import grading
+
+LABELS = ["cardboard", "glass", "metal", "paper", "plastic", "trash"]
+
+
+def report(mode: str, n: int, online: float, batch: float, prepare: float = 0.0):
+    extra = f" (+ array prep {n / prepare:,.0f}/s)" if prepare else ""
+    print(f"{mode:<6} grade(): {n / online:>12,.0f} grades/s   grade_batch(): {n / batch:>14,.0f} grades/s "
+          f"x{online / batch:,.0f}{extra}")
+
+
+def bench_first(n: int, rng):
+    correct = [set(rng.choice(9, size=rng.integers(1, 4), replace=False).tolist()) for _ in range(n)]
+    selected = [c | {int(rng.integers(9))} if rng.random() < 0.5 else set(rng.choice(9, size=2).tolist())
+                for c in correct]
+
+    start = time.perf_counter()
+    online = [grading.first.grade(c, s) for c, s in zip(correct, selected)]
+    online_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    correct_masks = np.array([grading.to_mask(c) for c in correct], dtype=np.uint64)
+    selected_masks = np.array([grading.to_mask(s) for s in selected], dtype=np.uint64)
+    prepare_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = grading.first.grade_batch(correct_masks, selected_masks)
+    batch_time = time.perf_counter() - start
+    assert batch.tolist() == online
+    report("first", n, online_time, batch_time, prepare_time)
+
+
+def bench_second(n: int, rng):
+    labels = np.array(LABELS + ["unclassified"], dtype=object)[rng.integers(0, 7, size=(n, 5))]
+    answers = np.where(rng.random((n, 5)) < 0.85, labels, np.array(LABELS, dtype=object)[rng.integers(0, 6, size=(n, 5))])
+    label_rows, answer_rows = labels.tolist(), answers.tolist()
+
+    start = time.perf_counter()
+    online = [grading.second.grade(l, a) for l, a in zip(label_rows, answer_rows)]
+    online_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = grading.second.grade_batch(labels, answers)
+    batch_time = time.perf_counter() - start
+    assert batch.tolist() == online
+    report("second", n, online_time, batch_time)
+
+
+def bench_third(n: int, rng):
+    expected, answers = [], []
+    for _ in range(n):
+        counts = {}
+        for label in rng.choice(LABELS, size=15).tolist():
+            counts[label] = counts.get(label, 0) + 1
+        expected.append(counts)
+        answers.append([(c, k + int(rng.integers(-1, 2)) * (rng.random() < 0.3)) for c, k in counts.items()])
+
+    start = time.perf_counter()
+    online = [grading.third.grade(e, a).is_correct for e, a in zip(expected, answers)]
+    online_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    arrays = grading.ThirdGrader.to_arrays(expected, answers)
+    prepare_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = grading.third.grade_batch(*arrays)
+    batch_time = time.perf_counter() - start
+    assert batch.tolist() == online
+    report("third", n, online_time, batch_time, prepare_time)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--submissions", type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    bench_first(args.submissions, rng)
+    bench_second(args.submissions, rng)
+    bench_third(args.submissions, rng)
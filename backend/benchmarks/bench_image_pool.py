@@ -0,0 +1,116 @@
+# bench_image_pool.py
+# ORDER BY random() 샘플링(crud)과 메모리 이미지 풀 샘플링 비교
+# 이어서 이미지별 통계 갱신 비용과 가중 샘플링(정확도 단계별 alias)이 균등 샘플링 대비 얼마나 느린지,
+# 자주 틀리는 이미지가 실제로 덜 뽑히는지 확인
+# 실행: backend 폴더에서 python -m benchmarks.bench_image_pool [행 수 ...]
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models
+from app.database import Base
+from app.image_pool import ImagePool
+from app.image_stats import ImageStats
+
+LABELS = ["cardboard", "glass", "metal", "paper", "plastic", "trash"]
+GRID_SIZES = {"first": (3, 9), "second": (1, 5), "third": (1, 16)}  # (미분류 수, 전체 칸 수)
+
+
+def _new_uuid():
+    # SQLite의 UUID 컬럼은 NUMERIC 친화성이라 숫자처럼 보이는 hex(예: "1234e56...")는 REAL로 바뀌어 저장됨
+    while True:
+        u = uuid.uuid4()
+        try:
+            float(u.hex)
+        except ValueError:
+            return u
+
+
+def seed(db, n: int):
+    rows = []
+    for i in range(n):
+        u = _new_uuid()
+        label = "unclassified" if i % 10 == 0 else LABELS[i % len(LABELS)]
+        rows.append({"uuid": u, "path": f"/img/{u}.jpg", "label": label, "source": "bench"})
+        if len(rows) == 50000:
+            db.execute(insert(models.ImagePath), rows)
+            rows = []
+    if rows:
+        db.execute(insert(models.ImagePath), rows)
+    db.commit()
+
+
+def timeit(fn, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(n: int, repeat: int = 20):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        seed(db, n)
+
+        image_pool = ImagePool(ImageStats())
+        start = time.perf_counter()
+        image_pool.load(db)
+        load_time = time.perf_counter() - start
+
+        print(f"\n[{n:,} rows] pool load: {load_time * 1000:.1f} ms")
+        for mode, (num_unclassified, total) in GRID_SIZES.items():
+            def sql():
+                crud.get_unclassified_random_images(db=db, num=num_unclassified)
+                crud.get_classified_random_images(db=db, num=total - num_unclassified,
+                                                  exclude_categories=["unclassified"])
+
+            def in_memory():
+                image_pool.sample_unclassified(num_unclassified)
+                image_pool.sample_classified(total - num_unclassified)
+
+            sql_time = timeit(sql, repeat)
+            pool_time = timeit(in_memory, repeat * 100)
+            print(f"  {mode:<6} ({total:>2} imgs)  ORDER BY random(): {sql_time * 1000:9.3f} ms"
+                  f"   pool: {pool_time * 1e6:7.2f} us   x{sql_time / pool_time:,.0f}")
+        run_weighted(image_pool, repeat)
+        db.close()
+        engine.dispose()
+
+
+def run_weighted(image_pool: ImagePool, repeat: int):
+    classified = [img for label, count in image_pool.label_counts().items() if label != "unclassified"
+                  for img in image_pool.sample_label(label, count)]
+    uniform_time = timeit(lambda: random.sample(classified, 15), repeat * 100)
+    weighted_time = timeit(lambda: image_pool.sample_classified(15), repeat * 100)
+
+    # 5%는 사람이 자주 틀리는(정확도 30%) 이미지, 나머지는 항상 맞히는 이미지로 제출 결과를 쌓음
+    noisy = set(img.id for img in classified[::20])
+    answers = [(img.id, img.id not in noisy or random.random() < 0.3, None)
+               for img in classified for _ in range(10)]
+    random.shuffle(answers)
+    start = time.perf_counter()
+    for i in range(0, len(answers), 15):  # /third 제출 한 건 = 분류된 이미지 15장
+        image_pool.record(answers[i:i + 15])
+    record_time = (time.perf_counter() - start) / (len(answers) / 15)
+
+    after_time = timeit(lambda: image_pool.sample_classified(15), repeat * 100)
+    drawn = [img.id for _ in range(2000) for img in image_pool.sample_classified(15)]
+    noisy_share = sum(i in noisy for i in drawn) / len(drawn)
+    print(f"  weighted sampling (15 imgs): uniform random.sample {uniform_time * 1e6:.2f} us, "
+          f"weighted {weighted_time * 1e6:.2f} us (after stats {after_time * 1e6:.2f} us)")
+    print(f"  stats record per /third submit: {record_time * 1e6:.2f} us, "
+          f"noisy images: {len(noisy) / len(classified):.1%} of pool, {noisy_share:.1%} of draws")
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for n in sizes:
+        run(n)
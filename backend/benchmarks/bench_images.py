@@ -0,0 +1,147 @@
+# bench_images.py
+# /img/{image_id} 이미지 전송 처리량 측정 (uvicorn 워커 1개, requests/s, MB/s)
+# 실행: backend 폴더에서 python -m benchmarks.bench_images [--images 300] [--clients 100] [--seconds 10]
+# 임시 폴더에 합성 이미지를 적재하고 LRU 바이트 캐시를 끈 경우/켠 경우 각각 uvicorn을 띄워서 측정
+# --url 을 주면 이미 떠 있는 서버의 /first/question 이미지 주소로 측정
+# 이어서 /third 문제 하나를 화면에 띄우는 데 필요한 요청(문제 + 타일 16개 vs 문제 + 스프라이트 1개)의 초당 처리 수 비교
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(workdir: str, count: int):
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    for label in ("cat", "dog", "unclassified"):
+        folder = os.path.join(workdir, "src", label)
+        os.makedirs(folder)
+        for i in range(count // 3):
+            noise = (rng.random((48, 48, 3)) * 255).astype("uint8")
+            Image.fromarray(noise).resize((800, 600)).save(os.path.join(folder, f"{i}.jpg"), quality=90)
+    subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "ingest.py"), "src", "--storage-root", "img",
+                    "--duplicates", "keep"], cwd=workdir, check=True, stdout=subprocess.DEVNULL)
+
+
+def start_server(workdir: str, port: int, cache_mb: float):
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, RWCAPTCHA_IMAGE_ROOT=os.path.join(workdir, "img"),
+               RWCAPTCHA_IMAGE_CACHE_MB=str(cache_mb), RWCAPTCHA_RATE_LIMIT="0")  # 모든 클라이언트가 같은 IP
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=workdir, env=env)
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/first/question", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("uvicorn이 시작되지 않았습니다.")
+
+
+async def collect_urls(client: httpx.AsyncClient, questions: int):
+    urls = []
+    for _ in range(questions):
+        for mode in ("first", "second"):
+            urls += [img["url"] for img in (await client.get(f"/{mode}/question")).json()["images"]]
+    return urls
+
+
+async def client_loop(client, urls, deadline, latencies, sizes, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            r = await client.get(random.choice(urls))
+            r.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+            sizes.append(len(r.content))
+        except Exception as e:
+            errors.append(repr(e))
+
+
+async def run(url: str, name: str, clients: int, seconds: float, questions: int):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        urls = await collect_urls(client, questions)
+        latencies, sizes, errors = [], [], []
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(client_loop(client, urls, deadline, latencies, sizes, errors) for _ in range(clients)))
+    if not latencies:
+        print(f"{name}: 성공한 요청 없음 ({len(errors)} errors, e.g. {errors[:1]})")
+        return
+    q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(f"{name:<10} clients={clients} requests={len(latencies)} errors={len(errors)} "
+          f"{len(latencies) / seconds:.1f} req/s {sum(sizes) / seconds / 1024 / 1024:.2f} MB/s "
+          f"avg={statistics.mean(sizes) / 1024:.1f}KB p50={q[49] * 1000:.1f}ms p99={q[98] * 1000:.1f}ms")
+
+
+async def grid_loop(client, sprite, deadline, latencies, sizes, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            question = (await client.get("/third/question", params={"sprite": "true"} if sprite else None)).json()
+            urls = [question["sprite"]["url"]] if sprite else [img["url"] for img in question["images"]]
+            responses = await asyncio.gather(*(client.get(u) for u in urls))
+            for r in responses:
+                r.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+            sizes.append(sum(len(r.content) for r in responses))
+        except Exception as e:
+            errors.append(repr(e))
+
+
+async def run_grid(url: str, sprite: bool, clients: int, seconds: float):
+    name = "sprite" if sprite else "tiles"
+    limits = httpx.Limits(max_connections=clients * 4, max_keepalive_connections=clients * 4)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        latencies, sizes, errors = [], [], []
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(grid_loop(client, sprite, deadline, latencies, sizes, errors) for _ in range(clients)))
+    if not latencies:
+        print(f"grid-{name}: 성공한 요청 없음 ({len(errors)} errors, e.g. {errors[:1]})")
+        return
+    q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    requests = 2 if sprite else 17
+    print(f"grid-{name:<6} clients={clients} challenges={len(latencies)} errors={len(errors)} "
+          f"{len(latencies) / seconds:.1f} challenges/s ({requests} requests each) "
+          f"{sum(sizes) / seconds / 1024 / 1024:.2f} MB/s p50={q[49] * 1000:.1f}ms p99={q[98] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url")
+    parser.add_argument("--images", type=int, default=300)
+    parser.add_argument("--questions", type=int, default=50, help="이미지 주소를 모을 문제 수 (모드별)")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(run(args.url, "server", args.clients, args.seconds, args.questions))
+        for sprite in (False, True):
+            asyncio.run(run_grid(args.url, sprite, args.clients, args.seconds))
+        sys.exit()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed(tmp, args.images)
+        for name, cache_mb in (("no-cache", 0), ("lru-64MB", 64)):
+            proc = start_server(tmp, args.port, cache_mb)
+            try:
+                asyncio.run(run(f"http://127.0.0.1:{args.port}", name, args.clients, args.seconds, args.questions))
+                if cache_mb:
+                    for sprite in (False, True):
+                        asyncio.run(run_grid(f"http://127.0.0.1:{args.port}", sprite, args.clients, args.seconds))
+            finally:
+                proc.terminate()
+                proc.wait()
@@ -0,0 +1,147 @@
+# bench_metrics.py
+# 계측(app/metrics.py)이 요청 지연 시간에 더하는 비용 측정 (목표: 2% 미만)
+# 실행: backend 폴더에서 python -m benchmarks.bench_metrics [--images 60] [--requests 3000]
+#  1) 관측 한 번의 비용 (Counter.inc, Histogram.observe, 빈 ASGI 앱에 MetricsMiddleware)
+#  2) 합성 이미지로 만든 임시 DB에서 실제 앱을 ASGI로 직접 호출(네트워크 없음)해서
+#     /first/question, /first/submit, /img/{image_id} 요청 지연 시간을 미들웨어 없이/있을 때 번갈아 측정
+#     (네트워크와 서버 오버헤드가 빠진 앱 자체의 처리 시간 기준이므로 실제 비율보다 보수적)
+#  3) uvicorn을 계측 끔/켬(RWCAPTCHA_METRICS)으로 번갈아 띄워서 클라이언트가 보는 HTTP 요청 지연 시간 비교
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_images import seed, start_server
+
+
+async def call(app, method: str, path: str, body: bytes = b""):
+    path, _, query = path.partition("?")
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+             "root_path": "", "headers": [(b"content-type", b"application/json")],
+             "client": ("127.0.0.1", 50000), "server": ("bench", 80)}
+    sent = False
+    chunks = []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(chunks)
+
+
+def bench_primitives(metrics, n: int = 200000):
+    counter = metrics.Counter("bench_counter", "bench", ("mode",)).labels("first")
+    histogram = metrics.Histogram("bench_seconds", "bench", ("route",)).labels("/first/question")
+    start = time.perf_counter()
+    for _ in range(n):
+        counter.inc()
+    inc = (time.perf_counter() - start) / n
+    start = time.perf_counter()
+    for i in range(n):
+        histogram.observe(i * 1e-7)
+    observe = (time.perf_counter() - start) / n
+
+    async def empty_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def run(app):
+        start = time.perf_counter()
+        for _ in range(n // 10):
+            await call(app, "GET", "/first/question")
+        return (time.perf_counter() - start) / (n // 10)
+
+    bare = asyncio.run(run(empty_app))
+    wrapped = asyncio.run(run(metrics.MetricsMiddleware(empty_app)))
+    print(f"Counter.inc {inc * 1e9:.0f} ns, Histogram.observe {observe * 1e9:.0f} ns, "
+          f"MetricsMiddleware {(wrapped - bare) * 1e9:.0f} ns per request")
+
+
+async def bench_app(app, wrapped, requests: int):
+    from app.main import lifespan
+
+    async with lifespan(app):
+        question = json.loads(await call(app, "GET", "/first/question"))
+        image_path = question["images"][0]["url"].split("://", 1)[-1].split("/", 1)[1]
+
+        async def question_request(target):
+            await call(target, "GET", "/first/question")
+
+        async def submit_request(target):
+            q = json.loads(await call(target, "GET", "/first/question"))
+            start = time.perf_counter()
+            await call(target, "POST", "/first/submit", json.dumps({"token": q["token"], "selected": []}).encode())
+            return time.perf_counter() - start
+
+        async def image_request(target):
+            await call(target, "GET", "/" + image_path)
+
+        for name, request in (("/first/question", question_request), ("/first/submit", submit_request),
+                              ("/img/{image_id}", image_request)):
+            times = {"bare": [], "metrics": []}
+            order = (("bare", app), ("metrics", wrapped))
+            for i in range(requests):
+                # 번갈아, 순서도 바꿔 가며 호출해서 캐시/GC 등의 영향을 양쪽에 고르게
+                for label, target in (order if i % 2 else order[::-1]):
+                    start = time.perf_counter()
+                    elapsed = await request(target)
+                    times[label].append(elapsed if elapsed is not None else time.perf_counter() - start)
+            bare, instrumented = statistics.median(times["bare"]), statistics.median(times["metrics"])
+            print(f"{name:<16} median bare {bare * 1e6:8.1f} us  with metrics {instrumented * 1e6:8.1f} us  "
+                  f"overhead {(instrumented - bare) / bare:+.2%}")
+
+
+def bench_http(workdir: str, requests: int, rounds: int = 3, port: int = 8767):
+    latencies = {"0": [], "1": []}
+    for _ in range(rounds):
+        for enabled in ("0", "1"):
+            os.environ["RWCAPTCHA_METRICS"] = enabled
+            proc = start_server(workdir, port, 64)
+            try:
+                with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+                    for _ in range(requests):
+                        start = time.perf_counter()
+                        client.get("/first/question").raise_for_status()
+                        latencies[enabled].append(time.perf_counter() - start)
+            finally:
+                proc.terminate()
+                proc.wait()
+    bare, instrumented = statistics.median(latencies["0"]), statistics.median(latencies["1"])
+    print(f"HTTP /first/question median off {bare * 1e6:8.1f} us  on {instrumented * 1e6:8.1f} us  "
+          f"overhead {(instrumented - bare) / bare:+.2%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=60)
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed(tmp, args.images)
+        os.chdir(tmp)
+        os.environ.update(RWCAPTCHA_IMAGE_ROOT=os.path.join(tmp, "img"), RWCAPTCHA_RATE_LIMIT="0",
+                          RWCAPTCHA_METRICS="0", RWCAPTCHA_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'results.db')}")
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from app import metrics
+        from app.main import app
+
+        bench_primitives(metrics)
+        # 미들웨어 없이 만든 앱과, 같은 앱을 MetricsMiddleware로 감싼 것을 비교
+        asyncio.run(bench_app(app, metrics.MetricsMiddleware(app), args.requests))
+        bench_http(tmp, args.requests)
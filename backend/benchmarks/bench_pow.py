@@ -0,0 +1,166 @@
+# bench_pow.py
+# 작업 증명 관문(app/proof_of_work.py) 비용과 question 요청 폭주 때의 효과
+# 실행: backend 폴더에서 python -m benchmarks.bench_pow [--images 20000] [--flooders 50] [--seconds 10]
+#  1) 서버 쪽 검증 비용: 틀린 풀이 거부 (SHA-256 한 번) / 맞는 풀이 통과 (+ HMAC, 1회용 기록) / 퍼즐 발급
+#  2) 난이도별 풀이 비용 (평균 해시 수와 이 프로세스의 파이썬 hashlib 기준 시간, 브라우저 crypto.subtle 도 비슷한 규모)
+#  3) 같은 프로세스에서 ASGI로 /first/question 폭주: 관문을 끈 경우와 켠 경우
+#     폭주 클라이언트는 풀지 않고 계속 요청, 정상 클라이언트 하나는 매번 퍼즐을 풀고 2초마다 문제를 받음
+#     -> 만든 문제 그리드 수(challenge_pool 적중+부족), 요청당 서버 시간, 올라간 난이도, 정상 클라이언트 대기 시간
+import argparse
+import asyncio
+import hashlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_cycle import BACKEND_DIR, parse_labels, seed_library, DEFAULT_LABELS
+
+
+def _timeit(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n
+
+
+def _timeit_async(fn, n: int) -> float:
+    async def run():
+        start = time.perf_counter()
+        for _ in range(n):
+            await fn()
+        return (time.perf_counter() - start) / n
+
+    return asyncio.run(run())
+
+
+def bench_verify(n: int = 20000):
+    from app.proof_of_work import ProofOfWorkGate, solve
+
+    gate = ProofOfWorkGate(min_bits=12)
+    puzzle = gate.issue(12)
+    solution, _ = solve(puzzle)
+    wrong = puzzle["challenge"] + ".1" if not solution.endswith(".1") else puzzle["challenge"] + ".2"
+    solutions = [solve(gate.issue(12))[0] for _ in range(min(n, 300))]
+    reject = _timeit_async(lambda: gate.verify(wrong, 12), n)
+    it = iter(solutions)
+    accept = _timeit_async(lambda: gate.verify(next(it), 12), len(solutions))
+    issue = _timeit(lambda: gate.issue(12), n)
+    print(f"verify: reject {reject * 1e6:.2f} us, accept {accept * 1e6:.2f} us, issue {issue * 1e6:.2f} us")
+
+
+def bench_solve(bits_list=(12, 14, 16, 18, 20), samples: int = 20):
+    from app.proof_of_work import ProofOfWorkGate, solve
+
+    gate = ProofOfWorkGate()
+    digest = hashlib.sha256
+    per_hash = _timeit(lambda: digest(b"x" * 48).digest(), 200000)
+    print(f"\n{'bits':>4} {'expected hashes':>16} {'measured':>10} {'solve time':>11}  (python, {per_hash * 1e9:.0f} ns/hash)")
+    for bits in bits_list:
+        n = samples if bits <= 16 else max(3, samples // 4)
+        hashes = []
+        start = time.perf_counter()
+        for _ in range(n):
+            hashes.append(solve(gate.issue(bits))[1])
+        elapsed = (time.perf_counter() - start) / n
+        print(f"{bits:>4} {2 ** bits:>16,} {statistics.fmean(hashes):>10,.0f} {elapsed * 1000:>9.1f}ms")
+
+
+def _grids() -> int:
+    from app.challenge_pool import challenges
+
+    s = challenges.stats()["first"]
+    return s["hits"] + s["misses"]
+
+
+async def flood_loop(client, deadline: float, counts: dict):
+    while time.perf_counter() < deadline:
+        r = await client.get("/first/question")
+        counts[r.status_code] = counts.get(r.status_code, 0) + 1
+        # ASGITransport 요청은 실제로 기다리는 일이 없어서 양보하지 않으면 한 클라이언트가 이벤트 루프를 독차지함
+        await asyncio.sleep(0)
+
+
+async def honest_loop(client, deadline: float, waits: list, interval: float = 2.0):
+    from app.proof_of_work import solve
+
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        r = await client.get("/first/question")
+        if r.status_code == 428:
+            # 실제 브라우저는 서버와 다른 CPU에서 풀지만 여기서는 같은 프로세스 스레드에서 풀므로 서버를 조금 늦춤
+            solution, _ = await asyncio.to_thread(solve, r.json()["pow"])
+            r = await client.get("/first/question", params={"pow": solution})
+        if r.status_code == 200:
+            waits.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+
+async def run_flood(app, gated: bool, flooders: int, seconds: float) -> dict:
+    from app import proof_of_work
+
+    gate = proof_of_work.ProofOfWorkGate()
+    target = proof_of_work.ProofOfWorkMiddleware(app, gate) if gated else app
+    counts, waits, difficulty = {}, [], []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=target), base_url="http://bench") as client:
+        grids = _grids()
+        start = time.perf_counter()
+        deadline = start + seconds
+
+        async def watch():
+            while time.perf_counter() < deadline:
+                difficulty.append(gate.difficulty())
+                await asyncio.sleep(0.5)
+
+        await asyncio.gather(watch(), honest_loop(client, deadline, waits),
+                             *(flood_loop(client, deadline, counts) for _ in range(flooders)))
+        elapsed = time.perf_counter() - start
+        built = _grids() - grids
+    requests = sum(counts.values())
+    # 한 프로세스에서 모든 요청을 차례로 처리하므로 걸린 시간 / 요청 수 = 요청 하나에 든 CPU 시간 (클라이언트 쪽 포함)
+    return {"gated": gated, "requests": requests / elapsed, "grids": built / elapsed, "counts": counts,
+            "server_ms": elapsed * 1000 / requests if requests else None,
+            "difficulty": max(difficulty) if difficulty else None, "honest_ms": waits}
+
+
+async def bench_flood(args):
+    from app.main import app, lifespan
+
+    print(f"\n/first/question flood over ASGI: {args.flooders} clients that never solve + 1 client every 2 s, "
+          f"{args.seconds:.0f} s each")
+    print(f"{'gate':<5} {'requests/s':>10} {'grids/s':>8} {'ms/request':>11} {'max bits':>9}  honest client wait")
+    async with lifespan(app):
+        for gated in (False, True):
+            r = await run_flood(app, gated, args.flooders, args.seconds)
+            waits = r["honest_ms"]
+            honest = (f"{statistics.median(waits) * 1000:.0f} ms median over {len(waits)}" if waits else "none served")
+            bits = "-" if not gated else r["difficulty"]
+            print(f"{'on' if gated else 'off':<5} {r['requests']:>10.0f} {r['grids']:>8.1f} {r['server_ms']:>11.3f} "
+                  f"{bits:>9}  {honest}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=20000)
+    parser.add_argument("--flooders", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 관문은 벤치마크에서 직접 감싸므로 앱 설정으로는 끔
+        os.environ.update(RWCAPTCHA_RATE_LIMIT="0", RWCAPTCHA_POW="0", RWCAPTCHA_SECRET="bench-pow-secret")
+        sys.path.insert(0, BACKEND_DIR)
+        os.chdir(tmp)
+        database_url = f"sqlite:///{os.path.join(tmp, 'results.db')}"
+        os.environ["RWCAPTCHA_DATABASE_URL"] = database_url
+        bench_verify()
+        bench_solve()
+        seed_library(database_url, args.images, parse_labels(DEFAULT_LABELS))
+        asyncio.run(bench_flood(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# bench_ratelimit.py
+# 요청 제한 미들웨어의 요청당 오버헤드와 키 수에 따른 메모리 사용량 측정
+# 실행: backend 폴더에서 python -m benchmarks.bench_ratelimit [--requests 200000] [--keys 1000000]
+#  1) limiter.hit 단독 호출 (키 1개 / 매번 다른 키)
+#  2) 빈 ASGI 앱을 미들웨어로 감쌌을 때와 감싸지 않았을 때 한 요청 처리 시간의 차이
+#  3) --keys 개의 서로 다른 클라이언트 키를 넣었을 때 메모리 사용량과 세대 교체 후 남는 키 수
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from app import ratelimit
+
+LIMITS = {"first": (1e9, 10 ** 9)}  # 측정 중에는 거부되지 않도록 아주 큰 제한
+
+
+async def bench_hit(requests: int, distinct: bool):
+    limiter = ratelimit.RateLimiter(LIMITS)
+    clients = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(requests)] if distinct \
+        else ["10.0.0.1"] * requests
+    start = time.perf_counter()
+    for client in clients:
+        await limiter.hit("first", client)
+    elapsed = time.perf_counter() - start
+    name = "distinct keys" if distinct else "single key"
+    print(f"limiter.hit ({name:<13}) {elapsed / requests * 1e9:>8.0f} ns/request")
+
+
+async def empty_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def time_app(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scopes = [{"type": "http", "method": "GET", "path": "/first/question", "headers": [],
+               "client": (f"10.0.{i >> 8 & 255}.{i & 255}", 50000)} for i in range(1000)]
+    start = time.perf_counter()
+    for i in range(requests):
+        await app(scopes[i % 1000], receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+async def bench_middleware(requests: int):
+    bare = await time_app(empty_app, requests)
+    wrapped = await time_app(ratelimit.RateLimitMiddleware(empty_app, ratelimit.RateLimiter(LIMITS)), requests)
+    print(f"ASGI empty app            {bare * 1e9:>8.0f} ns/request")
+    print(f"ASGI + RateLimitMiddleware {wrapped * 1e9:>7.0f} ns/request (overhead {(wrapped - bare) * 1e9:.0f} ns)")
+
+
+async def bench_memory(keys: int):
+    # 측정 중에 세대 교체가 일어나지 않도록 주기를 길게
+    limiter = ratelimit.RateLimiter(backend=ratelimit.MemoryBackend(period=3600))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(keys):
+        await limiter.hit("first", f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}:{i >> 24}")
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"memory for {len(limiter.backend)} keys: {used / 1024 / 1024:.1f} MB ({used / keys:.0f} bytes/key)")
+    # 두 번의 세대 교체가 지나면 그동안 요청이 없던 키는 모두 사라짐
+    backend = limiter.backend
+    for _ in range(2):
+        backend._rotated_at -= backend.period
+        await limiter.hit("first", "10.0.0.1")
+    print(f"keys after two idle periods: {len(backend)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--keys", type=int, default=1000000)
+    args = parser.parse_args()
+
+    asyncio.run(bench_hit(args.requests, distinct=False))
+    asyncio.run(bench_hit(args.requests, distinct=True))
+    asyncio.run(bench_middleware(args.requests))
+    asyncio.run(bench_memory(args.keys))
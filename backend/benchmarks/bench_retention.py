@@ -0,0 +1,80 @@
+# bench_retention.py
+# 보존 기간 정리(app/retention.py)가 있을 때와 없을 때, 기록이 쌓이면서 결과 저장 지연과 DB 크기가 어떻게 변하는지 비교
+# 실행: backend 폴더에서 python -m benchmarks.bench_retention [일 수] [하루 행 수] [보존 기간(일)]
+# 하루씩 시간을 진행하며 그날의 results_second 행을 writer.py 처럼 500행 배치로 저장하고 배치 저장 시간을 잼
+# 보존 기간 정리를 켠 쪽은 하루가 끝날 때마다 run_once 를 돌림 (서버의 주기 작업과 같음)
+# 이어서 테이블 전체 집계(SELECT count, sum) 시간과 DB 파일 크기 (WAL 포함)를 함께 출력
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app import database, models, retention
+from app.database import Base
+
+LABELS = ["cardboard", "glass", "metal", "paper", "plastic", "trash"]
+WRITE_BATCH = 500
+
+
+def day_rows(rng: random.Random, day: datetime, n: int):
+    return [{"is_correct": rng.random() < 0.8,
+             "asked_questions": ",".join(str(rng.randrange(1, 100_000)) for _ in range(5)),
+             "selected_answers": ",".join(rng.choice(LABELS) for _ in range(5)),
+             "timestamp": day + timedelta(seconds=86400 * i / n)} for i in range(n)]
+
+
+def db_size(path: str) -> int:
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def run(days: int, per_day: int, keep: float, compact: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = database.make_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        rng = random.Random(0)
+        start = datetime(2026, 1, 1)
+        label = f"retention {keep:g} days" if compact else "no retention"
+        print(f"\n[{label}] {per_day:,} rows/day")
+        print(f"  {'day':>5} {'rows':>10} {'insert p50':>11} {'insert p99':>11} {'count(*)':>9} {'db size':>9} {'compact':>9}")
+        latencies = []
+        compact_seconds = 0.0
+        with Session(bind=engine) as db:
+            for d in range(days):
+                day = start + timedelta(days=d)
+                rows = day_rows(rng, day, per_day)
+                for i in range(0, per_day, WRITE_BATCH):
+                    t = time.perf_counter()
+                    db.execute(insert(models.ResultSecond), rows[i:i + WRITE_BATCH])
+                    db.commit()
+                    latencies.append(time.perf_counter() - t)
+                if compact:
+                    t = time.perf_counter()
+                    retention.run_once(db, keep, now=day + timedelta(days=1), export_dir=None, pause=0)
+                    compact_seconds = time.perf_counter() - t
+                if (d + 1) % max(1, days // 8) == 0 or d == days - 1:
+                    t = time.perf_counter()
+                    count = db.scalar(select(func.count()).select_from(models.ResultSecond))
+                    db.scalar(select(func.sum(models.ResultSecond.is_correct.cast(models.Integer))))
+                    query = time.perf_counter() - t
+                    latencies.sort()
+                    p50 = statistics.median(latencies)
+                    p99 = latencies[int(len(latencies) * 0.99)]
+                    print(f"  {d + 1:>5} {count:>10,} {p50 * 1000:>9.2f}ms {p99 * 1000:>9.2f}ms {query * 1000:>7.1f}ms"
+                          f" {db_size(path) / 1e6:>7.1f}MB {compact_seconds * 1000:>7.0f}ms")
+                    latencies = []
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    keep = float(sys.argv[3]) if len(sys.argv) > 3 else 14
+    run(days, per_day, keep, compact=False)
+    run(days, per_day, keep, compact=True)
@@ -0,0 +1,113 @@
+# bench_workers.py
+# 여러 워커로 실행할 때 워커 하나의 시작 비용: image_paths 전체 조회 vs 미리 만든 이미지 인덱스 파일(mmap) 열기
+# 실행: backend 폴더에서 python -m benchmarks.bench_workers [행 수 ...]
+# 워커마다 새 프로세스에서 이미지 풀을 로드하고 로드 시간과 프로세스 메모리(/proc/self/smaps_rollup)를 측정
+#  - Private: 그 워커만 쓰는 메모리 (워커 수만큼 늘어남)
+#  - Shared: 다른 워커와 같이 쓰는 페이지 (인덱스 파일, 워커가 여럿이어도 한 벌)
+# 이어서 챌린지 상태 저장소별 제출 한 건(attempt)의 비용 비교
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from benchmarks.bench_image_pool import seed
+
+WORKER = """
+import json, sys, time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.image_pool import ImagePool
+from app.image_stats import ImageStats
+
+def memory():
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Private_Clean", "Private_Dirty", "Shared_Clean", "Shared_Dirty"):
+                values[name] = int(rest.split()[0])
+    return values
+
+db = sessionmaker(bind=create_engine(sys.argv[1]))()
+before = memory()
+pool = ImagePool(ImageStats(), sys.argv[2])
+start = time.perf_counter()
+pool.load(db, 1.0)
+elapsed = time.perf_counter() - start
+pool.sample_classified(15)
+after = memory()
+private = sum(after[k] - before[k] for k in ("Private_Clean", "Private_Dirty"))
+shared = sum(after[k] - before[k] for k in ("Shared_Clean", "Shared_Dirty"))
+print(json.dumps({"seconds": elapsed, "private_kb": private, "shared_kb": shared, "images": len(pool)}))
+"""
+
+
+def worker(url: str, index_path: str, sharers: int = 0) -> dict:
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    # 다른 워커가 이미 인덱스 파일을 열고 있는 상황 (페이지가 Shared로 잡힘)
+    holders = [subprocess.Popen([sys.executable, "-c", "import mmap, sys, time\n"
+                                 "f = open(sys.argv[1], 'rb'); m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)\n"
+                                 "sum(m[i] for i in range(0, len(m), 4096)); print(flush=True); time.sleep(60)",
+                                 index_path], stdout=subprocess.PIPE, text=True) for _ in range(sharers)]
+    try:
+        for holder in holders:
+            holder.stdout.readline()
+        out = subprocess.run([sys.executable, "-c", WORKER, url, index_path], env=env, check=True,
+                             capture_output=True, text=True).stdout
+    finally:
+        for holder in holders:
+            holder.kill()
+            holder.wait()
+    return json.loads(out)
+
+
+def bench_store(tmp: str, n: int = 20000):
+    from app import state
+
+    stores = {"memory": state.MemoryChallengeStore(),
+              "sqlite": state.SqliteChallengeStore(os.path.join(tmp, "challenge_state.db"))}
+    expires_at = time.time() + 300
+    for name, store in stores.items():
+        ids = [os.urandom(16) for _ in range(n)]
+        start = time.perf_counter()
+        for challenge_id in ids:
+            store.attempt(challenge_id, expires_at, 2)
+        first = (time.perf_counter() - start) / n
+        start = time.perf_counter()
+        for challenge_id in ids:
+            store.attempt(challenge_id, expires_at, 2)
+            store.attempt(challenge_id, expires_at, 2)  # 이미 다 쓴 챌린지 (거부)
+        again = (time.perf_counter() - start) / (2 * n)
+        print(f"  {name:<7} attempt: new {first * 1e6:6.1f} us, existing {again * 1e6:6.1f} us")
+
+
+def run(n: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            seed(db, n)
+        engine.dispose()
+        index_path = os.path.join(tmp, "image_index.bin")
+
+        query = worker(url, "")
+        build = worker(url, index_path)  # 첫 워커: DB 조회 후 인덱스 파일 생성
+        mapped = worker(url, index_path, sharers=1)  # 나머지 워커: 파일 열기만
+        print(f"\n[{n:,} rows] index file {os.path.getsize(index_path) / 1e6:.1f} MB")
+        for name, result in (("query (1 worker)", query), ("build index", build), ("map index", mapped)):
+            print(f"  {name:<17} load {result['seconds'] * 1000:8.1f} ms   private {result['private_kb'] / 1024:7.1f} MB"
+                  f"   shared {result['shared_kb'] / 1024:6.1f} MB")
+        bench_store(tmp)
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+    for n in sizes:
+        run(n)
@@ -0,0 +1,80 @@
+# check_consensus.py
+# 서버 시작 시 피드백 집계(consensus.load)의 승격 판정 회귀 검사 (틀리면 종료 코드 1)
+# 예) python check_consensus.py
+# 임시 SQLite DB에 미분류 이미지와 피드백(원본 + 보존 기간이 지나 접힌 요약)을 넣고 load 결과를 확인
+#  - 표가 반으로 갈린 이미지(glass 5, metal 5)는 승격되지 않아야 함
+#  - 원본과 요약에 나뉘어 있는 표도 합쳐서 한 번만 판정 (glass 원본 3 + 요약 3, metal 원본 1 -> glass로 한 번 승격)
+#  - 표가 모자란 이미지는 그대로
+import os
+import sys
+import tempfile
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy.orm import Session
+
+from app import database, models
+from app.consensus import LabelConsensus
+from app.image_pool import UNCLASSIFIED
+
+SPLIT, SPREAD, FEW = (uuid.UUID(int=i) for i in range(1, 4))
+
+# (이미지, 라벨, 원본 피드백 수, 요약 득표수)
+VOTES = [
+    (SPLIT, "glass", 5, 0), (SPLIT, "metal", 5, 0),
+    (SPREAD, "glass", 3, 3), (SPREAD, "metal", 1, 0),
+    (FEW, "glass", 2, 0),
+]
+EXPECTED = {SPREAD: "glass"}
+
+
+def seed(db: Session):
+    for image_uuid in (SPLIT, SPREAD, FEW):
+        db.add(models.ImagePath(uuid=image_uuid, path=f"{image_uuid}.jpg", label=UNCLASSIFIED))
+    for image_uuid, label, raw, archived in VOTES:
+        for _ in range(raw):
+            db.add(models.UnclassifiedFeedback(image_uuid=image_uuid, user_assigned_label=label,
+                                               timestamp=datetime(2026, 1, 2)))
+        if archived:
+            db.add(models.DailyLabelVotes(image_uuid=image_uuid, label=label, day=date(2026, 1, 1), votes=archived))
+    db.commit()
+
+
+def check(db: Session) -> int:
+    consensus = LabelConsensus(min_votes=5, min_confidence=0.8)
+    decided = consensus.load(db)
+    failed = 0
+    promoted = {}
+    for image_uuid, label in decided:
+        if image_uuid in promoted:
+            print(f"FAIL {image_uuid}: 두 번 승격됨 ({promoted[image_uuid]}, {label})")
+            failed += 1
+        promoted[image_uuid] = label
+    for image_uuid in (SPLIT, SPREAD, FEW):
+        expected = EXPECTED.get(image_uuid)
+        stored = db.query(models.ImagePath.label).filter(models.ImagePath.uuid == image_uuid).scalar()
+        ok = promoted.get(image_uuid) == expected and stored == (expected or UNCLASSIFIED)
+        print(f"{'ok  ' if ok else 'FAIL'} {image_uuid}: 승격 {promoted.get(image_uuid)}, DB 라벨 {stored}")
+        failed += not ok
+    if consensus.promoted != len(EXPECTED):
+        print(f"FAIL 승격 수 {consensus.promoted} (기대 {len(EXPECTED)})")
+        failed += 1
+    return failed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = database.make_engine(f"sqlite:///{os.path.join(tmp, 'consensus.db')}")
+        database.Base.metadata.create_all(bind=engine)
+        with Session(bind=engine) as db:
+            seed(db)
+            failed = check(db)
+        engine.dispose()
+    if failed:
+        print(f"잘못된 판정 {failed}건")
+        sys.exit(1)
+    print("승격 판정이 올바릅니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# check_query_plans.py
+# 자주 실행되는 쿼리가 인덱스를 타는지 EXPLAIN으로 확인하는 회귀 검사 (전체 테이블 스캔이 있으면 종료 코드 1)
+# 예) python check_query_plans.py                 (임시 SQLite DB를 모델로 만들어서 검사)
+#     python check_query_plans.py --url postgresql://user:pw@localhost/rwcaptcha   (alembic upgrade head 된 DB)
+# SQLite: EXPLAIN QUERY PLAN 결과에 "SCAN <테이블>"이 있으면 실패
+# PostgreSQL: enable_seqscan=off 로 두고도 Seq Scan 이 나오면 (쓸 수 있는 인덱스가 없으면) 실패
+import argparse
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.orm import Session
+
+from app import consensus, database, export, models, retention
+from app.image_pool import UNCLASSIFIED, ImagePool
+
+SAMPLE_UUIDS = [uuid.UUID(int=i) for i in range(1, 4)]
+
+
+# (이름, 쿼리)
+def hot_queries(db: Session):
+    ImagePath, Feedback = models.ImagePath, models.UnclassifiedFeedback
+    return [
+        ("crud.get_image_path", select(ImagePath).where(ImagePath.uuid == SAMPLE_UUIDS[0])),
+        ("crud.get_image_data", select(ImagePath).where(ImagePath.uuid.in_(SAMPLE_UUIDS))),
+        ("crud.get_unclassified_random_images",
+         select(ImagePath).where(ImagePath.label == UNCLASSIFIED).order_by(func.random()).limit(3)),
+        ("label count", select(func.count()).where(ImagePath.label == "glass")),
+        ("image_pool.refresh", ImagePool()._query(db, 1000).statement),
+        ("consensus.load", consensus.tally_query(db).statement),
+        ("consensus.load (archived)", consensus.archived_tally_query(db).statement),
+        ("consensus._save_promotion",
+         update(ImagePath).where(ImagePath.uuid == SAMPLE_UUIDS[0], ImagePath.label == UNCLASSIFIED)
+         .values(label="glass")),
+        ("admin label update", update(ImagePath).where(ImagePath.uuid == SAMPLE_UUIDS[0]).values(label="glass")),
+        ("feedback votes for image",
+         select(Feedback.user_assigned_label, func.count()).where(Feedback.image_uuid == SAMPLE_UUIDS[0])
+         .group_by(Feedback.user_assigned_label)),
+        *((f"export.{table}", export.export_query(table, (datetime(2026, 1, 1), 0), datetime(2026, 1, 2)))
+          for table in export.TABLES),
+        *((f"retention.{table}", retention.compact_statement(table, datetime(2026, 1, 1)))
+          for table in retention.SOURCES),
+    ]
+
+
+def full_scans(conn, sql: str):
+    if conn.dialect.name == "sqlite":
+        plan = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+        bad = [line for line in plan if line.startswith("SCAN ")]
+    else:
+        plan = [row[0] for row in conn.exec_driver_sql("EXPLAIN " + sql)]
+        bad = [line for line in plan if "Seq Scan" in line]
+    return plan, bad
+
+
+def check(engine) -> int:
+    failed = 0
+    with engine.connect() as conn, Session(bind=conn) as db:
+        if conn.dialect.name != "sqlite":
+            conn.execute(text("SET enable_seqscan = off"))
+        for name, stmt in hot_queries(db):
+            sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+            plan, bad = full_scans(conn, sql)
+            print(f"{'FAIL' if bad else 'ok  '} {name}")
+            for line in plan:
+                print(f"       {line}")
+            failed += bool(bad)
+        conn.rollback()
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="자주 실행되는 쿼리의 실행 계획 검사")
+    parser.add_argument("--url", help="검사할 DB (기본: 모델로 만든 임시 SQLite DB)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'plans.db')}"
+        engine = database.make_engine(url)
+        if not args.url:
+            database.Base.metadata.create_all(bind=engine)
+        failed = check(engine)
+        engine.dispose()
+    if failed:
+        print(f"전체 스캔하는 쿼리 {failed}개")
+        sys.exit(1)
+    print("모든 쿼리가 인덱스를 사용합니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# dedup.py
+# 이미 적재된 이미지 라이브러리에서 거의 같은 이미지를 찾아 정리하는 일회성 CLI
+#  1) 지각 해시(dHash)가 없는 이미지의 해시 계산
+#  2) 먼저 적재된 이미지를 원본으로 두고 나머지 중복에 duplicate_of 기록 (이미지 풀 샘플링에서 제외, 파일/피드백은 유지)
+# 예) python dedup.py --storage-root ./img --dry-run
+#     python dedup.py --storage-root ./img --max-distance 4
+# 실행 전에 alembic upgrade head 로 phash, duplicate_of 컬럼을 추가해야 함
+import argparse
+
+from app import catalog, database, dedup, ingest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="rwCAPTCHA 중복 이미지 정리")
+    parser.add_argument("--storage-root", default=ingest.STORAGE_ROOT, help="이미지가 저장된 폴더 (기본: RWCAPTCHA_IMAGE_ROOT 또는 ./img)")
+    parser.add_argument("--max-distance", type=int, default=dedup.MAX_DISTANCE, help="중복으로 볼 최대 해밍 거리")
+    parser.add_argument("--workers", type=int, help="해시 계산 작업자 수")
+    parser.add_argument("--dry-run", action="store_true", help="DB를 바꾸지 않고 찾은 중복만 출력")
+    args = parser.parse_args()
+
+    db = database.SessionLocal()
+    try:
+        # dry run 이면 계산한 해시도 저장하지 않고 메모리에 둔 채 중복 검사에만 사용
+        hashed, failed, unsaved = dedup.backfill_hashes(db, args.storage_root, workers=args.workers,
+                                                        dry_run=args.dry_run)
+        print(f"해시 계산 {hashed}개, 실패 {failed}개")
+        found = dedup.mark_duplicates(db, args.max_distance, dry_run=args.dry_run, hashes=unsaved)
+        for duplicate, original, distance in found:
+            print(f"{duplicate} -> {original} (거리 {distance})")
+        print(f"중복 {len(found)}개{' (dry run, 저장하지 않음)' if args.dry_run else ''}")
+        if found and not args.dry_run:
+            catalog.touch_stamp()  # 실행 중인 서버가 이미지 풀을 다시 읽도록
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
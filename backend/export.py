@@ -0,0 +1,38 @@
+# export.py
+# results, results_second, unclassified_feedback 을 날짜별 Parquet/Arrow 파일로 증분 내보내는 CLI (app/export.py)
+# 처음 실행하면 전체를, 이후에는 <출력 폴더>/_watermark.json 에 기록된 지점 다음부터 내보냄 (cron 등으로 주기 실행)
+# 예) python export.py
+#     python export.py --out /data/rwcaptcha --tables results_second --format arrow
+#     python export.py --url postgresql://user:pw@localhost/rwcaptcha
+# pyarrow 필요 (pip install pyarrow)
+import argparse
+import sys
+
+from sqlalchemy.orm import Session
+
+from app import database, export
+
+
+def main():
+    parser = argparse.ArgumentParser(description="결과/피드백 테이블 열 단위 내보내기")
+    parser.add_argument("--url", help="DB 주소 (기본: RWCAPTCHA_DATABASE_URL)")
+    parser.add_argument("--out", default=export.EXPORT_DIR, help="출력 폴더")
+    parser.add_argument("--tables", nargs="+", choices=list(export.TABLES), help="내보낼 테이블 (기본: 전부)")
+    parser.add_argument("--format", choices=list(export.FORMATS), default="parquet")
+    parser.add_argument("--batch-size", type=int, default=export.BATCH_SIZE, help="한 번에 읽는 행 수")
+    parser.add_argument("--lag", type=float, default=export.LAG_SECONDS, help="최근 몇 초는 다음 실행으로 미룸")
+    args = parser.parse_args()
+
+    if export.pa is None:
+        sys.exit("pyarrow 패키지가 필요합니다. (pip install pyarrow)")
+    engine = database.make_engine(args.url) if args.url else database.engine
+    with Session(bind=engine) as db:
+        for result in export.export_all(db, args.tables, out_dir=args.out, fmt=args.format,
+                                        batch_size=args.batch_size, lag=args.lag):
+            mark = result["watermark"]
+            until = f", 워터마크 {mark['timestamp']} #{mark['id']}" if mark else ""
+            print(f"{result['table']}: {result['rows']}행, 파일 {result['files']}개{until}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# ingest.py
+# 이미지 폴더를 비대화형으로 대량 적재하는 CLI
+# 예) python ingest.py ./dataset --storage-root ./img --source-name trashnet
+#     python ingest.py ./new_images --label unclassified --storage-root ./img
+# 하위 폴더 이름이 라벨이 되며(--label 지정 시 폴더 안 파일 전체가 그 라벨), 중단된 경우 같은 명령으로 다시 실행하면 이어서 적재
+import argparse
+
+from app import database, ingest
+
+
+# 프로세스 풀(spawn 방식, Windows)에서 이 스크립트가 다시 실행되지 않도록 main 으로 감쌈
+def main():
+    parser = argparse.ArgumentParser(description="rwCAPTCHA 이미지 대량 적재")
+    parser.add_argument("source", nargs="?", help="이미지 폴더 (하위 폴더 = 라벨) 또는 단일 파일")
+    parser.add_argument("--label", help="모든 이미지에 붙일 라벨 (예: unclassified)")
+    parser.add_argument("--storage-root", default=ingest.STORAGE_ROOT, help="이미지를 저장할 폴더 (기본: RWCAPTCHA_IMAGE_ROOT 또는 ./img)")
+    parser.add_argument("--source-name", help="출처 이름")
+    parser.add_argument("--workers", type=int, help="복사/해시 작업자 수")
+    parser.add_argument("--processes", action="store_true", help="스레드 대신 프로세스 풀 사용")
+    parser.add_argument("--batch-size", type=int, default=ingest.BATCH_SIZE, help="한 번에 insert 할 행 수")
+    parser.add_argument("--journal", help="재시작용 저널 파일 경로 (기본: 저장 폴더/ingest_journal.jsonl)")
+    parser.add_argument("--move", action="store_true",
+                        help="복사 대신 원본을 이동 (중단 시 마지막 배치의 원본은 저장 폴더에만 남음)")
+    parser.add_argument("--no-variants", action="store_true", help="축소 WebP 변형(tile, large)을 만들지 않음")
+    parser.add_argument("--duplicates", choices=ingest.DUPLICATE_POLICIES, default="reject",
+                        help="이미 있는 이미지와 거의 같은 이미지 처리 방식 (기본: reject, 기존 라이브러리 정리는 dedup.py)")
+    parser.add_argument("--backfill-variants", action="store_true", help="이미 적재된 이미지 중 변형이 없는 이미지에 변형 생성")
+    args = parser.parse_args()
+    if not args.source and not args.backfill_variants:
+        parser.error("source 또는 --backfill-variants 가 필요합니다.")
+
+    database.ensure_schema()
+    db = database.SessionLocal()
+    try:
+        if args.backfill_variants:
+            report = ingest.backfill_variants(db, storage_root=args.storage_root, workers=args.workers)
+            print(report.line())
+        if args.source:
+            report = ingest.run(
+                db, ingest.scan(args.source, args.label),
+                storage_root=args.storage_root,
+                source_name=args.source_name,
+                workers=args.workers,
+                batch_size=args.batch_size,
+                use_processes=args.processes,
+                move=args.move,
+                journal_path=args.journal,
+                make_variants=False if args.no_variants else None,
+                duplicates=args.duplicates,
+            )
+            print(report.line())
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from sqlalchemy import pool
 from alembic import context
 
 import app.models
+from app.database import SQLALCHEMY_DATABASE_URL, is_sqlite
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -16,6 +17,12 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# 서버와 같은 DB를 대상으로 하도록 alembic.ini 대신 RWCAPTCHA_DATABASE_URL 사용 (app/database.py)
+# alembic -x url=... upgrade head 로 다른 DB를 지정할 수도 있음
+config.set_main_option(
+    "sqlalchemy.url", context.get_x_argument(as_dictionary=True).get("url", SQLALCHEMY_DATABASE_URL)
+)
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
@@ -46,6 +53,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=is_sqlite(url),
     )
 
     with context.begin_transaction():
@@ -66,8 +74,10 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # SQLite는 ALTER TABLE 지원이 제한적이라 컬럼 변경/삭제를 테이블 재생성(batch)으로 처리
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
         )
 
         with context.begin_transaction():
@@ -0,0 +1,45 @@
+"""add image_variants
+
+Revision ID: 3f1c9a2b7d40
+Revises: 5d2e8c1f4a90
+Create Date: 2026-10-18 10:12:31.204118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a2b7d40'
+down_revision: Union[str, Sequence[str], None] = '5d2e8c1f4a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 이전 버전의 서버/적재 스크립트가 create_all로 이미 만든 DB가 있으므로 없을 때만 만듦
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('image_variants'):
+        op.create_table('image_variants',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('image_uuid', sa.UUID(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('bytes', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['image_uuid'], ['image_paths.uuid'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_image_variants_id'), 'image_variants', ['id'], unique=False)
+        op.create_index(op.f('ix_image_variants_image_uuid'), 'image_variants', ['image_uuid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_image_variants_image_uuid'), table_name='image_variants')
+    op.drop_index(op.f('ix_image_variants_id'), table_name='image_variants')
+    op.drop_table('image_variants')
@@ -0,0 +1,65 @@
+"""bring schema in line with models on every backend
+
+Revision ID: 5d2e8c1f4a90
+Revises: 7a7063ef1ab6
+Create Date: 2026-10-18 14:21:09.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8c1f4a90'
+down_revision: Union[str, Sequence[str], None] = '7a7063ef1ab6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 기존 SQLite DB에는 create_all로 만들어진 테이블이 있고 빈 DB(PostgreSQL 등)에는 없으므로 상태를 보고 맞춤
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if 'category_asked' not in {c['name'] for c in inspector.get_columns('results')}:
+        with op.batch_alter_table('results') as batch_op:
+            batch_op.add_column(sa.Column('category_asked', sa.String(), nullable=False, server_default=''))
+
+    # PostgreSQL은 외래 키가 참조하는 컬럼에 unique 제약(인덱스)이 있어야 함
+    if 'ix_image_paths_uuid' not in {i['name'] for i in inspector.get_indexes('image_paths')}:
+        op.create_index(op.f('ix_image_paths_uuid'), 'image_paths', ['uuid'], unique=True)
+
+    if not inspector.has_table('results_second'):
+        op.create_table('results_second',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('is_correct', sa.Boolean(), nullable=True),
+        sa.Column('asked_questions', sa.String(), nullable=True),
+        sa.Column('selected_answers', sa.String(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_results_second_id'), 'results_second', ['id'], unique=False)
+
+    if not inspector.has_table('unclassified_feedback'):
+        op.create_table('unclassified_feedback',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('image_uuid', sa.UUID(), nullable=False),
+        sa.Column('user_assigned_label', sa.String(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.Column('is_correct_main_captcha', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['image_uuid'], ['image_paths.uuid'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_unclassified_feedback_id'), 'unclassified_feedback', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # results_second, unclassified_feedback은 이전에도 create_all로 만들어지던 테이블이라 남겨 둠
+    # (PostgreSQL에서는 그 외래 키가 uuid unique 인덱스를 참조하므로 인덱스도 남겨 둠)
+    if op.get_bind().dialect.name == 'sqlite':
+        op.drop_index(op.f('ix_image_paths_uuid'), table_name='image_paths')
+    with op.batch_alter_table('results') as batch_op:
+        batch_op.drop_column('category_asked')
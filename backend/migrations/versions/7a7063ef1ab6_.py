@@ -21,15 +21,17 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     """Upgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.create_table('results',
-    sa.Column('id', sa.Integer(), nullable=False),
-    sa.Column('is_correct', sa.Boolean(), nullable=True),
-    sa.Column('selected_indices', sa.String(), nullable=True),
-    sa.Column('timestamp', sa.DateTime(), nullable=True),
-    sa.Column('category_asked', sa.String(), nullable=False),
-    sa.PrimaryKeyConstraint('id')
-    )
-    op.create_index(op.f('ix_results_id'), 'results', ['id'], unique=False)
+    # 22d54a87ebd1 에서 이미 만든 경우(빈 DB에서 처음부터 올릴 때)는 건너뜀, category_asked는 5d2e8c1f4a90 에서 추가
+    if not sa.inspect(op.get_bind()).has_table('results'):
+        op.create_table('results',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('is_correct', sa.Boolean(), nullable=True),
+        sa.Column('selected_indices', sa.String(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.Column('category_asked', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_results_id'), 'results', ['id'], unique=False)
     #op.alter_column('image_paths', 'uuid',
     #           existing_type=sa.NUMERIC(),
     #           type_=sa.UUID(),
@@ -0,0 +1,33 @@
+"""add perceptual hash and duplicate link to image_paths
+
+Revision ID: 8b52e0d4c9a1
+Revises: 3f1c9a2b7d40
+Create Date: 2026-10-18 11:02:47.551930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b52e0d4c9a1'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a2b7d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('image_paths', sa.Column('phash', sa.BigInteger(), nullable=True))
+    op.add_column('image_paths', sa.Column('duplicate_of', sa.UUID(), nullable=True))
+    op.create_index(op.f('ix_image_paths_phash'), 'image_paths', ['phash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_image_paths_phash'), table_name='image_paths')
+    with op.batch_alter_table('image_paths') as batch_op:
+        batch_op.drop_column('duplicate_of')
+        batch_op.drop_column('phash')
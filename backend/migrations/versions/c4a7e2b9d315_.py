@@ -0,0 +1,49 @@
+"""uuid columns as Uuid and indexes for hot lookups
+
+Revision ID: c4a7e2b9d315
+Revises: 8b52e0d4c9a1
+Create Date: 2026-10-18 15:40:52.102847
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e2b9d315'
+down_revision: Union[str, Sequence[str], None] = '8b52e0d4c9a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (테이블, 컬럼) - SQLite에서 UUID(NUMERIC 친화성) -> CHAR(32)(TEXT 친화성)
+UUID_COLUMNS = [
+    ('image_paths', 'uuid'),
+    ('image_paths', 'duplicate_of'),
+    ('image_variants', 'image_uuid'),
+    ('unclassified_feedback', 'image_uuid'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # PostgreSQL은 두 타입 모두 네이티브 uuid 이므로 바꿀 것이 없음
+    if op.get_bind().dialect.name == 'sqlite':
+        for table in dict.fromkeys(t for t, _ in UUID_COLUMNS):
+            with op.batch_alter_table(table) as batch_op:
+                for _, column in (c for c in UUID_COLUMNS if c[0] == table):
+                    batch_op.alter_column(column, existing_type=sa.UUID(), type_=sa.Uuid())
+    op.create_index('ix_image_paths_label_id', 'image_paths', ['label', 'id'], unique=False)
+    op.create_index('ix_unclassified_feedback_image_label', 'unclassified_feedback',
+                    ['image_uuid', 'user_assigned_label'], unique=False)
+    op.create_index('ix_unclassified_feedback_timestamp', 'unclassified_feedback', ['timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_unclassified_feedback_timestamp', table_name='unclassified_feedback')
+    op.drop_index('ix_unclassified_feedback_image_label', table_name='unclassified_feedback')
+    op.drop_index('ix_image_paths_label_id', table_name='image_paths')
+    # uuid 컬럼 타입은 되돌리지 않음: NUMERIC 친화성으로 다시 복사하면 숫자처럼 보이는 uuid가 실수로 바뀌어
+    # 값이 깨지거나 unique 인덱스가 충돌함 (CHAR(32)도 이전 모델에서 그대로 읽고 쓸 수 있음)
@@ -0,0 +1,30 @@
+"""timestamp indexes on results tables for export
+
+Revision ID: e6b1d07a3f52
+Revises: c4a7e2b9d315
+Create Date: 2026-10-18 18:12:04.531920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b1d07a3f52'
+down_revision: Union[str, Sequence[str], None] = 'c4a7e2b9d315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_results_timestamp', 'results', ['timestamp'], unique=False)
+    op.create_index('ix_results_second_timestamp', 'results_second', ['timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_results_second_timestamp', table_name='results_second')
+    op.drop_index('ix_results_timestamp', table_name='results')
@@ -0,0 +1,49 @@
+"""daily summary tables for retention
+
+Revision ID: f3a8c61e2d07
+Revises: e6b1d07a3f52
+Create Date: 2026-10-18 19:27:41.880213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8c61e2d07'
+down_revision: Union[str, Sequence[str], None] = 'e6b1d07a3f52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 이전 버전의 서버가 create_all로 이미 만든 DB가 있으므로 없는 테이블만 만듦
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('daily_result_summary'):
+        op.create_table('daily_result_summary',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('mode', sa.String(), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('passed', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'mode', 'category')
+        )
+
+    if not inspector.has_table('daily_label_votes'):
+        op.create_table('daily_label_votes',
+        sa.Column('image_uuid', sa.Uuid(), nullable=False),
+        sa.Column('label', sa.String(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('votes', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('image_uuid', 'label', 'day')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_label_votes')
+    op.drop_table('daily_result_summary')
@@ -0,0 +1,29 @@
+# regrade.py
+# 저장된 캡챠 결과를 현재 이미지 라벨과 채점 규칙(app/grading.py)으로 다시 채점하는 오프라인 평가 CLI
+# 라벨을 고치거나 채점 기준(--pass-count)을 바꿨을 때 예전 제출 중 몇 개의 결과가 달라지는지 확인
+# 예) python regrade.py
+#     python regrade.py --pass-count 5 --url postgresql://user:pw@localhost/rwcaptcha
+# results(/first) 테이블에는 고른 이미지만 있고 문제 그리드가 저장되지 않아 다시 채점할 수 없으므로 results_second만 대상
+import argparse
+
+from sqlalchemy.orm import Session
+
+from app import database, grading
+
+
+def main():
+    parser = argparse.ArgumentParser(description="저장된 /second 결과 재채점")
+    parser.add_argument("--url", help="DB 주소 (기본: RWCAPTCHA_DATABASE_URL)")
+    parser.add_argument("--pass-count", type=int, default=grading.second.pass_count, help="통과에 필요한 맞힌 칸 수")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    engine = database.make_engine(args.url) if args.url else database.engine
+    grader = grading.SecondGrader(grading.second.images, args.pass_count)
+    with Session(bind=engine) as db:
+        total, same, to_fail, to_pass = grading.replay_second(db, grader, args.batch_size)
+    print(f"results_second {total}건 재채점: 같음 {same}, 통과->실패 {to_fail}, 실패->통과 {to_pass}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# retention.py
+# 보존 기간이 지난 결과/피드백을 날짜별 요약 테이블로 접고 원본 행을 지우는 CLI (app/retention.py)
+# 서버도 RWCAPTCHA_RETENTION_DAYS 가 설정되어 있으면 주기적으로 같은 작업을 하므로, 서버 밖에서 돌리거나 처음 한 번 정리할 때 사용
+# 예) python retention.py --days 90
+#     python retention.py --days 30 --archive "sqlite:///./archive/results-{month}.db"
+#     python retention.py --days 30 --vacuum      (SQLite 파일 크기 줄이기, 그동안 DB 전체가 잠기므로 서버를 멈추고)
+import argparse
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import database, export, retention
+
+
+def main():
+    parser = argparse.ArgumentParser(description="결과/피드백 보존 기간 정리")
+    parser.add_argument("--url", help="DB 주소 (기본: RWCAPTCHA_DATABASE_URL)")
+    parser.add_argument("--days", type=float, default=retention.RETENTION_DAYS or None, required=not retention.ENABLED,
+                        help="원본 행을 남겨 둘 기간 (일)")
+    parser.add_argument("--tables", nargs="+", choices=list(retention.SOURCES), help="정리할 테이블 (기본: 전부)")
+    parser.add_argument("--archive", default=retention.ARCHIVE_URL, help="지우기 전에 복사할 보관 DB 주소 ({month} -> YYYY-MM)")
+    parser.add_argument("--export-dir", default=export.EXPORT_DIR,
+                        help="이 폴더의 내보내기 워터마크 이전 행만 지움 (빈 문자열이면 확인하지 않음)")
+    parser.add_argument("--batch-size", type=int, default=retention.BATCH_SIZE)
+    parser.add_argument("--vacuum", action="store_true", help="끝난 뒤 SQLite VACUUM")
+    args = parser.parse_args()
+    if args.days <= 0:
+        sys.exit("--days 는 0보다 커야 합니다.")
+
+    engine = database.make_engine(args.url) if args.url else database.engine
+    with Session(bind=engine) as db:
+        result = retention.run_once(db, args.days, tables=args.tables, batch_size=args.batch_size,
+                                    archive_url=args.archive, export_dir=args.export_dir or None)
+    for table, n in result["compacted"].items():
+        print(f"{table}: {n}행 요약 후 삭제")
+    print(f"기준 시각 {result['cutoff']} 이전, {result['seconds']}초")
+    if args.vacuum and engine.dialect.name == "sqlite":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+        print("VACUUM 완료")
+
+
+if __name__ == "__main__":
+    main()